@@ -0,0 +1,702 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from io import StringIO
+from database import TramNetwork, TramLine, TramStop, Tram
+from checkpoint import Checkpointer, restore_state, write_state
+from delays import DelayModel, Distribution
+from event_log import EventLog, get_dwell_stats, get_round_trip_stats
+from database_io import (
+    read_chunks,
+    read_tram_stop,
+    read_tram_stop_connection,
+    read_tram_line
+)
+from gtfs import read_gtfs, write_gtfs
+from journey import JourneyPlanner
+from network_snapshot import NetworkSnapshot, save_network
+from occupancy import Occupancy, intervals_from_timetable
+from passengers import PassengerSimulator, uniform_demand
+from reliability import get_replication_seeds, run_replications
+from render import AnimationClock, TramLayer, FRAME_RATE
+from routing import TravelTimeIndex
+from scenarios import scenario_grid, run_scenarios
+from server import load_test
+from simulator import Clock, Simulator, EventSimulator
+from spatial import get_edges, index_tram_stops, index_edges
+from tiles import TileCache
+from timetable import Timetable
+
+"""
+Micro-benchmarks of the tram network database and the simulation engine.
+Run: python3 benchmark.py [name ...]
+"""
+
+
+def generate_network(
+        rows, columns, trams_per_line=0, minutes=2, interval=1):
+    """
+    Generates a grid of tram stops with one tram line along each row
+    """
+    network = TramNetwork()
+    for row in range(rows):
+        for column in range(columns):
+            id = str(row*columns + column)
+            tram_stop = TramStop(id, f'Stop {id}', column*10, row*10)
+            network.add_tram_stop(tram_stop)
+            if column > 0:
+                previous = network.get_tram_stop(str(row*columns + column-1))
+                network.add_connection(previous, tram_stop, minutes)
+    for row in range(rows):
+        list_tram_stops = network.get_list_tram_stops()
+        itinerary = list_tram_stops[row*columns:(row+1)*columns]
+        tram_line = TramLine(str(row), itinerary, 5, 0, interval)
+        for tram_number_line in range(1, trams_per_line + 1):
+            Tram(tram_line, tram_number_line)
+        network.add_line(tram_line)
+    return network
+
+
+def generate_files(rows, columns, minutes=2, interval=1):
+    """
+    Generates contents of configuration files of a grid network
+    with one tram line along each row
+    """
+    tram_stops = []
+    connections = []
+    lines = []
+    for row in range(rows):
+        ids = []
+        for column in range(columns):
+            id = str(row*columns + column)
+            tram_stops.append(f'{id},Stop {id},{column*10},{row*10}\n')
+            if column > 0:
+                connections.append(f'{ids[-1]},{id},{minutes}\n')
+            ids.append(id)
+        lines.append(f'{row},5,0,{interval},' + ','.join(ids) + '\n')
+    return (''.join(tram_stops), ''.join(connections), ''.join(lines))
+
+
+def bench_distance(repeat=100000):
+    """
+    Measures the cost of TramNetwork.get_distance for growing stop degree.
+    The time per call should not depend on the degree.
+    """
+    results = []
+    for degree in (2, 16, 128, 1024):
+        hub = TramStop('0', 'Hub')
+        list_tram_stops = [hub]
+        for number in range(1, degree + 1):
+            tram_stop = TramStop(str(number), f'Stop {number}', number, 0)
+            list_tram_stops.append(tram_stop)
+        network = TramNetwork(list_tram_stops)
+        for tram_stop in list_tram_stops[1:]:
+            network.add_connection(hub, tram_stop, 1)
+        last = list_tram_stops[-1]
+        seconds = timeit.timeit(
+            lambda: network.get_distance(hub, last), number=repeat)
+        results.append((f'degree {degree}', seconds / repeat * 1e9, 'ns'))
+    return results
+
+
+def bench_fleet(rows=1000, columns=50, trams_per_line=10, minutes=60):
+    """
+    Measures the cost of one simulated minute per moving tram
+    """
+    network = generate_network(rows, columns, trams_per_line)
+    simulator = Simulator(network, Clock(5, 0))
+    simulator.run_until(5*60 + trams_per_line)
+    start = time.perf_counter()
+    simulator.run_until(simulator.get_minute() + minutes)
+    seconds = time.perf_counter() - start
+    trams = len(simulator.get_fleet())
+    return [
+        (f'{trams} trams, minute', seconds / minutes * 1e3, 'ms'),
+        ('tram, minute', seconds / minutes / trams * 1e9, 'ns'),
+    ]
+
+
+def bench_events(rows=200, columns=20, trams_per_line=5, minutes=10):
+    """
+    Compares a full service day of the tick and the discrete-event engine
+    """
+    results = []
+    for engine in (Simulator, EventSimulator):
+        network = generate_network(
+            rows, columns, trams_per_line, minutes, interval=30)
+        simulator = engine(network, Clock(5, 0))
+        start = time.perf_counter()
+        simulator.run_until(24*60)
+        seconds = time.perf_counter() - start
+        results.append((engine.__name__, seconds * 1e3, 'ms'))
+    return results
+
+
+def without_slots(cls):
+    """
+    Returns a copy of the class which keeps attributes in __dict__,
+    like the class before __slots__ were added
+    """
+    attributes = {
+        name: value for name, value in vars(cls).items()
+        if name not in (*cls.__slots__, '__slots__')
+    }
+    return type(f'Dict{cls.__name__}', (), attributes)
+
+
+def measure_tram_stops(tram_stop_class, tram_stops, connections):
+    """
+    Returns memory in bytes taken by tram stops of given class
+    created from contents of configuration files
+    """
+    tracemalloc.start()
+    network = TramNetwork([
+        tram_stop_class(id, name, int(x), int(y))
+        for id, name, x, y in (
+            line.split(',') for line in tram_stops.splitlines())
+    ])
+    for line in connections.splitlines():
+        idA, idB, minutes = line.split(',')
+        network.add_connection(
+            network.get_tram_stop(idA), network.get_tram_stop(idB),
+            int(minutes))
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current
+
+
+def bench_memory(rows=1000, columns=100):
+    """
+    Measures memory taken by a loaded network of rows*columns tram stops
+    and compares tram stops with __slots__ with tram stops keeping
+    attributes in __dict__
+    """
+    tram_stops, connections, lines = generate_files(rows, columns)
+    tracemalloc.start()
+    list_tram_stops = read_tram_stop(StringIO(tram_stops))
+    network = TramNetwork(list_tram_stops)
+    read_tram_stop_connection(StringIO(connections), network)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del list_tram_stops, network
+    stops = rows*columns
+    slots = measure_tram_stops(TramStop, tram_stops, connections)
+    dictionaries = measure_tram_stops(
+        without_slots(TramStop), tram_stops, connections)
+    return [
+        (f'{stops} stops', current / 2**20, 'MiB'),
+        ('peak', peak / 2**20, 'MiB'),
+        ('per stop', current / stops, 'B'),
+        ('per stop, __dict__', dictionaries / stops, 'B'),
+        ('per stop, __slots__', slots / stops, 'B'),
+        ('saved by __slots__', (1 - slots / dictionaries)*100, '%'),
+    ]
+
+
+def bench_loading(sizes=(100, 400), columns=250):
+    """
+    Measures throughput of loading configuration files and peak memory
+    of reading them in chunks, for growing files
+    """
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, data in zip(
+                    ('stops', 'connections', 'lines'),
+                    generate_files(rows, columns)):
+                path = os.path.join(directory, name)
+                with open(path, 'w') as file_handle:
+                    file_handle.write(data)
+                paths.append(path)
+            tracemalloc.start()
+            for path in paths:
+                with open(path) as file_handle:
+                    for chunk in read_chunks(file_handle):
+                        pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            start = time.perf_counter()
+            network = TramNetwork()
+            with open(paths[0]) as file_handle:
+                read_tram_stop(file_handle, network)
+            with open(paths[1]) as file_handle:
+                read_tram_stop_connection(file_handle, network)
+            with open(paths[2]) as file_handle:
+                read_tram_line(file_handle, network)
+            seconds = time.perf_counter() - start
+        number_of_rows = rows*columns*2 + rows
+        label = f'{number_of_rows} rows'
+        results.append((label, number_of_rows / seconds, 'rows/s'))
+        results.append((label, peak / 2**20, 'MiB reading'))
+    return results
+
+
+def bench_snapshot(rows=400, columns=250):
+    """
+    Compares loading a network from configuration files and from a snapshot
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for name, data in zip(
+                ('stops', 'connections', 'lines'),
+                generate_files(rows, columns)):
+            path = os.path.join(directory, name)
+            with open(path, 'w') as file_handle:
+                file_handle.write(data)
+            paths.append(path)
+        start = time.perf_counter()
+        network = TramNetwork()
+        with open(paths[0]) as file_handle:
+            read_tram_stop(file_handle, network)
+        with open(paths[1]) as file_handle:
+            read_tram_stop_connection(file_handle, network)
+        with open(paths[2]) as file_handle:
+            for tram_line in read_tram_line(file_handle, network):
+                network.add_line(tram_line)
+        seconds = time.perf_counter() - start
+        results.append(('text files', seconds * 1e3, 'ms'))
+        path = os.path.join(directory, 'network.bin')
+        save_network(network, path)
+        start = time.perf_counter()
+        with NetworkSnapshot(path) as snapshot:
+            snapshot.get_tram_stop(0)
+            seconds = time.perf_counter() - start
+            results.append(('snapshot, open', seconds * 1e3, 'ms'))
+            snapshot.get_network()
+        seconds = time.perf_counter() - start
+        results.append(('snapshot, network', seconds * 1e3, 'ms'))
+    return results
+
+
+def bench_scenarios(intervals=(5, 10, 15, 20), trams=(2, 3, 4, 5)):
+    """
+    Measures throughput of running scenarios for growing number of workers
+    """
+    results = []
+    scenarios = scenario_grid(interval=intervals, trams=trams)
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        run_scenarios(['scenarios.py'], scenarios, workers=workers)
+        seconds = time.perf_counter() - start
+        label = f'{workers} workers'
+        results.append((label, len(scenarios) / seconds, 'scenarios/s'))
+    return results
+
+
+def bench_routing(rows=40, columns=40, repeat=100000):
+    """
+    Measures building, loading and querying the travel time index
+    """
+    network = generate_network(rows, columns)
+    list_tram_stops = network.get_list_tram_stops()
+    for row in range(rows - 1):
+        network.add_connection(
+            list_tram_stops[row*columns], list_tram_stops[(row+1)*columns], 3)
+    start = time.perf_counter()
+    index = TravelTimeIndex.build(network)
+    results = [('build', (time.perf_counter() - start) * 1e3, 'ms')]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'travel_times.bin')
+        index.save(path)
+        start = time.perf_counter()
+        index = TravelTimeIndex.load(network, path)
+        results.append(('load', (time.perf_counter() - start) * 1e3, 'ms'))
+        first = list_tram_stops[0]
+        last = list_tram_stops[-1]
+        seconds = timeit.timeit(
+            lambda: index.get_travel_time(first, last), number=repeat)
+        results.append(('query', seconds / repeat * 1e9, 'ns'))
+        index.close()
+    return results
+
+
+def bench_journey(rows=30, columns=30, trams_per_line=3, queries=200):
+    """
+    Measures journey planning on a grid of row and column tram lines,
+    single queries and batches of queries sharing the origin
+    """
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    list_tram_stops = network.get_list_tram_stops()
+    for column in range(columns):
+        itinerary = list_tram_stops[column::columns]
+        for previous, tram_stop in zip(itinerary, itinerary[1:]):
+            network.add_connection(previous, tram_stop, 2)
+        tram_line = TramLine(f'C{column}', itinerary, 5, 5, 10)
+        for tram_number_line in range(1, trams_per_line + 1):
+            Tram(tram_line, tram_number_line)
+        network.add_line(tram_line)
+    start = time.perf_counter()
+    planner = JourneyPlanner(network)
+    results = [('build', (time.perf_counter() - start) * 1e3, 'ms')]
+    first = list_tram_stops[0]
+    batch = [
+        (first, list_tram_stops[index*7 % len(list_tram_stops)], 8*60)
+        for index in range(queries)
+    ]
+    start = time.perf_counter()
+    for origin, destination, minute in batch:
+        planner.earliest_arrival(origin, destination, minute)
+    seconds = time.perf_counter() - start
+    results.append(('query', seconds / queries * 1e6, 'us'))
+    start = time.perf_counter()
+    planner.earliest_arrivals(batch)
+    seconds = time.perf_counter() - start
+    results.append(('batch, query', seconds / queries * 1e6, 'us'))
+    return results
+
+
+def bench_timetable(rows=100, columns=50, trams_per_line=5, repeat=100000):
+    """
+    Measures generating departure boards for the service day, regenerating
+    a single line and looking up next departures
+    """
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    start = time.perf_counter()
+    timetable = Timetable(network)
+    results = [('build', (time.perf_counter() - start) * 1e3, 'ms')]
+    tram_line = network.get_list_lines()[0]
+    start = time.perf_counter()
+    timetable.add_line(tram_line)
+    results.append(('line', (time.perf_counter() - start) * 1e3, 'ms'))
+    stop_id = tram_line.get_itinerary()[1].get_id()
+    timetable.get_board(stop_id)
+    seconds = timeit.timeit(
+        lambda: timetable.next_departures(stop_id, 12*60), number=repeat)
+    results.append(('query', seconds / repeat * 1e9, 'ns'))
+    return results
+
+
+def bench_gtfs(rows=200, columns=50, trams_per_line=5):
+    """
+    Measures exporting the schedule as GTFS feed and importing it again
+    """
+    network = generate_network(rows, columns, trams_per_line, interval=5)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_gtfs(network, directory)
+        results = [('export', time.perf_counter() - start, 's')]
+        with open(os.path.join(directory, 'stop_times.txt')) as file_handle:
+            number_of_rows = sum(1 for line in file_handle) - 1
+        start = time.perf_counter()
+        read_gtfs(directory)
+        seconds = time.perf_counter() - start
+    label = f'{number_of_rows} stop times'
+    results.append((label, seconds, 's'))
+    results.append((label, number_of_rows / seconds, 'rows/s'))
+    return results
+
+
+class NullRenderer():
+    """
+    Renderer which creates markers without drawing them
+    """
+    def create_marker(self):
+        return object()
+
+    def show_marker(self, marker, tram):
+        pass
+
+    def hide_marker(self, marker):
+        pass
+
+    def move_marker(self, marker, x, y):
+        pass
+
+    def render_tile(self, level, bounds, tram_stops, edges, labels):
+        return object()
+
+
+def bench_render(rows=200, columns=20, trams_per_line=5):
+    """
+    Measures updates of the tram layer during a simulated day,
+    the time per frame and the number of markers should stay flat
+    """
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    simulator = Simulator(network, Clock(5, 0))
+    layer = TramLayer(NullRenderer())
+    results = []
+    for hour in (6, 12, 18, 24):
+        seconds = 0
+        frames = 0
+        while simulator.get_minute() < hour*60:
+            simulator.step()
+            start = time.perf_counter()
+            layer.update(simulator.get_fleet())
+            seconds += time.perf_counter() - start
+            frames += 1
+        label = f'until {hour}:00'
+        results.append((f'{label}, frame', seconds / frames * 1e3, 'ms'))
+        results.append((f'{label}, markers', len(layer.get_pool()), ''))
+    return results
+
+
+def bench_animation(rows=200, columns=20, trams_per_line=5, frames=120):
+    """
+    Measures the time of frames of the animation at growing speeds,
+    steps of a frame are limited to FRAME_BUDGET s
+    """
+    results = []
+    for speed in (1, 60, 1000):
+        network = generate_network(rows, columns, trams_per_line, interval=10)
+        simulator = Simulator(network, Clock(5, 0))
+        simulator.run_until(7*60)
+        layer = TramLayer(NullRenderer())
+        animation = AnimationClock(speed)
+        start = time.perf_counter()
+        for frame in range(frames):
+            animation.advance(1 / FRAME_RATE)
+            steps, fraction = animation.run(simulator.step)
+            layer.update(simulator.get_fleet(), fraction)
+        seconds = time.perf_counter() - start
+        results.append((f'{speed}x, frame', seconds / frames * 1e3, 'ms'))
+    return results
+
+
+def bench_spatial(rows=316, columns=316, repeat=10000):
+    """
+    Measures building spatial indexes of a 100k-stop network, querying
+    the viewport while panning and finding the tram stop under the cursor
+    """
+    network = generate_network(rows, columns)
+    start = time.perf_counter()
+    stops_index = index_tram_stops(network)
+    edges_index = index_edges(get_edges(network))
+    results = [('build', (time.perf_counter() - start) * 1e3, 'ms')]
+    start = time.perf_counter()
+    pans = 100
+    for pan in range(pans):
+        bounds = (pan*20, 0, pan*20 + 1000, 600)
+        visible = stops_index.query(*bounds)
+        visible.update(edges_index.query(*bounds))
+    seconds = time.perf_counter() - start
+    results.append(('pan', seconds / pans * 1e3, 'ms'))
+    results.append(('visible items', len(visible), ''))
+    seconds = timeit.timeit(
+        lambda: stops_index.nearest(1503, 1497, 6), number=repeat)
+    results.append(('hit test', seconds / repeat * 1e6, 'us'))
+    return results
+
+
+def bench_tiles(rows=316, columns=316, frames=100):
+    """
+    Compares the first frame of a viewport of a 100k-stop network, which
+    collects elements of its tiles, with next frames using cached tiles
+    """
+    network = generate_network(rows, columns)
+    cache = TileCache(NullRenderer(), network)
+    results = []
+    for scale in (0.25, 1, 4):
+        viewport = (1000, 1000, 1000 + 1000/scale, 1000 + 600/scale)
+        start = time.perf_counter()
+        cache.get_visible_tiles(scale, *viewport)
+        seconds = time.perf_counter() - start
+        results.append((f'scale {scale}, first', seconds * 1e3, 'ms'))
+        start = time.perf_counter()
+        for frame in range(frames):
+            cache.get_visible_tiles(scale, *viewport)
+        seconds = time.perf_counter() - start
+        results.append((f'scale {scale}, next', seconds / frames * 1e6, 'us'))
+    return results
+
+
+def bench_server(rows=200, columns=20, trams_per_line=5, subscribers=300,
+                 ticks=100):
+    """
+    Streams positions of trams of a large network to local subscribers
+    as fast as the server can tick
+    """
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    server, clients, seconds = asyncio.run(
+        load_test(network, subscribers, ticks, 0))
+    tick_times = sorted(server.get_tick_times())
+    return [
+        (f'{subscribers} subscribers', ticks / seconds, 'ticks/s'),
+        ('tick, median', tick_times[len(tick_times) // 2] * 1e3, 'ms'),
+        ('tick, max', tick_times[-1] * 1e3, 'ms'),
+    ]
+
+
+def bench_passengers(rows=100, columns=20, trams_per_line=5,
+                     daily_trips=10**6, hours=(5, 8)):
+    """
+    Compares ticks of the simulator with and without a million daily
+    passenger trips, the memory is taken after the first hour of demand
+    """
+    results = []
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    simulator = Simulator(network, Clock(hours[0], 0))
+    start = time.perf_counter()
+    simulator.run_until(hours[1]*60)
+    ticks = (hours[1] - hours[0])*60
+    seconds = time.perf_counter() - start
+    results.append(('tick, empty trams', seconds / ticks * 1e3, 'ms'))
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    demand = uniform_demand(network, daily_trips)
+    tracemalloc.start()
+    simulator = PassengerSimulator(
+        network, demand, Clock(hours[0] - 1, 0), seed=1)
+    simulator.run_until(hours[0]*60)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    simulator.run_until(hours[1]*60)
+    seconds = time.perf_counter() - start
+    passengers = simulator.get_passengers()
+    results.append(('tick, passengers', seconds / ticks * 1e3, 'ms'))
+    results.append(('passengers spawned', passengers.get_spawned(), ''))
+    results.append(('memory after 1 hour', current / 2**20, 'MiB'))
+    return results
+
+
+def bench_occupancy(rows=200, columns=20, trams_per_line=5):
+    """
+    Checks occupancy of segments by all trips of the service day
+    of a large network, the sweep is linear after sorting intervals
+    """
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    start = time.perf_counter()
+    intervals = list(intervals_from_timetable(network))
+    generated = time.perf_counter() - start
+    start = time.perf_counter()
+    occupancy = Occupancy(intervals)
+    sorted_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    occupancy.get_headway_violations()
+    occupancy.get_overtakings()
+    occupancy.get_bunching()
+    checked = time.perf_counter() - start
+    return [
+        (f'{len(intervals)} intervals', generated * 1e3, 'ms'),
+        ('sort', sorted_seconds * 1e3, 'ms'),
+        ('conflicts', checked * 1e3, 'ms'),
+    ]
+
+
+def bench_reliability(rows=10, columns=20, trams_per_line=5,
+                      replications=100):
+    """
+    Runs replications of the service day with random delays on all
+    segments and tram stops, each replication draws from its own generator
+    """
+    network = generate_network(rows, columns, trams_per_line, interval=10)
+    model = DelayModel(
+        Distribution('lognormal', -2.5, 0.8), Distribution('exponential', 0.1))
+    start = time.perf_counter()
+    histograms = run_replications(
+        network, model, get_replication_seeds(0, replications))
+    seconds = time.perf_counter() - start
+    arrivals = sum(sum(histogram) for histogram in histograms.values())
+    return [
+        (f'{replications} replications', seconds, 's'),
+        ('arrivals/s', arrivals / seconds, ''),
+    ]
+
+
+def bench_checkpoint(rows=1000, columns=50, trams_per_line=10, minutes=60,
+                     every=10):
+    """
+    Measures the size and the cost of checkpoints of a large fleet
+    and their overhead on the simulation
+    """
+    network = generate_network(rows, columns, trams_per_line)
+    simulator = Simulator(network, Clock(5, 0))
+    simulator.run_until(5*60 + trams_per_line)
+    start = time.perf_counter()
+    blob = write_state(simulator)
+    write_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    restore_state(simulator, blob)
+    restore_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    simulator.run_until(simulator.get_minute() + minutes)
+    seconds = time.perf_counter() - start
+    checkpointer = Checkpointer(simulator, every)
+    start = time.perf_counter()
+    for minute in range(minutes):
+        simulator.step()
+        checkpointer.update()
+    checkpoint_seconds = time.perf_counter() - start
+    return [
+        (f'{len(simulator.get_fleet())} trams, size', len(blob) / 1024,
+         'KiB'),
+        ('write', write_seconds * 1e3, 'ms'),
+        ('restore', restore_seconds * 1e3, 'ms'),
+        (f'overhead, every {every}', (checkpoint_seconds / seconds - 1)*100,
+         '%'),
+    ]
+
+
+def bench_event_log(rows=100, columns=50, trams_per_line=10, repeat=3):
+    """
+    Measures the overhead of recording all events of the service day
+    into the columnar event log and the cost of statistics of the log
+    """
+    results = {}
+    for run in range(repeat):
+        for recorded in (False, True):
+            network = generate_network(rows, columns, trams_per_line)
+            event_log = EventLog(network) if recorded else None
+            simulator = Simulator(network, Clock(5, 0), event_log)
+            start = time.perf_counter()
+            simulator.run_until(24*60)
+            seconds = time.perf_counter() - start
+            results[recorded] = min(results.get(recorded, seconds), seconds)
+    start = time.perf_counter()
+    event_columns = event_log.get_columns()
+    get_dwell_stats(event_columns, network)
+    get_round_trip_stats(event_columns, network)
+    stats_seconds = time.perf_counter() - start
+    return [
+        (f'{len(event_log)} events, day', results[True], 's'),
+        ('overhead', (results[True] / results[False] - 1)*100, '%'),
+        ('statistics', stats_seconds * 1e3, 'ms'),
+    ]
+
+
+BENCHMARKS = {
+    'distance': bench_distance,
+    'fleet': bench_fleet,
+    'events': bench_events,
+    'memory': bench_memory,
+    'loading': bench_loading,
+    'snapshot': bench_snapshot,
+    'scenarios': bench_scenarios,
+    'routing': bench_routing,
+    'journey': bench_journey,
+    'timetable': bench_timetable,
+    'gtfs': bench_gtfs,
+    'render': bench_render,
+    'animation': bench_animation,
+    'spatial': bench_spatial,
+    'tiles': bench_tiles,
+    'passengers': bench_passengers,
+    'occupancy': bench_occupancy,
+    'reliability': bench_reliability,
+    'checkpoint': bench_checkpoint,
+    'event_log': bench_event_log,
+    'server': bench_server,
+}
+
+
+def main(args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*')
+    arguments = parser.parse_args(args[1::])
+    names = arguments.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f'unknown benchmark {name}')
+    for name in names:
+        for label, value, unit in BENCHMARKS[name]():
+            print(f'{name:<12} {label:<24} {value:>14.1f} {unit}')
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,379 @@
+import os
+import struct
+import sys
+from array import array
+from simulator import Simulator
+
+"""
+Checkpoints of the state of the simulation. The state of the simulator,
+its fleet, trams and lines is written into a compact binary blob, which
+restores a simulator of the same network exactly as it was. The blob
+starts with a header followed by little-endian columns:
+
+    header                  magic, version, simulated minute, numbers
+                            of trams, lines, tram stops and moving trams
+    x, y, move_x, move_y    positions of trams and their moves in a minute
+    segment, remaining      last tram stop number, minutes to the next one
+    activated               whether trams are moving
+    table                   direction of the segment table trams follow
+                            (-1 if they have not followed any yet)
+    interval                minutes from the start of the line to the next
+                            departure of trams
+    flags                   MOVE, REVERSED and ITINERARY of trams
+    last_stop               position of the last reached tram stop
+                            in the itinerary of trams (-1 if none), lines
+                            can visit the same tram stop more than once
+    moving_count            number of moving trams of each line
+    moving                  indexes of moving trams of lines in the fleet
+
+Checkpoints are kept only for the Simulator, states of other engines
+(e.g. passengers) are not written. The simulation is resumed from
+the latest checkpoint in a directory by resume_latest, e.g. in the GUI:
+
+    python3 gui.py --checkpoint-dir checkpoints --resume
+"""
+
+MAGIC = b'TRAMCKP\0'
+VERSION = 1
+HEADER = struct.Struct('<8sHHiIIII')
+FLEET_COLUMNS = (
+    ('x', 'd'), ('y', 'd'), ('move_x', 'd'), ('move_y', 'd'),
+    ('segment', 'i'), ('remaining', 'i'), ('activated', 'b'))
+TRAM_COLUMNS = (
+    ('table', 'b'), ('interval', 'i'), ('flags', 'B'), ('last_stop', 'i'))
+MOVE = 1
+REVERSED = 2
+ITINERARY = 4
+EVERY = 60
+MAX_CHECKPOINTS = 100
+
+
+class InvalidCheckpointError(Exception):
+    def __init__(self):
+        super().__init__('Data is not a checkpoint of this simulation')
+
+
+class UnsupportedCheckpointVersionError(Exception):
+    def __init__(self, version):
+        super().__init__(f'Unsupported checkpoint version {version}')
+
+
+class UnsupportedSimulatorError(Exception):
+    def __init__(self):
+        super().__init__('Only the state of the Simulator can be saved')
+
+
+def check_simulator(simulator):
+    if type(simulator) is not Simulator:
+        raise UnsupportedSimulatorError
+
+
+def get_last_stop_position(itinerary, last_tram_stop, segment):
+    """
+    Returns the position of the last reached tram stop in the itinerary,
+    which is the last tram stop number unless the itinerary was restarted
+    at the start of the day (-1 if the tram has not reached any)
+    """
+    if not last_tram_stop:
+        return -1
+    if segment < len(itinerary) and itinerary[segment] is last_tram_stop:
+        return segment
+    return itinerary.index(last_tram_stop)
+
+
+def write_state(simulator):
+    """
+    Returns the state of the simulator as a binary blob
+    """
+    check_simulator(simulator)
+    network = simulator.get_network()
+    fleet = simulator.get_fleet()
+    trams = fleet.get_trams()
+    fleet_columns = fleet.get_columns()
+    columns = [
+        array(typecode, fleet_columns[name])
+        for name, typecode in FLEET_COLUMNS
+    ]
+    tram_columns = {
+        name: array(typecode) for name, typecode in TRAM_COLUMNS}
+    for index, tram in enumerate(trams):
+        tram_interval, move, reversed, itinerary, last_tram_stop = (
+            tram.get_state())
+        table = fleet.get_table(index)
+        tram_columns['table'].append(
+            -1 if table is None else int(table.reversed))
+        tram_columns['interval'].append(tram_interval)
+        tram_columns['flags'].append(
+            MOVE*bool(move) | REVERSED*bool(reversed) |
+            ITINERARY*bool(itinerary))
+        tram_columns['last_stop'].append(get_last_stop_position(
+            itinerary, last_tram_stop, fleet.get_segment(index)))
+    columns.extend(tram_columns.values())
+    moving_count = array('I')
+    moving = array('I')
+    for tram_line in network.get_list_lines():
+        moving_trams = tram_line.get_moving_tram()
+        moving_count.append(len(moving_trams))
+        moving.extend(tram.get_index() for tram in moving_trams)
+    columns.extend((moving_count, moving))
+    blob = bytearray(HEADER.pack(
+        MAGIC, VERSION, 0, simulator.get_minute(), len(trams),
+        len(network.get_list_lines()),
+        len(network.get_list_tram_stops()), len(moving)))
+    for column in columns:
+        if sys.byteorder == 'big':
+            column.byteswap()
+        blob.extend(column.tobytes())
+    return bytes(blob)
+
+
+def read_columns(blob, offset, names, size):
+    """
+    Returns columns with given names and typecodes, each of given size,
+    and the offset after them
+    """
+    columns = {}
+    for name, typecode in names:
+        column = array(typecode)
+        end = offset + size*column.itemsize
+        column.frombytes(blob[offset:end])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        columns[name] = column
+        offset = end
+    return (columns, offset)
+
+
+def restore_state(simulator, blob):
+    """
+    Restores the state of the simulator from the binary blob written
+    for a simulator of the same network
+    """
+    check_simulator(simulator)
+    if len(blob) < HEADER.size:
+        raise InvalidCheckpointError
+    magic, version, _, minute, trams, lines, tram_stops, moving = (
+        HEADER.unpack_from(blob))
+    if magic != MAGIC:
+        raise InvalidCheckpointError
+    if version != VERSION:
+        raise UnsupportedCheckpointVersionError(version)
+    network = simulator.get_network()
+    fleet = simulator.get_fleet()
+    list_tram_stops = network.get_list_tram_stops()
+    list_lines = network.get_list_lines()
+    tram_size = sum(
+        array(typecode).itemsize
+        for name, typecode in (*FLEET_COLUMNS, *TRAM_COLUMNS))
+    size = HEADER.size + trams*tram_size + 4*(lines + moving)
+    if (trams, lines, tram_stops, size) != (
+            len(fleet), len(list_lines), len(list_tram_stops), len(blob)):
+        raise InvalidCheckpointError
+    columns, offset = read_columns(
+        blob, HEADER.size, (*FLEET_COLUMNS, *TRAM_COLUMNS), trams)
+    moving_columns, offset = read_columns(
+        blob, offset, (('moving_count', 'I'),), lines)
+    moving_columns.update(read_columns(
+        blob, offset, (('moving', 'I'),), moving)[0])
+    if (sum(moving_columns['moving_count']) != moving or
+            any(index >= trams for index in moving_columns['moving']) or
+            any(table not in (-1, 0, 1) for table in columns['table'])):
+        raise InvalidCheckpointError
+    fleet.set_columns(columns)
+    trams = fleet.get_trams()
+    for index, tram in enumerate(trams):
+        tram_line = tram.get_line()
+        flags = columns['flags'][index]
+        reversed = bool(flags & REVERSED)
+        itinerary = []
+        if flags & ITINERARY:
+            itinerary = tram_line.get_itinerary()
+            if reversed:
+                itinerary = itinerary[::-1]
+        last_stop = columns['last_stop'][index]
+        if last_stop >= len(itinerary):
+            raise InvalidCheckpointError
+        tram.set_state(
+            columns['interval'][index], bool(flags & MOVE), reversed,
+            itinerary, itinerary[last_stop] if last_stop >= 0 else 0)
+        table = columns['table'][index]
+        fleet.set_table(
+            index,
+            None if table < 0 else tram_line.get_segment_table(bool(table)))
+    first = 0
+    for tram_line, count in zip(list_lines, moving_columns['moving_count']):
+        tram_line.get_moving_tram()[:] = [
+            trams[index]
+            for index in moving_columns['moving'][first:first + count]
+        ]
+        first += count
+    simulator.set_minute(minute)
+
+
+def get_checkpoint_path(directory, minute):
+    return os.path.join(directory, f'checkpoint_{minute:06}.bin')
+
+
+def write_checkpoint_file(path, blob):
+    """
+    Writes the checkpoint, a crash while writing leaves the previous
+    file with the same path intact
+    """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file_handle:
+        file_handle.write(blob)
+    os.replace(temporary_path, path)
+
+
+def save_checkpoint(simulator, path):
+    write_checkpoint_file(path, write_state(simulator))
+
+
+def load_checkpoint(simulator, path):
+    with open(path, 'rb') as file_handle:
+        restore_state(simulator, file_handle.read())
+
+
+def find_latest_checkpoint(directory):
+    """
+    Returns the path to the checkpoint of the latest minute in the directory
+    or None if there is no checkpoint
+    """
+    names = [
+        name for name in os.listdir(directory)
+        if name.startswith('checkpoint_') and name.endswith('.bin')
+    ]
+    if not names:
+        return None
+    return os.path.join(directory, max(names))
+
+
+def resume_latest(simulator, directory):
+    """
+    Restores the simulator from the latest checkpoint in the directory.
+    Returns the minute of the checkpoint or None if there is none
+    """
+    if not os.path.isdir(directory):
+        return None
+    path = find_latest_checkpoint(directory)
+    if path is None:
+        return None
+    load_checkpoint(simulator, path)
+    return simulator.get_minute()
+
+
+class Checkpointer():
+    """
+    Class Checkpointer. Takes checkpoints of the simulator every given
+    number of simulated minutes and rewinds the simulator to them.
+    The state is serialized on the thread of the simulator, since each
+    step changes the columns of the fleet write_state copies, only
+    writing files is left to the executor.
+    Contains attributes:
+    :param simulator: simulation engine
+    :type simulator: Simulator
+
+    :param every: simulated minutes between checkpoints
+    :type every: int
+
+    :param checkpoints: blobs of checkpoints by their minutes, the earliest
+                        are dropped over max_checkpoints
+    :type checkpoints: dict
+
+    :param directory: if given, checkpoints are also written into files
+                      there, in the background if an executor is given
+    :type directory: str
+
+    :param pending: files being written by the executor
+    :type pending: list of concurrent.futures.Future
+    """
+    def __init__(
+            self, simulator, every=EVERY, directory=None, executor=None,
+            max_checkpoints=MAX_CHECKPOINTS):
+        check_simulator(simulator)
+        self._simulator = simulator
+        self._every = every
+        self._checkpoints = {}
+        self._max_checkpoints = max_checkpoints
+        self._directory = directory
+        self._executor = executor
+        self._pending = []
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def get_minutes(self):
+        return sorted(self._checkpoints)
+
+    def take(self):
+        """
+        Takes the checkpoint of the current minute
+        """
+        minute = self._simulator.get_minute()
+        blob = write_state(self._simulator)
+        self._checkpoints[minute] = blob
+        while len(self._checkpoints) > self._max_checkpoints:
+            del self._checkpoints[min(self._checkpoints)]
+        if self._directory is None:
+            return
+        path = get_checkpoint_path(self._directory, minute)
+        if self._executor is None:
+            write_checkpoint_file(path, blob)
+        else:
+            self._pending = [
+                future for future in self._pending if not future.done()]
+            self._pending.append(
+                self._executor.submit(write_checkpoint_file, path, blob))
+
+    def update(self):
+        """
+        Takes the checkpoint if it is due in the current minute.
+        Returns whether it was taken
+        """
+        minute = self._simulator.get_minute()
+        if minute % self._every or minute in self._checkpoints:
+            return False
+        self.take()
+        return True
+
+    def flush(self):
+        """
+        Waits until files of checkpoints are written
+        """
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def rewind(self, minute):
+        """
+        Restores the latest checkpoint at given minute or before it.
+        Returns the minute of the checkpoint or None if there is none
+        """
+        earlier = [
+            checkpoint for checkpoint in self._checkpoints
+            if checkpoint <= minute
+        ]
+        if not earlier:
+            return None
+        checkpoint = max(earlier)
+        restore_state(self._simulator, self._checkpoints[checkpoint])
+        return checkpoint
+
+    def rewind_previous(self):
+        """
+        Restores the latest checkpoint before the current minute
+        """
+        return self.rewind(self._simulator.get_minute() - 1)
+
+    def forward_next(self):
+        """
+        Restores the earliest checkpoint after the current minute, taken
+        before the simulator was rewound
+        """
+        minute = self._simulator.get_minute()
+        later = [
+            checkpoint for checkpoint in self._checkpoints
+            if checkpoint > minute
+        ]
+        if not later:
+            return None
+        return self.rewind(min(later))
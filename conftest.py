@@ -0,0 +1,65 @@
+import pytest
+from database import TramNetwork, TramLine, TramStop, Tram
+
+"""
+Fixtures shared by unit tests
+"""
+
+
+def build_network(trams=2, interval=10):
+    tram_stopA = TramStop('1', 'Teatr Bagatela', 0, 0)
+    tram_stopB = TramStop('2', 'Stary Kleparz', 40, 0)
+    tram_stopC = TramStop('3', 'Teatr Słowackiego', 40, 30)
+    network = TramNetwork([tram_stopA, tram_stopB, tram_stopC])
+    network.add_connection(tram_stopA, tram_stopB, 4)
+    network.add_connection(tram_stopB, tram_stopC, 3)
+    tram_line = TramLine(
+        '1', [tram_stopA, tram_stopB, tram_stopC], 5, 0, interval)
+    for tram_number_line in range(1, trams + 1):
+        Tram(tram_line, tram_number_line)
+    network.add_line(tram_line)
+    return network
+
+
+def build_line2(
+        network, itinerary=('3', '4'), minutes_start=5, interval=15):
+    """
+    Adds tram stop Poczta Główna connected to Stary Kleparz and
+    Teatr Słowackiego, and line 2 over tram stops with given IDs
+    """
+    tram_stopA, tram_stopB, tram_stopC = network.get_list_tram_stops()
+    tram_stopD = TramStop('4', 'Poczta Główna', 80, 30)
+    network.add_tram_stop(tram_stopD)
+    network.add_connection(tram_stopC, tram_stopD, 5)
+    network.add_connection(tram_stopB, tram_stopD, 6)
+    tram_line2 = TramLine(
+        '2', [network.get_tram_stop(id) for id in itinerary],
+        5, minutes_start, interval)
+    Tram(tram_line2, 1)
+    network.add_line(tram_line2)
+    return network
+
+
+@pytest.fixture
+def create_network():
+    """
+    Returns the function creating the network of tram stops
+    Teatr Bagatela - Stary Kleparz - Teatr Słowackiego with line 1,
+    its trams depart from 5:00 every interval minutes
+    """
+    return build_network
+
+
+@pytest.fixture
+def network():
+    return build_network()
+
+
+@pytest.fixture
+def add_line2():
+    """
+    Returns the function adding tram stop Poczta Główna and line 2
+    to the network, by default from Teatr Słowackiego at 5:05
+    every 15 minutes
+    """
+    return build_line2
@@ -1,3 +1,6 @@
+from array import array
+
+
 class InvalidTimeError(Exception):
     def __init__(self):
         super().__init__('Incorrect time')
@@ -13,6 +16,24 @@ class InvalidLineNumberError(Exception):
         super().__init__('Line number must be positive')
 
 
+class TramStopsNotConnectedError(Exception):
+    def __init__(self):
+        super().__init__('Subsequent tram stops of line are not connected')
+
+
+def get_segment(tram_stopA, tram_stopB):
+    """
+    Returns the track segment between tram stops (pair of their IDs,
+    the same in both directions) and whether it is run forward
+    from tram_stopA to tram_stopB
+    """
+    idA = tram_stopA.get_id()
+    idB = tram_stopB.get_id()
+    if idA < idB:
+        return ((idA, idB), True)
+    return ((idB, idA), False)
+
+
 class TramNetwork():
     """
     Class TramNetwork. Contains attributes:
@@ -32,10 +53,49 @@ class TramNetwork():
             self._list_lines = []
         else:
             self._list_lines = list_lines
+        self._tram_stops_by_id = {}
+        self._positions = set()
+        for tram_stop in self._list_tram_stops:
+            self._index_tram_stop(tram_stop)
+
+    def _index_tram_stop(self, tram_stop):
+        self._tram_stops_by_id[tram_stop.get_id()] = tram_stop
+        self._positions.add((tram_stop.get_x(), tram_stop.get_y()))
 
     def get_list_tram_stops(self):
         return self._list_tram_stops
 
+    def get_tram_stop(self, id):
+        """
+        Returns tram stop with given ID or None if there is no such stop
+        """
+        return self._tram_stops_by_id.get(id)
+
+    def has_position(self, x, y):
+        """
+        Checks if any tram stop is located at given coordinates
+        """
+        return (x, y) in self._positions
+
+    def add_tram_stop(self, tram_stop):
+        """
+        Adds tram stop to the tram network
+        """
+        self._list_tram_stops.append(tram_stop)
+        self._index_tram_stop(tram_stop)
+
+    def is_connected(self, tram_stopA, tram_stopB):
+        """
+        Checks if tram stops are directly connected
+        """
+        return tram_stopA.get_distance(tram_stopB) is not None
+
+    def add_connection(self, tram_stopA, tram_stopB, distance):
+        """
+        Adds connection between tram stops of the tram network
+        """
+        tram_stopA.add_connected_stop(tram_stopB, distance)
+
     def get_list_lines(self):
         return self._list_lines
 
@@ -52,9 +112,69 @@ class TramNetwork():
         """
         Returns the time in which the tram travels between connected tram stops
         """
-        for tram_stop in tram_stopA.get_connected_stops():
-            if tram_stop[0] == tram_stopB:
-                return tram_stop[1]
+        return tram_stopA.get_distance(tram_stopB)
+
+
+class SegmentTable():
+    """
+    Class SegmentTable. Precomputed segments between subsequent tram stops
+    of a tram line in one direction. The i-th element of each array
+    describes the segment starting at the i-th tram stop. Contains attributes:
+    :param start_x, start_y: the coordinates of the start of segments
+    :type start_x, start_y: array of int
+
+    :param end_x, end_y: the coordinates of the end of segments
+    :type end_x, end_y: array of int
+
+    :param move_x, move_y: distance travelled in one minute on segments
+    :type move_x, move_y: array of float
+
+    :param minutes: travel time of segments
+    :type minutes: array of int
+
+    :param offset: travel time from the first tram stop to start of segments
+    :type offset: array of int
+
+    :param reversed: whether segments run from the last to the first
+                     tram stop of the line
+    :type reversed: bool
+    """
+    def __init__(self, itinerary, reversed=False):
+        self.reversed = reversed
+        self.start_x = array('l')
+        self.start_y = array('l')
+        self.end_x = array('l')
+        self.end_y = array('l')
+        self.move_x = array('d')
+        self.move_y = array('d')
+        self.minutes = array('l')
+        self.offset = array('l')
+        offset = 0
+        for last, next in zip(itinerary, itinerary[1:]):
+            distance = last.get_distance(next)
+            if distance is None:
+                raise TramStopsNotConnectedError
+            x_difference = next.get_x() - last.get_x()
+            y_difference = next.get_y() - last.get_y()
+            self.start_x.append(last.get_x())
+            self.start_y.append(last.get_y())
+            self.end_x.append(next.get_x())
+            self.end_y.append(next.get_y())
+            self.move_x.append(float(x_difference)/distance)
+            self.move_y.append(float(y_difference)/distance)
+            self.minutes.append(distance)
+            self.offset.append(offset)
+            offset += distance
+        self._total_minutes = offset
+
+    def __len__(self):
+        return len(self.minutes)
+
+    def get_total_minutes(self):
+        """
+        Returns the travel time from the first to the last tram stop
+        """
+        return self._total_minutes
 
 
 class TramLine():
@@ -76,6 +196,11 @@ class TramLine():
     :param list_trams: all trams belonging to the line
     :type list_trams: list
     """
+    __slots__ = (
+        '_name', '_list_tram_stops', '_list_trams', '_moving_tram',
+        '_hours_start', '_minutes_start', '_interval',
+        '_segment_tables', '_segment_tables_stops')
+
     def __init__(
             self, name, list_trams_stops=None, hours_start=0,
             minutes_start=0, interval=15, list_trams=None):
@@ -101,6 +226,8 @@ class TramLine():
             raise InvalidIntervalError
         else:
             self._interval = interval
+        self._segment_tables = None
+        self._segment_tables_stops = None
 
     def get_number(self):
         return self._name
@@ -123,6 +250,33 @@ class TramLine():
     def get_itinerary(self):
         return self._list_tram_stops
 
+    def set_itinerary(self, list_tram_stops):
+        self._list_tram_stops = list_tram_stops
+        self._segment_tables = None
+
+    def get_segment_table(self, reversed=False):
+        """
+        Returns segment table of the line in given direction.
+        Tables are built once and rebuilt only when tram stops of
+        the itinerary, their coordinates or their connections have changed
+        """
+        itinerary = self._list_tram_stops
+        if (self._segment_tables is None or
+                self._segment_tables_stops != itinerary):
+            self._segment_tables = (
+                SegmentTable(itinerary),
+                SegmentTable(itinerary[::-1], reversed=True))
+            self._segment_tables_stops = list(itinerary)
+            for tram_stop in itinerary:
+                tram_stop._lines.append(self)
+        return self._segment_tables[1 if reversed else 0]
+
+    def invalidate_segment_tables(self):
+        """
+        Makes segment tables of the line rebuilt when they are needed again
+        """
+        self._segment_tables = None
+
     def add_tram(self, tram, number):
         """
         Adds tram to the tram line
@@ -139,27 +293,26 @@ class TramStop():
     :param x, y: the coordinates of the location of the tram stop
     :type x, y: int, int
 
-    :param connected_stops_id: all ID's of connected tram stops with this
-    :type connected_stops_id: list of int
+    :param connected_stops: all connected tram stops with this
+                            and the travel time to each of them
+    :type connected_stops: list of (TramStop, int) pairs
 
-    :param connected_stops: minutes_start: all connected tram stops with this
-    :type connected_stops: list of objects
+    :param lines: tram lines with segment tables built from the tram stop,
+                  they are rebuilt when its coordinates or connections change
+    :type lines: list of TramLine
     """
-    def __init__(
-                self, id, name, x=0, y=0,
-                connected_stops_id=None, connected_stops=None):
+    __slots__ = ('_id', '_name', '_x', '_y', '_connected_stops', '_lines')
+
+    def __init__(self, id, name, x=0, y=0, connected_stops=None):
         self._id = id
         self._x = x
         self._y = y
         self._name = name
-        if connected_stops_id is None:
-            self._connected_stops_id = []
-        else:
-            self._connected_stops_id = connected_stops_id
         if connected_stops is None:
-            self._connected_stops = []
+            self._connected_stops = {}
         else:
-            self._connected_stops = connected_stops
+            self._connected_stops = dict(connected_stops)
+        self._lines = []
 
     def get_id(self):
         return self._id
@@ -178,19 +331,35 @@ class TramStop():
 
     def set_x(self, x):
         self._x = x
+        self._invalidate_lines()
 
     def set_y(self, y):
         self._y = y
+        self._invalidate_lines()
 
     def get_connected_stops(self):
-        return self._connected_stops
+        return list(self._connected_stops.items())
+
+    def get_distance(self, other):
+        """
+        Returns the travel time to connected tram stop
+        or None if the tram stops are not connected
+        """
+        return self._connected_stops.get(other)
 
     def add_connected_stop(self, other, distance):
         """
         Adds pair of connected tram stops
         """
-        self._connected_stops.append((other, distance))
-        other._connected_stops.append((self, distance))
+        self._connected_stops[other] = distance
+        other._connected_stops[self] = distance
+        self._invalidate_lines()
+        other._invalidate_lines()
+
+    def _invalidate_lines(self):
+        for line in self._lines:
+            line.invalidate_segment_tables()
+        self._lines = []
 
 
 class Tram():
@@ -204,7 +373,17 @@ class Tram():
 
     :param x, y: the coordinates of the actual location of the tram
     :type x, y: int, int
+
+    :param fleet: array-backed store keeping the state of the tram
+                  (location, last tram stop number, activation) once
+                  the tram is added to it
+    :type fleet: Fleet
     """
+    __slots__ = (
+        '_line', '_line_number', '_x', '_y', '_last_tram_stop_number',
+        '_activated', '_tram_interval', 'itinerary', '_last_tram_stop',
+        '_move', '_reversed', '_fleet', '_index')
+
     def __init__(self, line, line_number, x=0, y=0):
         self._line = line
         if line_number <= 0:
@@ -218,12 +397,25 @@ class Tram():
         self._activated = False
         last_line_number = self.get_line_number()-1
         self._tram_interval = last_line_number * self._line.get_interval()
-        self._itinerary = []
+        self.itinerary = []
         self._last_tram_stop = 0
         self._move = False
+        self._reversed = False
+        self._fleet = None
+        self._index = None
+
+    def attach(self, fleet, index):
+        """
+        Makes the tram a view of the element of the fleet with given index
+        """
+        self._fleet = fleet
+        self._index = index
+
+    def get_fleet(self):
+        return self._fleet
 
-    def get_point(self):
-        return self._point
+    def get_index(self):
+        return self._index
 
     def get_line(self):
         return self._line
@@ -249,31 +441,62 @@ class Tram():
         self.set_line_number(number)
 
     def get_x(self):
-        return self._x
+        if self._fleet is None:
+            return self._x
+        return self._fleet.get_x(self._index)
 
     def set_x(self, x):
-        self._x = x
+        if self._fleet is None:
+            self._x = x
+        else:
+            self._fleet.set_x(self._index, x)
 
     def get_y(self):
-        return self._y
+        if self._fleet is None:
+            return self._y
+        return self._fleet.get_y(self._index)
 
     def set_y(self, y):
-        self._y = y
+        if self._fleet is None:
+            self._y = y
+        else:
+            self._fleet.set_y(self._index, y)
 
     def get_last_tram_stop_number(self):
-        return self._last_tram_stop_number
+        if self._fleet is None:
+            return self._last_tram_stop_number
+        return self._fleet.get_segment(self._index)
+
+    def set_last_tram_stop_number(self, number):
+        if self._fleet is None:
+            self._last_tram_stop_number = number
+        else:
+            self._fleet.set_segment(self._index, number)
 
     def get_last_tram_stop(self):
         return self._last_tram_stop
 
     def increase_last_tram_stop_number(self):
-        self._last_tram_stop_number += 1
+        number = self.get_last_tram_stop_number()
+        self.set_last_tram_stop_number(number + 1)
 
     def get_activated(self):
-        return self._activated
+        if self._fleet is None:
+            return self._activated
+        return self._fleet.get_activated(self._index)
 
     def set_activated(self, value):
-        self._activated = value
+        if self._fleet is None:
+            self._activated = value
+        else:
+            self._fleet.set_activated(self._index, value)
+
+    def get_placed(self):
+        """
+        Returns whether the tram has departed at least once,
+        since then it is shown on the map
+        """
+        return self._move
 
     def get_start_time(self):
         """
@@ -289,10 +512,7 @@ class Tram():
         self._tram_interval = 0
         tram_line = self.get_line()
         itinerary = tram_line.get_itinerary()
-        if self.get_line_number() % 2 == 0:
-            self.itinerary = itinerary[::-1]
-        else:
-            self.itinerary = itinerary
+        self.set_itinerary(itinerary)
 
     def increase_tram_interval(self):
         """
@@ -305,5 +525,34 @@ class Tram():
     def set_itinerary(self, itinerary):
         if self.get_line_number() % 2 == 0:
             self.itinerary = itinerary[::-1]
+            self._reversed = True
         else:
             self.itinerary = itinerary
+            self._reversed = False
+
+    def get_reversed(self):
+        """
+        Checks if the tram runs from the last to the first tram stop of line
+        """
+        return self._reversed
+
+    def get_state(self):
+        """
+        Returns the state of the tram not kept by the fleet: (tram interval,
+        whether it has been placed on its line, reversed, itinerary,
+        last tram stop (0 if it has not reached any))
+        """
+        return (self._tram_interval, self._move, self._reversed,
+                self.itinerary, self._last_tram_stop)
+
+    def set_state(
+            self, tram_interval, move, reversed, itinerary, last_tram_stop):
+        self._tram_interval = tram_interval
+        self._move = move
+        self._reversed = reversed
+        self.itinerary = itinerary
+        self._last_tram_stop = last_tram_stop
+
+    def reverse_itinerary(self):
+        self.itinerary = self.itinerary[::-1]
+        self._reversed = not self._reversed
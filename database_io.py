@@ -1,99 +1,196 @@
+import csv
 from database import TramLine, TramStop
 
+CHUNK_SIZE = 10000
 
-class MalformedDataError(Exception):
-    pass
+
+class ConfigurationDataError(Exception):
+    """
+    Base class of errors in data of configuration files. Contains attributes:
+    :param file_name: name of the file containing the error
+    :type file_name: str
+
+    :param line, column: position of the error in the file (counted from 1)
+    :type line, column: int
+    """
+    message = 'Incorrect data'
+
+    def __init__(self, file_name=None, line=None, column=None):
+        self.file_name = file_name
+        self.line = line
+        self.column = column
+        location = [
+            str(element) for element in (file_name, line, column)
+            if element is not None
+        ]
+        if location:
+            super().__init__(f'{":".join(location)}: {self.message}')
+        else:
+            super().__init__(self.message)
+
+
+class MalformedDataError(ConfigurationDataError):
+    message = 'Malformed data'
 
 
-class InvalidTramStopPositionError(Exception):
-    pass
+class InvalidTramStopPositionError(ConfigurationDataError):
+    message = 'Another tram stop has the same position'
 
 
-class ConnectionAlreadySetError(Exception):
-    pass
+class ConnectionAlreadySetError(ConfigurationDataError):
+    message = 'Connection between tram stops is already set'
 
 
-def check_position(list_tram_stops, new_x, new_y):
-    for tram_stop in list_tram_stops:
-        x = tram_stop.get_x()
-        y = tram_stop.get_y()
-        if new_x == x and new_y == y:
-            raise InvalidTramStopPositionError
+class TramStopsNotConnectedDataError(ConfigurationDataError):
+    message = 'Tram stop is not connected with the previous one'
 
 
-def read_tram_stop(file_handle):
+def get_file_name(file_handle):
+    return getattr(file_handle, 'name', None)
+
+
+def get_column(tokens, index):
     """
-    Gets basic data about tram stops from configuration file.
-    Adds tram stops to tram network database.
+    Returns the column in which token with given index starts
+    """
+    return sum(len(token) + 1 for token in tokens[:index]) + 1
+
+
+def read_chunks(file_handle, chunk_size=CHUNK_SIZE):
+    """
+    Reads the configuration file in chunks of at most chunk_size rows.
+    Yields lists of (line number, tokens) pairs.
     """
+    reader = csv.reader(file_handle)
+    chunk = []
+    for tokens in reader:
+        if tokens:
+            tokens[-1] = tokens[-1].rstrip()
+        chunk.append((reader.line_num, tokens))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def check_length(tokens, length, file_name, row_number):
+    if len(tokens) != length:
+        column = get_column(tokens, min(len(tokens), length))
+        raise MalformedDataError(file_name, row_number, column)
+
+
+def parse_int(tokens, index, file_name, row_number):
     try:
-        list_tram_stops = []
-        for line in file_handle:
-            line = line.rstrip()
-            tokens = line.split(',')
-            id, name, x, y = tokens
-            check_position(list_tram_stops, int(x), int(y))
-            tram_stop = TramStop(id, name, int(x), int(y))
-            list_tram_stops.append(tram_stop)
-        return list_tram_stops
+        return int(tokens[index])
     except ValueError:
-        raise MalformedDataError
+        column = get_column(tokens, index)
+        raise MalformedDataError(file_name, row_number, column)
 
 
-def check_connection(tram_stopA, tram_stopB):
-    for tram_stop_tuple in tram_stopB.get_connected_stops():
-        tram_stop, distance = tram_stop_tuple
-        if tram_stop == tram_stopA:
-            raise ConnectionAlreadySetError
+def check_position(positions, new_x, new_y, file_name=None, line=None):
+    if (new_x, new_y) in positions:
+        raise InvalidTramStopPositionError(file_name, line, 1)
 
 
-def read_tram_stop_connection(file_handle, network):
+def read_tram_stop(file_handle, network=None, chunk_size=CHUNK_SIZE):
+    """
+    Gets basic data about tram stops from configuration file.
+    Adds tram stops to tram network database, if it is given.
+    Returns the list of tram stops.
+    """
+    file_name = get_file_name(file_handle)
+    if network is None:
+        list_tram_stops = []
+    else:
+        list_tram_stops = network.get_list_tram_stops()
+    positions = set()
+    for chunk in read_chunks(file_handle, chunk_size):
+        for row_number, tokens in chunk:
+            check_length(tokens, 4, file_name, row_number)
+            id, name = tokens[0], tokens[1]
+            x = parse_int(tokens, 2, file_name, row_number)
+            y = parse_int(tokens, 3, file_name, row_number)
+            tram_stop = TramStop(id, name, x, y)
+            if network is None:
+                check_position(positions, x, y, file_name, row_number)
+                positions.add((x, y))
+                list_tram_stops.append(tram_stop)
+            else:
+                if network.has_position(x, y):
+                    raise InvalidTramStopPositionError(
+                        file_name, row_number, 1)
+                network.add_tram_stop(tram_stop)
+    return list_tram_stops
+
+
+def check_connection(
+        network, tram_stopA, tram_stopB, file_name=None, line=None):
+    if network.is_connected(tram_stopB, tram_stopA):
+        raise ConnectionAlreadySetError(file_name, line, 1)
+
+
+def read_tram_stop_connection(file_handle, network, chunk_size=CHUNK_SIZE):
     """
     Gets basic data about connection between tram stops.
     Adds connection between tram stops to tram network database.
     """
-    try:
-        for line in file_handle:
-            line = line.rstrip()
-            tokens = line.split(',')
-            tram_stopA_id, tram_stopB_id, time_between = tokens
-            for tram_stop in network.get_list_tram_stops():
-                if tram_stopA_id == tram_stop.get_id():
-                    tram_stopA = tram_stop
-                if tram_stopB_id == tram_stop.get_id():
-                    tram_stopB = tram_stop
-            check_connection(tram_stopA, tram_stopB)
-            tram_stopA.add_connected_stop(tram_stopB, int(time_between))
-    except ValueError:
-        raise MalformedDataError
-
-
-def read_tram_line(file_handle, network):
+    file_name = get_file_name(file_handle)
+    for chunk in read_chunks(file_handle, chunk_size):
+        for row_number, tokens in chunk:
+            check_length(tokens, 3, file_name, row_number)
+            tram_stops = []
+            for index in range(2):
+                tram_stop = network.get_tram_stop(tokens[index])
+                if tram_stop is None:
+                    column = get_column(tokens, index)
+                    raise MalformedDataError(file_name, row_number, column)
+                tram_stops.append(tram_stop)
+            tram_stopA, tram_stopB = tram_stops
+            time_between = parse_int(tokens, 2, file_name, row_number)
+            check_connection(
+                network, tram_stopA, tram_stopB, file_name, row_number)
+            network.add_connection(tram_stopA, tram_stopB, time_between)
+
+
+def read_tram_line(file_handle, network, chunk_size=CHUNK_SIZE):
     """
     Gets basic data about tram lines from configuration file.
     Adds tram lines to tram network database.
+    Tram stops of itineraries have to be known and connected one by one.
     """
-    try:
-        tram_line_list = []
-        for line in file_handle:
-            line = line.rstrip()
-            tokens = line.split(',')
-            tram_stops_id_list = []
+    file_name = get_file_name(file_handle)
+    tram_line_list = []
+    for chunk in read_chunks(file_handle, chunk_size):
+        for row_number, tokens in chunk:
+            if len(tokens) < 4:
+                column = get_column(tokens, len(tokens))
+                raise MalformedDataError(file_name, row_number, column)
             tram_stop_list = []
             line_number = tokens[0]
-            hours_start = int(tokens[1])
-            minutes_start = int(tokens[2])
-            interval = int(tokens[3])
-            for element in tokens[4:]:
-                tram_stops_id_list.append(element)
-            for tram_stop_id in tram_stops_id_list:
-                for tram_stop in network.get_list_tram_stops():
-                    if tram_stop_id == tram_stop.get_id():
-                        tram_stop_list.append(tram_stop)
+            hours_start = parse_int(tokens, 1, file_name, row_number)
+            minutes_start = parse_int(tokens, 2, file_name, row_number)
+            interval = parse_int(tokens, 3, file_name, row_number)
+            for index in range(4, len(tokens)):
+                tram_stop = network.get_tram_stop(tokens[index])
+                if tram_stop is None:
+                    column = get_column(tokens, index)
+                    raise MalformedDataError(file_name, row_number, column)
+                if tram_stop_list and not network.is_connected(
+                        tram_stop_list[-1], tram_stop):
+                    raise TramStopsNotConnectedDataError(
+                        file_name, row_number, get_column(tokens, index))
+                tram_stop_list.append(tram_stop)
             tram_line = TramLine(
                                 line_number, tram_stop_list,
                                 hours_start, minutes_start, interval)
             tram_line_list.append(tram_line)
-        return tram_line_list
-    except IndexError:
-        raise MalformedDataError
+    return tram_line_list
+
+
+def parse_float(tokens, index, file_name, row_number):
+    try:
+        return float(tokens[index])
+    except ValueError:
+        column = get_column(tokens, index)
+        raise MalformedDataError(file_name, row_number, column)
@@ -0,0 +1,226 @@
+from math import exp, log
+from database import get_segment
+from database_io import (
+    MalformedDataError,
+    get_column,
+    get_file_name,
+    parse_float,
+    read_chunks,
+    CHUNK_SIZE
+)
+
+"""
+Stochastic delays of trams. Travel times of connections are fixed, delays
+add random minutes to them: on each segment between tram stops and while
+the tram dwells at tram stops. Each distribution has its parameters:
+    fixed       minutes
+    uniform     lowest, highest minutes
+    exponential mean minutes
+    lognormal   mu, sigma of the logarithm of minutes
+    gamma       shape, scale
+    normal      mean, standard deviation (negative delays are cut to 0)
+Each replication draws delays from its own generator, so replications
+are independent samples, sample_all draws the delay of all replications
+at once. Delays are read from the sidecar file by read_delays.
+"""
+
+DISTRIBUTIONS = {
+    'fixed': 1,
+    'uniform': 2,
+    'exponential': 1,
+    'lognormal': 2,
+    'gamma': 2,
+    'normal': 2,
+}
+ALL = '*'
+
+
+class InvalidDistributionError(Exception):
+    def __init__(self):
+        super().__init__('Unknown distribution or incorrect parameters')
+
+
+class Distribution():
+    """
+    Class Distribution. Distribution of delays in minutes.
+    Contains attributes:
+    :param name: name of the distribution (one of DISTRIBUTIONS)
+    :type name: str
+
+    :param parameters: parameters of the distribution
+    :type parameters: tuple of float
+    """
+    def __init__(self, name, *parameters):
+        if DISTRIBUTIONS.get(name) != len(parameters):
+            raise InvalidDistributionError
+        if name != 'lognormal' and any(
+                parameter < 0 for parameter in parameters):
+            raise InvalidDistributionError
+        if name in ('exponential', 'gamma') and not all(parameters):
+            raise InvalidDistributionError
+        self._name = name
+        self._parameters = tuple(float(value) for value in parameters)
+
+    def __eq__(self, other):
+        return (isinstance(other, Distribution) and
+                (self._name, self._parameters) ==
+                (other._name, other._parameters))
+
+    def __hash__(self):
+        return hash((self._name, self._parameters))
+
+    def get_name(self):
+        return self._name
+
+    def get_parameters(self):
+        return self._parameters
+
+    def sample(self, generator):
+        """
+        Returns the delay drawn from the distribution by the generator
+        """
+        first = self._parameters[0]
+        if self._name == 'fixed':
+            return first
+        second = self._parameters[1] if len(self._parameters) > 1 else None
+        if self._name == 'uniform':
+            return generator.uniform(first, second)
+        if self._name == 'exponential':
+            return generator.expovariate(1 / first)
+        if self._name == 'lognormal':
+            return generator.lognormvariate(first, second)
+        if self._name == 'gamma':
+            return generator.gammavariate(first, second)
+        return max(0.0, generator.gauss(first, second))
+
+    def sample_all(self, generators):
+        """
+        Returns delays drawn from the distribution, one by each generator.
+        Normal samples are drawn by gauss, which is faster than
+        normalvariate used by sample.
+        """
+        first = self._parameters[0]
+        if self._name == 'fixed':
+            return [first]*len(generators)
+        second = self._parameters[1] if len(self._parameters) > 1 else None
+        if self._name == 'uniform':
+            return [generator.uniform(first, second)
+                    for generator in generators]
+        if self._name == 'exponential':
+            return [-log(1.0 - generator.random())*first
+                    for generator in generators]
+        if self._name == 'lognormal':
+            return [exp(generator.gauss(first, second))
+                    for generator in generators]
+        if self._name == 'gamma':
+            return [generator.gammavariate(first, second)
+                    for generator in generators]
+        return [max(0.0, generator.gauss(first, second))
+                for generator in generators]
+
+
+class DelayModel():
+    """
+    Class DelayModel. Distributions of delays in the network.
+    Contains attributes:
+    :param segments: distributions of delays on segments by segments
+                     (pairs of IDs of tram stops, see database.py)
+    :type segments: dict
+
+    :param dwells: distributions of dwell times by IDs of tram stops
+    :type dwells: dict
+
+    :param default_segment, default_dwell: distributions of segments
+                                           and tram stops not given
+                                           above (None for no delays)
+    :type default_segment, default_dwell: Distribution
+    """
+    def __init__(self, default_segment=None, default_dwell=None):
+        self._segments = {}
+        self._dwells = {}
+        self._default_segment = default_segment
+        self._default_dwell = default_dwell
+
+    def set_segment_delay(self, tram_stopA, tram_stopB, distribution):
+        """
+        Sets delays of the segment in both directions, tram stops
+        ALL set the default
+        """
+        if tram_stopA == ALL or tram_stopB == ALL:
+            self._default_segment = distribution
+        else:
+            segment = get_segment(tram_stopA, tram_stopB)[0]
+            self._segments[segment] = distribution
+
+    def set_dwell(self, tram_stop, distribution):
+        """
+        Sets dwell times at the tram stop, tram stop ALL sets the default
+        """
+        if tram_stop == ALL:
+            self._default_dwell = distribution
+        else:
+            self._dwells[tram_stop.get_id()] = distribution
+
+    def get_segment_delay(self, tram_stopA, tram_stopB):
+        segment = get_segment(tram_stopA, tram_stopB)[0]
+        return self._segments.get(segment, self._default_segment)
+
+    def get_dwell(self, tram_stop):
+        return self._dwells.get(tram_stop.get_id(), self._default_dwell)
+
+
+def get_delay_tram_stop(tokens, index, network, file_name, row_number):
+    """
+    Returns the tram stop with ID in the column or ALL
+    """
+    if tokens[index] == ALL:
+        return ALL
+    tram_stop = network.get_tram_stop(tokens[index])
+    if tram_stop is None:
+        raise MalformedDataError(
+            file_name, row_number, get_column(tokens, index))
+    return tram_stop
+
+
+def read_delays(file_handle, network, chunk_size=CHUNK_SIZE):
+    """
+    Gets distributions of delays from the sidecar file of connections.
+    Rows are (tram stop ID * stands for all tram stops):
+        segment,<tram stop ID>,<tram stop ID>,<distribution>,<parameters>
+        dwell,<tram stop ID>,<distribution>,<parameters>
+    Returns the delay model.
+    """
+    file_name = get_file_name(file_handle)
+    model = DelayModel()
+    for chunk in read_chunks(file_handle, chunk_size):
+        for row_number, tokens in chunk:
+            if not tokens:
+                continue
+            if tokens[0] == 'segment':
+                first = 3
+            elif tokens[0] == 'dwell':
+                first = 2
+            else:
+                raise MalformedDataError(file_name, row_number, 1)
+            if len(tokens) <= first:
+                column = get_column(tokens, len(tokens))
+                raise MalformedDataError(file_name, row_number, column)
+            tram_stops = [
+                get_delay_tram_stop(
+                    tokens, index, network, file_name, row_number)
+                for index in range(1, first)
+            ]
+            parameters = [
+                parse_float(tokens, index, file_name, row_number)
+                for index in range(first + 1, len(tokens))
+            ]
+            try:
+                distribution = Distribution(tokens[first], *parameters)
+            except InvalidDistributionError:
+                column = get_column(tokens, first)
+                raise MalformedDataError(file_name, row_number, column)
+            if tokens[0] == 'segment':
+                model.set_segment_delay(*tram_stops, distribution)
+            else:
+                model.set_dwell(*tram_stops, distribution)
+    return model
@@ -0,0 +1,332 @@
+import ast
+import os
+import struct
+import sys
+import zipfile
+from array import array
+from occupancy import get_median
+from simulator import ARRIVAL, DEPARTURE, REVERSAL
+
+"""
+Columnar log of events of the simulation. Events are written into
+preallocated columns of CAPACITY events, a full batch is flushed as a chunk
+into memory or into a file of the directory (events_000000.npz, ...).
+Chunks are zip archives of one-dimensional NumPy arrays (.npy), written
+without NumPy, so they can be read by numpy.load as well:
+
+    minute      minute of the event since midnight of the first day
+    event       ARRIVAL, DEPARTURE or REVERSAL (see simulator.py)
+    tram        index of the tram in the fleet of the simulator
+    line        index of the line in the network
+    stop        index of the tram stop in the network
+
+The log is given to the simulator instead of a list:
+
+    event_log = EventLog(network, directory='events')
+    Simulator(network, log=event_log).run_until(24*60)
+    event_log.flush()
+"""
+
+CAPACITY = 65536
+COLUMNS = (
+    ('minute', 'i'), ('event', 'b'), ('tram', 'i'), ('line', 'i'),
+    ('stop', 'i'))
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+NPY_ALIGNMENT = 64
+DESCRIPTIONS = {'b': '|i1', 'i': '<i4'}
+
+
+class InvalidEventLogError(Exception):
+    def __init__(self):
+        super().__init__('File is not a chunk of the event log')
+
+
+def write_npy(column):
+    """
+    Returns the column as a .npy file
+    """
+    header = (
+        f"{{'descr': '{DESCRIPTIONS[column.typecode]}', "
+        f"'fortran_order': False, 'shape': ({len(column)},), }}")
+    padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % NPY_ALIGNMENT
+    header = (header + ' '*padding + '\n').encode('latin1')
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return b''.join((
+        NPY_MAGIC, struct.pack('<H', len(header)), header,
+        column.tobytes()))
+
+
+def read_npy(data, typecode):
+    """
+    Returns the column with given typecode from the .npy file
+    """
+    start = len(NPY_MAGIC) + 2
+    if data[:len(NPY_MAGIC)] != NPY_MAGIC:
+        raise InvalidEventLogError
+    end = start + struct.unpack_from('<H', data, len(NPY_MAGIC))[0]
+    try:
+        header = ast.literal_eval(data[start:end].decode('latin1'))
+        descr = header['descr']
+        size = header['shape'][0]
+    except (ValueError, SyntaxError, TypeError, KeyError, IndexError):
+        raise InvalidEventLogError
+    column = array(typecode)
+    if (descr != DESCRIPTIONS[typecode] or
+            len(data) - end != size*column.itemsize):
+        raise InvalidEventLogError
+    column.frombytes(data[end:])
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def write_chunk(path, columns):
+    """
+    Writes columns into the .npz file, a crash while writing leaves
+    the previous file with the same path intact
+    """
+    temporary_path = path + '.tmp'
+    with zipfile.ZipFile(temporary_path, 'w') as archive:
+        for name, column in columns.items():
+            archive.writestr(f'{name}.npy', write_npy(column))
+    os.replace(temporary_path, path)
+
+
+def read_chunk(path):
+    """
+    Returns columns of events from the .npz file
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return {
+                name: read_npy(archive.read(f'{name}.npy'), typecode)
+                for name, typecode in COLUMNS
+            }
+    except (zipfile.BadZipFile, KeyError):
+        raise InvalidEventLogError
+
+
+def get_chunk_path(directory, chunk):
+    return os.path.join(directory, f'events_{chunk:06}.npz')
+
+
+def concatenate(chunks):
+    """
+    Returns columns of all events of chunks
+    """
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+    for chunk in chunks:
+        for name, column in columns.items():
+            column.extend(chunk[name])
+    return columns
+
+
+def get_chunk_paths(directory):
+    """
+    Returns paths to chunks of the event log in the directory in order
+    """
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith('events_') and name.endswith('.npz'))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_event_log(directory):
+    """
+    Returns columns of all events written into the directory
+    """
+    return concatenate(
+        read_chunk(path) for path in get_chunk_paths(directory))
+
+
+class EventLog():
+    """
+    Class EventLog. Columnar log of events of the simulation of the network.
+    Contains attributes:
+    :param columns: preallocated columns of the current batch of events
+    :type columns: dict of array
+
+    :param size: number of events in the current batch
+    :type size: int
+
+    :param chunks: flushed batches, or paths to their files if they are
+                   written into the directory
+    :type chunks: list
+
+    :param directory: if given, batches are written into files there
+    :type directory: str
+
+    :param stops, lines: indexes of tram stops and lines in the network
+    :type stops, lines: dict
+
+    :param tram_lines: indexes of lines of trams in the fleet, which keeps
+                       trams of lines in order (see Simulator)
+    :type tram_lines: array of int
+    """
+    def __init__(self, network, directory=None, capacity=CAPACITY):
+        self._capacity = capacity
+        self._columns = {
+            name: array(typecode, [0])*capacity
+            for name, typecode in COLUMNS
+        }
+        self._size = 0
+        self._chunks = []
+        self._flushed = 0
+        self._directory = directory
+        self._stops = {
+            tram_stop: index
+            for index, tram_stop in enumerate(network.get_list_tram_stops())
+        }
+        self._lines = {
+            tram_line: index
+            for index, tram_line in enumerate(network.get_list_lines())
+        }
+        self._tram_lines = array('i', [
+            self._lines[tram_line]
+            for tram_line in network.get_list_lines()
+            for tram_tuple in tram_line.get_list_tram()
+        ])
+
+    def __len__(self):
+        return self._flushed + self._size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+    def append(self, entry):
+        """
+        Records the (minute, event, tram, tram stop) entry of the simulator
+        """
+        if self._size == self._capacity:
+            self.flush()
+        minute, event, tram, tram_stop = entry
+        size = self._size
+        columns = self._columns
+        columns['minute'][size] = minute
+        columns['event'][size] = event
+        columns['tram'][size] = tram.get_index()
+        columns['line'][size] = self._lines[tram.get_line()]
+        columns['stop'][size] = self._stops[tram_stop]
+        self._size = size + 1
+
+    def record(self, minute, event, indexes, tram_stops):
+        """
+        Records the event of trams with given indexes in the fleet at tram
+        stops in given minute, all trams at once
+        """
+        first = 0
+        while first < len(indexes):
+            if self._size == self._capacity:
+                self.flush()
+            size = self._size
+            count = min(len(indexes) - first, self._capacity - size)
+            end = size + count
+            part = array('i', indexes[first:first + count])
+            columns = self._columns
+            columns['minute'][size:end] = array('i', [minute])*count
+            columns['event'][size:end] = array('b', [event])*count
+            columns['tram'][size:end] = part
+            columns['line'][size:end] = array(
+                'i', map(self._tram_lines.__getitem__, part))
+            columns['stop'][size:end] = array('i', map(
+                self._stops.__getitem__, tram_stops[first:first + count]))
+            self._size = end
+            first += count
+
+    def flush(self):
+        """
+        Moves the current batch of events into memory or into the file
+        """
+        if not self._size:
+            return
+        chunk = {
+            name: column[:self._size]
+            for name, column in self._columns.items()
+        }
+        if self._directory is None:
+            self._chunks.append(chunk)
+        else:
+            path = get_chunk_path(self._directory, len(self._chunks))
+            write_chunk(path, chunk)
+            self._chunks.append(path)
+        self._flushed += self._size
+        self._size = 0
+
+    def get_columns(self):
+        """
+        Returns columns of all recorded events
+        """
+        current = {
+            name: column[:self._size]
+            for name, column in self._columns.items()
+        }
+        if self._directory is None:
+            return concatenate((*self._chunks, current))
+        return concatenate((
+            *(read_chunk(path) for path in self._chunks), current))
+
+
+def get_stats(values):
+    """
+    Returns (count, mean, median, maximum) of values
+    """
+    return (len(values), sum(values) / len(values), get_median(values),
+            max(values))
+
+
+def get_dwell_stats(columns, network):
+    """
+    Returns statistics of minutes trams stand at tram stops between
+    the arrival and the next departure by IDs of tram stops.
+    Trams do not stand at tram stops they pass (0 minutes).
+    """
+    list_tram_stops = network.get_list_tram_stops()
+    arrivals = {}
+    dwells = {}
+    for minute, event, tram, stop in zip(
+            columns['minute'], columns['event'], columns['tram'],
+            columns['stop']):
+        if event == ARRIVAL:
+            passed = arrivals.get(tram)
+            if passed is not None:
+                dwells.setdefault(passed[1], []).append(0)
+            arrivals[tram] = (minute, stop)
+        elif event == DEPARTURE:
+            arrival = arrivals.pop(tram, None)
+            if arrival is not None and arrival[1] == stop:
+                dwells.setdefault(stop, []).append(minute - arrival[0])
+    return {
+        list_tram_stops[stop].get_id(): get_stats(values)
+        for stop, values in dwells.items()
+    }
+
+
+def get_round_trip_stats(columns, network):
+    """
+    Returns statistics of minutes of round trips by numbers of lines.
+    The round trip starts with the departure of the tram and ends when
+    the tram, reversed at the other end of the line, returns.
+    """
+    list_lines = network.get_list_lines()
+    trips = {}
+    round_trips = {}
+    for minute, event, tram, line in zip(
+            columns['minute'], columns['event'], columns['tram'],
+            columns['line']):
+        if event == DEPARTURE:
+            trips.setdefault(tram, [minute, 0])
+        elif event == REVERSAL and tram in trips:
+            trip = trips[tram]
+            trip[1] += 1
+            if trip[1] == 2:
+                round_trips.setdefault(line, []).append(minute - trip[0])
+                del trips[tram]
+    return {
+        list_lines[line].get_number(): get_stats(values)
+        for line, values in round_trips.items()
+    }
@@ -0,0 +1,212 @@
+from array import array
+
+
+class Fleet():
+    """
+    Class Fleet. Keeps the state of all trams in contiguous arrays,
+    the tram with index i is described by the i-th element of each array.
+    Trams added to the fleet only read and write their state from it.
+    Contains attributes:
+    :param trams: all trams belonging to the fleet
+    :type trams: list
+
+    :param x, y: the coordinates of the actual location of trams
+    :type x, y: array of float
+
+    :param move_x, move_y: distance travelled in one minute on the segment
+    :type move_x, move_y: array of float
+
+    :param segment: number of the last tram stop in the itinerary of trams
+    :type segment: array of int
+
+    :param remaining: minutes left to reach the next tram stop
+                      (0 when the tram stands at a tram stop)
+    :type remaining: array of int
+
+    :param activated: whether trams are moving
+    :type activated: array of bool
+
+    :param active: indexes of activated trams, only they are moved
+    :type active: set of int
+
+    :param tables: segment tables of the itinerary trams currently follow
+    :type tables: list of SegmentTable
+    """
+    def __init__(self):
+        self._trams = []
+        self._x = array('d')
+        self._y = array('d')
+        self._move_x = array('d')
+        self._move_y = array('d')
+        self._segment = array('l')
+        self._remaining = array('l')
+        self._activated = array('b')
+        self._active = set()
+        self._tables = []
+
+    def __len__(self):
+        return len(self._trams)
+
+    def get_trams(self):
+        return self._trams
+
+    def get_columns(self):
+        """
+        Returns arrays keeping the state of trams by their names
+        """
+        return {
+            'x': self._x,
+            'y': self._y,
+            'move_x': self._move_x,
+            'move_y': self._move_y,
+            'segment': self._segment,
+            'remaining': self._remaining,
+            'activated': self._activated,
+        }
+
+    def set_columns(self, columns):
+        """
+        Replaces the state of trams with arrays of the same names
+        and sizes as those of get_columns
+        """
+        for name, column in self.get_columns().items():
+            column[:] = array(column.typecode, columns[name])
+        self._active = {
+            index for index, value in enumerate(self._activated) if value}
+
+    def get_table(self, index):
+        return self._tables[index]
+
+    def set_table(self, index, table):
+        self._tables[index] = table
+
+    def add_tram(self, tram):
+        """
+        Adds tram to the fleet, the fleet takes over the state of the tram
+        """
+        index = len(self._trams)
+        self._x.append(tram.get_x())
+        self._y.append(tram.get_y())
+        self._move_x.append(0.0)
+        self._move_y.append(0.0)
+        self._segment.append(tram.get_last_tram_stop_number())
+        self._remaining.append(0)
+        self._activated.append(tram.get_activated())
+        if tram.get_activated():
+            self._active.add(index)
+        self._tables.append(None)
+        self._trams.append(tram)
+        tram.attach(self, index)
+        return index
+
+    def get_x(self, index):
+        return self._x[index]
+
+    def set_x(self, index, x):
+        self._x[index] = x
+
+    def get_y(self, index):
+        return self._y[index]
+
+    def set_y(self, index, y):
+        self._y[index] = y
+
+    def get_move_x(self, index):
+        return self._move_x[index]
+
+    def get_move_y(self, index):
+        return self._move_y[index]
+
+    def get_segment(self, index):
+        return self._segment[index]
+
+    def set_segment(self, index, segment):
+        self._segment[index] = segment
+
+    def get_remaining(self, index):
+        return self._remaining[index]
+
+    def get_activated(self, index):
+        return bool(self._activated[index])
+
+    def set_activated(self, index, value):
+        self._activated[index] = value
+        if value:
+            self._active.add(index)
+        else:
+            self._active.discard(index)
+
+    def start_segment(self, index):
+        """
+        Sets the movement of tram towards the next tram stop
+        """
+        tram = self._trams[index]
+        table = tram.get_line().get_segment_table(tram.get_reversed())
+        self._tables[index] = table
+        segment = self._segment[index]
+        self._move_x[index] = table.move_x[segment]
+        self._move_y[index] = table.move_y[segment]
+        self._remaining[index] = table.minutes[segment]
+
+    def finish_segment(self, index):
+        """
+        Places tram exactly at the tram stop it has reached
+        """
+        table = self._tables[index]
+        segment = self._segment[index]
+        self._x[index] = table.end_x[segment]
+        self._y[index] = table.end_y[segment]
+        self._segment[index] += 1
+        tram = self._trams[index]
+        tram._last_tram_stop = tram.itinerary[segment+1]
+
+    def move(self, reversals=None):
+        """
+        Moves all activated trams by the distance travelled in one minute.
+        Only indexes of activated trams are visited, in the order of
+        the fleet. Trams are still moved one by one in Python, the arrays
+        keep their state compact but the update is not vectorized.
+        Tram restart - when the tram reaches last tram stop,
+        it stops moving and its route is reversed (if reversals are given,
+        indexes of these trams are appended to them).
+        Returns indexes of trams which have reached a tram stop
+        """
+        arrived = []
+        trams = self._trams
+        x = self._x
+        y = self._y
+        move_x = self._move_x
+        move_y = self._move_y
+        segment = self._segment
+        remaining = self._remaining
+        activated = self._activated
+        active = self._active
+        tables = self._tables
+        for index in sorted(active):
+            minutes = remaining[index]
+            if minutes == 0:
+                tram = trams[index]
+                if tram._last_tram_stop == tram.itinerary[-1]:
+                    activated[index] = False
+                    active.discard(index)
+                    tram.reverse_itinerary()
+                    segment[index] = 0
+                    if reversals is not None:
+                        reversals.append(index)
+                    continue
+                self.start_segment(index)
+                minutes = remaining[index]
+            x[index] += move_x[index]
+            y[index] += move_y[index]
+            minutes -= 1
+            remaining[index] = minutes
+            if minutes == 0:
+                table = tables[index]
+                number = segment[index]
+                x[index] = table.end_x[number]
+                y[index] = table.end_y[number]
+                segment[index] = number + 1
+                tram = trams[index]
+                tram._last_tram_stop = tram.itinerary[number + 1]
+                arrived.append(index)
+        return arrived
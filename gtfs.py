@@ -0,0 +1,370 @@
+import csv
+import math
+import os
+from array import array
+from database import TramNetwork, TramLine, TramStop, Tram
+from database_io import (
+    InvalidTramStopPositionError,
+    MalformedDataError,
+    check_length,
+    get_column,
+    get_file_name,
+    parse_float,
+    parse_int,
+    read_chunks,
+    CHUNK_SIZE
+)
+from schedule import get_departures, is_trip_reversed
+from timetable import get_trips, get_stop_times, format_gtfs_time
+
+"""
+Import and export of the tram network as a GTFS feed (stops.txt,
+trips.txt and stop_times.txt). Positions of tram stops are converted
+from latitude and longitude around GTFS_ORIGIN, METERS_PER_UNIT meters
+per unit of the map. Exported trips follow the schedule of trams
+(see schedule.py and timetable.py).
+"""
+
+GTFS_ORIGIN = (50.0614, 19.9372)
+METERS_PER_UNIT = 10
+EARTH_RADIUS = 6371000
+GTFS_SERVICE_ID = 'daily'
+GTFS_ROUTE_TYPE_TRAM = 0
+
+
+def read_gtfs_rows(file_handle, columns, optional=(), chunk_size=CHUNK_SIZE):
+    """
+    Reads the GTFS file in chunks, columns are found by the header.
+    Yields (line number, tokens, indexes of columns) for each row,
+    indexes of missing optional columns are None.
+    """
+    file_name = get_file_name(file_handle)
+    indexes = None
+    for chunk in read_chunks(file_handle, chunk_size):
+        for row_number, tokens in chunk:
+            if indexes is None:
+                header = [token.strip().lstrip('\ufeff') for token in tokens]
+                for column in columns:
+                    if column not in header:
+                        raise MalformedDataError(file_name, row_number)
+                indexes = [header.index(column) for column in columns]
+                indexes.extend(
+                    header.index(column) if column in header else None
+                    for column in optional)
+                length = len(header)
+                continue
+            if not tokens:
+                continue
+            check_length(tokens, length, file_name, row_number)
+            yield (row_number, tokens, indexes)
+
+
+def parse_gtfs_time(tokens, index, file_name, row_number):
+    """
+    Returns the time HH:MM:SS in minutes (seconds are dropped)
+    or None if it is empty
+    """
+    text = tokens[index].strip()
+    if not text:
+        return None
+    try:
+        hours, minutes, seconds = text.split(':')
+        return int(hours)*60 + int(minutes)
+    except ValueError:
+        column = get_column(tokens, index)
+        raise MalformedDataError(file_name, row_number, column)
+
+
+def to_position(latitude, longitude, origin, meters_per_unit):
+    """
+    Projects geographic coordinates onto coordinates of the map
+    """
+    x = math.radians(longitude - origin[1])*math.cos(math.radians(origin[0]))
+    y = -math.radians(latitude - origin[0])
+    scale = EARTH_RADIUS / meters_per_unit
+    return (round(x*scale), round(y*scale))
+
+
+def to_coordinates(x, y, origin, meters_per_unit):
+    """
+    Returns geographic coordinates of the point of the map
+    """
+    scale = meters_per_unit / EARTH_RADIUS
+    latitude = origin[0] - math.degrees(y*scale)
+    longitude = origin[1] + math.degrees(
+        x*scale / math.cos(math.radians(origin[0])))
+    return (latitude, longitude)
+
+
+def read_gtfs_stops(
+        file_handle, network, origin=GTFS_ORIGIN,
+        meters_per_unit=METERS_PER_UNIT, chunk_size=CHUNK_SIZE):
+    """
+    Gets tram stops from GTFS stops.txt and adds them to tram network
+    database. Stations and entrances (location_type other than 0) are
+    skipped.
+    """
+    file_name = get_file_name(file_handle)
+    columns = ('stop_id', 'stop_name', 'stop_lat', 'stop_lon')
+    for row_number, tokens, indexes in read_gtfs_rows(
+            file_handle, columns, ('location_type',), chunk_size):
+        id, name, latitude, longitude, location_type = indexes
+        if location_type is not None and tokens[location_type] not in (
+                '', '0'):
+            continue
+        x, y = to_position(
+            parse_float(tokens, latitude, file_name, row_number),
+            parse_float(tokens, longitude, file_name, row_number),
+            origin, meters_per_unit)
+        if network.has_position(x, y):
+            raise InvalidTramStopPositionError(file_name, row_number, 1)
+        network.add_tram_stop(TramStop(tokens[id], tokens[name], x, y))
+
+
+def read_gtfs_trips(file_handle, chunk_size=CHUNK_SIZE):
+    """
+    Gets routes of trips from GTFS trips.txt.
+    Returns the dictionary of route IDs by trip IDs.
+    """
+    trips = {}
+    for row_number, tokens, indexes in read_gtfs_rows(
+            file_handle, ('route_id', 'trip_id'), (), chunk_size):
+        trips[tokens[indexes[1]]] = tokens[indexes[0]]
+    return trips
+
+
+def fill_gtfs_times(stop_times, file_name, row_number):
+    """
+    Interpolates missing times of the trip between known times,
+    the first and the last time have to be given
+    """
+    known = [
+        index for index, stop_time in enumerate(stop_times)
+        if stop_time[2] is not None
+    ]
+    if not known or known[0] != 0 or known[-1] != len(stop_times) - 1:
+        raise MalformedDataError(file_name, row_number)
+    for previous, next in zip(known, known[1:]):
+        start, end = stop_times[previous][2], stop_times[next][2]
+        for index in range(previous + 1, next):
+            elapsed = (end - start)*(index - previous)//(next - previous)
+            stop_times[index][2] = start + elapsed
+
+
+def get_trams_needed(tram_line):
+    """
+    Returns the least number of trams departing every interval
+    alternately from both ends of the line without skipping departures
+    """
+    trip_minutes = tram_line.get_segment_table().get_total_minutes()
+    return max(1, -(-(trip_minutes + 1) // tram_line.get_interval()))
+
+
+def create_gtfs_line(route_id, patterns):
+    """
+    Returns tram line of the route with trams. The itinerary is the most
+    frequent sequence of tram stops in both directions, the interval is
+    the median time between departures of its trips. The number of trams
+    is chosen so that their trips match trips of the route best.
+    """
+    def get_trips_count(pattern):
+        return len(patterns[pattern]) + len(patterns.get(pattern[::-1], ()))
+
+    pattern = max(patterns, key=get_trips_count)
+    reversed_starts = patterns.get(pattern[::-1], ())
+    starts = sorted([*patterns[pattern], *reversed_starts])
+    observed = {(start, False) for start in patterns[pattern]}
+    observed.update((start, True) for start in reversed_starts)
+    if (starts[0], False) not in observed:
+        pattern = pattern[::-1]
+        observed = {(start, not reversed) for start, reversed in observed}
+    intervals = sorted(
+        next - previous
+        for previous, next in zip(starts, starts[1:]) if next > previous)
+    interval = intervals[len(intervals)//2] if intervals else 24*60
+    hours_start, minutes_start = divmod(starts[0] % (24*60), 60)
+    tram_line = TramLine(
+        route_id, list(pattern), hours_start, minutes_start, interval)
+    least_trams = get_trams_needed(tram_line)
+    best_trams = least_trams
+    best_score = -1
+    for trams in range(1, 2*least_trams + 2):
+        Tram(tram_line, trams)
+        if trams < least_trams:
+            continue
+        simulated = {
+            (departure, is_trip_reversed(tram_tuple[0], trip))
+            for tram_tuple in tram_line.get_list_tram()
+            for trip, departure in enumerate(get_departures(tram_tuple[0]))
+        }
+        score = len(simulated & observed) / len(simulated | observed)
+        if score > best_score:
+            best_trams = trams
+            best_score = score
+        if score == 1:
+            break
+    tram_line = TramLine(
+        route_id, list(pattern), hours_start, minutes_start, interval)
+    for tram_number_line in range(1, best_trams + 1):
+        Tram(tram_line, tram_number_line)
+    return tram_line
+
+
+def read_gtfs_stop_times(file_handle, network, trips, chunk_size=CHUNK_SIZE):
+    """
+    Gets trips from GTFS stop_times.txt, rows of each trip have to be
+    next to each other. Connects subsequent tram stops of trips (the time
+    of the first trip is used). Trips of unknown routes are skipped.
+    Returns tram lines with trams, one for each route.
+    """
+    file_name = get_file_name(file_handle)
+    columns = (
+        'trip_id', 'arrival_time', 'departure_time', 'stop_id',
+        'stop_sequence')
+    routes = {}
+    finished = set()
+    trip_id = None
+    stop_times = []
+
+    def finish_trip(row_number):
+        if trip_id not in trips or len(stop_times) < 2:
+            return
+        stop_times.sort(key=lambda stop_time: stop_time[0])
+        fill_gtfs_times(stop_times, file_name, row_number)
+        pattern = []
+        last_departure = None
+        for sequence, tram_stop, arrival, departure in stop_times:
+            if departure is None:
+                departure = arrival
+            if pattern and pattern[-1] is tram_stop:
+                last_departure = departure
+                continue
+            if pattern and not network.is_connected(pattern[-1], tram_stop):
+                distance = max(1, arrival - last_departure)
+                network.add_connection(pattern[-1], tram_stop, distance)
+            pattern.append(tram_stop)
+            if len(pattern) == 1:
+                first_departure = departure
+            last_departure = departure
+        if len(pattern) < 2:
+            return
+        patterns = routes.setdefault(trips[trip_id], {})
+        patterns.setdefault(tuple(pattern), array('i')).append(
+            first_departure)
+
+    for row_number, tokens, indexes in read_gtfs_rows(
+            file_handle, columns, (), chunk_size):
+        trip, arrival, departure, stop_id, sequence = indexes
+        if tokens[trip] != trip_id:
+            if trip_id is not None:
+                finish_trip(row_number - 1)
+                finished.add(trip_id)
+            trip_id = tokens[trip]
+            if trip_id in finished:
+                column = get_column(tokens, trip)
+                raise MalformedDataError(file_name, row_number, column)
+            stop_times = []
+        tram_stop = network.get_tram_stop(tokens[stop_id])
+        if tram_stop is None:
+            column = get_column(tokens, stop_id)
+            raise MalformedDataError(file_name, row_number, column)
+        arrival_time = parse_gtfs_time(tokens, arrival, file_name, row_number)
+        departure_time = parse_gtfs_time(
+            tokens, departure, file_name, row_number)
+        stop_times.append([
+            parse_int(tokens, sequence, file_name, row_number), tram_stop,
+            arrival_time if arrival_time is not None else departure_time,
+            departure_time])
+    finish_trip(None)
+    return [
+        create_gtfs_line(route_id, patterns)
+        for route_id, patterns in routes.items()
+    ]
+
+
+def read_gtfs(
+        directory, network=None, origin=GTFS_ORIGIN,
+        meters_per_unit=METERS_PER_UNIT, chunk_size=CHUNK_SIZE):
+    """
+    Builds tram network database from GTFS feed in given directory
+    (stops.txt, trips.txt and stop_times.txt).
+    """
+    if network is None:
+        network = TramNetwork()
+    with open(os.path.join(directory, 'stops.txt'),
+              encoding='utf-8-sig') as file_handle:
+        read_gtfs_stops(
+            file_handle, network, origin, meters_per_unit, chunk_size)
+    with open(os.path.join(directory, 'trips.txt'),
+              encoding='utf-8-sig') as file_handle:
+        trips = read_gtfs_trips(file_handle, chunk_size)
+    with open(os.path.join(directory, 'stop_times.txt'),
+              encoding='utf-8-sig') as file_handle:
+        for tram_line in read_gtfs_stop_times(
+                file_handle, network, trips, chunk_size):
+            network.add_line(tram_line)
+    return network
+
+
+def write_gtfs_file(directory, name, header, rows):
+    with open(os.path.join(directory, name), 'w', encoding='utf-8',
+              newline='') as file_handle:
+        writer = csv.writer(file_handle, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_gtfs(
+        network, directory, origin=GTFS_ORIGIN,
+        meters_per_unit=METERS_PER_UNIT):
+    """
+    Writes the tram network and the schedule of its trams for the service
+    day as GTFS feed into given directory
+    """
+    write_gtfs_file(
+        directory, 'agency.txt',
+        ('agency_id', 'agency_name', 'agency_url', 'agency_timezone'),
+        [('tram', 'TramSimulator', 'https://example.com', 'Europe/Warsaw')])
+    write_gtfs_file(
+        directory, 'calendar.txt',
+        ('service_id', 'monday', 'tuesday', 'wednesday', 'thursday',
+         'friday', 'saturday', 'sunday', 'start_date', 'end_date'),
+        [(GTFS_SERVICE_ID, *[1]*7, '20000101', '20991231')])
+    write_gtfs_file(
+        directory, 'stops.txt',
+        ('stop_id', 'stop_name', 'stop_lat', 'stop_lon'),
+        (
+            (tram_stop.get_id(), tram_stop.get_name(), *(
+                f'{coordinate:.7f}' for coordinate in to_coordinates(
+                    tram_stop.get_x(), tram_stop.get_y(), origin,
+                    meters_per_unit)))
+            for tram_stop in network.get_list_tram_stops()
+        ))
+    tram_lines = network.get_list_lines()
+    write_gtfs_file(
+        directory, 'routes.txt',
+        ('route_id', 'agency_id', 'route_short_name', 'route_type'),
+        (
+            (tram_line.get_number(), 'tram', tram_line.get_number(),
+             GTFS_ROUTE_TYPE_TRAM)
+            for tram_line in tram_lines
+        ))
+    write_gtfs_file(
+        directory, 'trips.txt',
+        ('route_id', 'service_id', 'trip_id', 'direction_id'),
+        (
+            (tram_line.get_number(), GTFS_SERVICE_ID, trip_id, int(reversed))
+            for tram_line in tram_lines
+            for trip_id, departure, reversed in get_trips(tram_line)
+        ))
+    write_gtfs_file(
+        directory, 'stop_times.txt',
+        ('trip_id', 'arrival_time', 'departure_time', 'stop_id',
+         'stop_sequence'),
+        (
+            (trip_id, format_gtfs_time(minute), format_gtfs_time(minute),
+             tram_stop.get_id(), sequence + 1)
+            for tram_line in tram_lines
+            for trip_id, minute, tram_stop, sequence in get_stop_times(
+                tram_line)
+        ))
@@ -1,10 +1,17 @@
 from PySide2.QtWidgets import QApplication, QMainWindow
 from ui_tram_simulator import Ui_MainWindow
 from PySide2.QtWidgets import QGraphicsScene, QGraphicsSimpleTextItem
-from PySide2.QtCore import QTimer, QPointF, Qt
-from PySide2.QtGui import QBrush, QColor, QFont, QPainter
+from PySide2.QtCore import QEvent, QPointF, QRectF, QTimer, Qt
+from PySide2.QtGui import QBrush, QColor, QFont, QImage, QPainter
+from concurrent.futures import ThreadPoolExecutor
+from checkpoint import Checkpointer, resume_latest
+from render import AnimationClock, TramLayer, FRAME_RATE, format_time
 from setup import network_setup
+from simulator import Clock, Simulator
+from tiles import TileCache, TILE_SIZE
+import argparse
 import sys
+import time
 
 
 class FatalError(Exception):
@@ -12,244 +19,312 @@ class FatalError(Exception):
         super().__init__('Fatal error, simulator cannot work')
 
 
-class Clock():
+class StaticLayerScene(QGraphicsScene):
     """
-    Class Clock. Contains attributes:
-    :param hours: responsible for keeping time: hours(0-23)
-    :type hours: int
-
-    :param minutes: responsible for keeping time: minutes(0-59)
-    :type minutes: int
+    Class StaticLayerScene. Scene painting the network from cached tiles
+    as its background, its items are only markers of trams.
+    Contains attributes:
+    :param tile_cache: tiles of the static layer
+    :type tile_cache: TileCache
     """
-    def __init__(self, hours=5, minutes=0, parent=None):
-        super().__init__()
-        self._hours = hours
-        self._minutes = minutes
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tile_cache = None
 
-    def get_hours(self):
-        return self._hours
+    def set_tile_cache(self, tile_cache):
+        self._tile_cache = tile_cache
 
-    def increase_hours(self):
-        if self._hours == 23:
-            self._hours = 0
-        else:
-            self._hours += 1
-        self._minutes = 0
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self._tile_cache is None:
+            return
+        scale = painter.worldTransform().m11()
+        for bounds, image in self._tile_cache.get_visible_tiles(
+                scale, rect.left(), rect.top(), rect.right(), rect.bottom()):
+            if image is not None:
+                left, top, right, bottom = bounds
+                painter.drawImage(
+                    QRectF(left, top, right - left, bottom - top), image)
 
-    def get_minutes(self):
-        return self._minutes
 
-    def increase_minutes(self):
-        self._minutes += 1
-
-    def get_time_in_minutes(self):
-        return self.get_minutes() + 60*self.get_hours()
+class TramSimulatorWindow(QMainWindow):
+    """
+    Class TramSimulatorWindow. Renders the state of the simulator,
+    items of the scene are created once and then only modified.
+    The network is painted from tiles, only trams are repainted.
+    Contains attributes:
+    :param simulator: headless simulation engine
+    :type simulator: Simulator
 
-    def increase_time(self):
-        if self.get_minutes() == 59:
-            self.increase_hours()
-        else:
-            self.increase_minutes()
+    :param tram_layer: decides which tram markers have to change
+    :type tram_layer: TramLayer
 
+    :param animation: converts real time into steps of the simulator
+    :type animation: AnimationClock
 
-class TramSimulatorWindow(QMainWindow):
-    """
-    Class TramSimulatorWindow. Contains attributes:
-    :param network: main tram network
-    :type network: TramNetwork
+    :param tile_cache: tiles of the network, drawn in the background
+    :type tile_cache: TileCache
 
-    :param clock: responsible for keeping time
-    :type clock: Clock
+    :param checkpointer: checkpoints of the simulator to rewind it to,
+                         written into checkpoint_directory if it is given
+    :type checkpointer: Checkpointer
     """
-    def __init__(self, network, clock, parent=None):
+    def __init__(self, simulator, checkpoint_directory=None, parent=None):
         super().__init__(parent)
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
 
-        self._scene = QGraphicsScene()
+        self._scene = StaticLayerScene()
         self.ui.TramStopMap.setScene(self._scene)
         self.ui.TramStopMap.setRenderHint(QPainter.Antialiasing)
         self.ui.TramStopMap.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self._network = network
-
-        self.set_tram_stops()
-        self.set_line_between_tram_stops()
+        self._simulator = simulator
+        self._network = simulator.get_network()
+        self._tram_layer = TramLayer(self)
+        self._animation = AnimationClock()
+        self._last_frame = time.perf_counter()
+        self._displayed_time = (0, 0)
+        self._viewport = None
+
+        self.set_scene_rect()
+        self._executor = ThreadPoolExecutor(1)
+        self._tile_cache = TileCache(
+            self, self._network, executor=self._executor)
+        self._scene.set_tile_cache(self._tile_cache)
+        self._checkpointer = Checkpointer(
+            simulator, directory=checkpoint_directory,
+            executor=self._executor)
+        self._checkpointer.take()
+        map_viewport = self.ui.TramStopMap.viewport()
+        map_viewport.setMouseTracking(True)
+        map_viewport.installEventFilter(self)
         self.showMaximized()
-        self.clock_setup(clock)
+        self.clock_setup(simulator.get_clock())
 
     def clock_setup(self, clock):
-        hours = clock.get_hours()
-        minutes = clock.get_minutes()
-        self._old_time = self._scene.addText(f'{hours}:0{minutes}')
-        self._old_time.setFont(QFont("Times New Roman", 14))
-        self._old_time.setPos(850, -350)
+        time = format_time(clock.get_hours(), clock.get_minutes())
+        self._time = QGraphicsSimpleTextItem(time)
+        self._time.setFont(QFont("Times New Roman", 14))
+        self._time.setPos(850, -350)
+        self._scene.addItem(self._time)
         self._clock = clock
+        self._displayed_time = (clock.get_hours(), clock.get_minutes())
+        self.display_speed()
 
     def get_scene(self):
         return self._scene
 
-    def set_tram_stops(self):
+    def set_scene_rect(self):
         """
-        Sets all tram stops on the scene
+        Sets the scene to cover the whole network, although items are
+        created only for its visible part
         """
-        scene = self.get_scene()
-        for tram_stop in self._network.get_list_tram_stops():
-            marker = scene.addEllipse(-5, -5, 10, 10)
-            marker.setZValue(1)
-            marker.setBrush(QBrush(QColor(150, 0, 200)))
-            name = tram_stop.get_name()
-            tram_stop_name = QGraphicsSimpleTextItem(name, marker)
-            tram_stop_name.setFont(QFont("Times New Roman", 8))
-            marker.setPos(tram_stop.get_x(), tram_stop.get_y())
-            tram_stop_name.setPos(0, 7)
-
-    def set_line_between_tram_stops(self):
+        list_tram_stops = self._network.get_list_tram_stops()
+        if not list_tram_stops:
+            return
+        xs = [tram_stop.get_x() for tram_stop in list_tram_stops]
+        ys = [tram_stop.get_y() for tram_stop in list_tram_stops]
+        self._scene.setSceneRect(QRectF(
+            min(xs) - 100, min(ys) - 100,
+            max(xs) - min(xs) + 200, max(ys) - min(ys) + 200))
+
+    def get_viewport(self):
         """
-        Sets line between each connected tram stops on the scene
+        Returns the visible rectangle of the scene (left, top, right, bottom)
         """
-        scene = self.get_scene()
-        for tram_stop in self._network.get_list_tram_stops():
-            if len(tram_stop.get_connected_stops()) > 0:
-                for connected_tuple in tram_stop.get_connected_stops():
-                    connected_tram_stop = connected_tuple[0]
-                    from_x = tram_stop.get_x()
-                    from_y = tram_stop.get_y()
-                    to_x = connected_tram_stop.get_x()
-                    to_y = connected_tram_stop.get_y()
-                    line = scene.addLine(from_x, from_y, to_x, to_y)
-                    line.setPos(0, 0)
-
-    def set_tram(self):
+        view = self.ui.TramStopMap
+        rect = view.mapToScene(view.viewport().rect()).boundingRect()
+        return (rect.left(), rect.top(), rect.right(), rect.bottom())
+
+    def render_tile(self, level, bounds, tram_stops, edges, labels):
         """
-        Recognizes which tram should be placed on the scene
+        Draws tram stops and connections on the image of the tile,
+        it can be called from a background thread
         """
-        for tram_line in self._network.get_list_lines():
-            itinerary = tram_line.get_itinerary()
-            for tram_tuple in tram_line.get_list_tram():
-                tram = tram_tuple[0]
-                minutes = self._clock.get_minutes()
-                hours = self._clock.get_hours()
-                if minutes == 0 and hours == 4:
-                    tram.restart_start_time()
-                if self._clock.get_time_in_minutes() == tram.get_start_time():
-                    tram.increase_tram_interval()
-                    if tram._move is False:
-                        self.create_tram(itinerary, tram, tram_line)
-                    tram.set_activated(True)
-                    tram._move = True
-
-    def create_tram(self, itinerary, tram, tram_line):
+        image = QImage(
+            TILE_SIZE, TILE_SIZE, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(2**level, 2**level)
+        painter.translate(-bounds[0], -bounds[1])
+        for tram_stopA, tram_stopB in edges:
+            painter.drawLine(
+                QPointF(tram_stopA.get_x(), tram_stopA.get_y()),
+                QPointF(tram_stopB.get_x(), tram_stopB.get_y()))
+        painter.setBrush(QBrush(QColor(150, 0, 200)))
+        for tram_stop in tram_stops:
+            painter.drawEllipse(
+                QPointF(tram_stop.get_x(), tram_stop.get_y()), 5, 5)
+        if labels:
+            painter.setFont(QFont("Times New Roman", 8))
+            for tram_stop in tram_stops:
+                painter.drawText(
+                    QPointF(tram_stop.get_x(), tram_stop.get_y() + 17),
+                    tram_stop.get_name())
+        painter.end()
+        return image
+
+    def update_viewport(self):
         """
-        Creates and sets trams on the scene
+        Remembers the visible rectangle of the scene and repaints
+        the background when new tiles are drawn
         """
-        tram.set_itinerary(itinerary)
-        first_tram_stop = tram.itinerary[0]
-        marker, tram_name = self.create_marker(tram)
-        x = first_tram_stop.get_x()
-        y = first_tram_stop.get_y()
-        marker.setPos(x, y)
-        tram_name.setPos(-15, -20)
-        tram_line._moving_tram.append((tram, marker, tram_name))
-        tram.set_x(x)
-        tram.set_y(y)
+        self._viewport = self.get_viewport()
+        if self._tile_cache.collect():
+            self._scene.invalidate(
+                self._scene.sceneRect(), QGraphicsScene.BackgroundLayer)
 
-    def create_marker(self, tram):
+    def closeEvent(self, event):
+        self._checkpointer.flush()
+        self._executor.shutdown(wait=False)
+        super().closeEvent(event)
+
+    def eventFilter(self, watched, event):
+        """
+        Shows the tram or tram stop under the cursor in the status bar
         """
-        Creates ellipse for tram and sets on the scene
+        if event.type() == QEvent.MouseMove:
+            point = self.ui.TramStopMap.mapToScene(event.pos())
+            x, y = point.x(), point.y()
+            tram = self._tram_layer.tram_at(x, y, 6)
+            tram_stop = self._tile_cache.tram_stop_at(x, y, 6)
+            if tram is not None:
+                self.ui.statusbar.showMessage(
+                    f'Tram {tram.get_tram_name()}/{tram.get_line_number()}')
+            elif tram_stop is not None:
+                self.ui.statusbar.showMessage(tram_stop.get_name())
+            else:
+                self.display_speed()
+        return super().eventFilter(watched, event)
+
+    def update_trams(self):
+        """
+        Places markers of moving trams on the scene
+        """
+        self._tram_layer.update(
+            self._simulator.get_fleet(), viewport=self.get_viewport())
+
+    def create_marker(self):
+        """
+        Creates hidden ellipse with the name of tram on the scene
         """
         marker = self.get_scene().addEllipse(-4, -4, 8, 8)
         marker.setBrush(QBrush(QColor(0, 0, 255)))
         marker.setZValue(1)
-        tram_name = self.create_tram_name_point(tram, marker)
-        return (marker, tram_name)
+        marker.setVisible(False)
+        tram_name = self.create_tram_name_point(marker)
+        tram_name.setPos(-15, -20)
+        return marker
+
+    def show_marker(self, marker, tram):
+        marker.childItems()[0].setText(tram.get_tram_name())
+        marker.setVisible(True)
 
-    def create_tram_name_point(self, tram, marker):
-        tram_name = QGraphicsSimpleTextItem(tram.get_tram_name(), marker)
+    def hide_marker(self, marker):
+        marker.setVisible(False)
+
+    def move_marker(self, marker, x, y):
+        marker.setPos(x, y)
+
+    def create_tram_name_point(self, marker):
+        tram_name = QGraphicsSimpleTextItem(marker)
         tram_name.setFont(QFont("Times New Roman", 8))
         tram_name.setBrush(QBrush(QColor(255, 0, 0)))
         return tram_name
 
-    def move_tram_in_tram_line(self):
+    def setup_tram(self):
+        """
+        Simulates one minute, its result is displayed by the next frame
+        """
+        self._displayed_time = (
+            self._clock.get_hours(), self._clock.get_minutes())
+        self._simulator.step()
+        self._checkpointer.update()
+
+    def next_frame(self):
         """
-        Recognizes which tram should be moved
+        Simulates minutes which passed since the last frame at the speed
+        of the animation and displays trams between the last two minutes
         """
-        for tram_line in self._network.get_list_lines():
-            for tram_tuple in tram_line.get_moving_tram():
-                tram = tram_tuple[0]
-                point = tram_tuple[1]
-                tram_name_point = tram_tuple[2]
-                if tram.get_activated() is True:
-                    if not tram.get_last_tram_stop() == tram.itinerary[-1]:
-                        self.move_tram(tram, tram_line, point, tram_name_point)
-                    else:
-                        """
-                        Tram restart - when the tram reaches last tram stop,
-                        it stops moving and its route is reversed
-                        """
-                        tram.set_activated(False)
-                        tram.itinerary = tram.itinerary[::-1]
-                        tram._last_tram_stop_number = 0
-
-    def count_distance_move(self, next_tram_stop, last_tram_stop):
-        distance = self._network.get_distance(last_tram_stop, next_tram_stop)
-        x_difference = next_tram_stop.get_x() - last_tram_stop.get_x()
-        move_x = float(x_difference)/distance
-        y_difference = next_tram_stop.get_y() - last_tram_stop.get_y()
-        move_y = float(y_difference)/distance
-        return (move_x, move_y)
-
-    def move_tram(self, tram, tram_line, point, tram_name_point):
+        now = time.perf_counter()
+        self._animation.advance(now - self._last_frame)
+        self._last_frame = now
+        steps, fraction = self._animation.run(self.setup_tram)
+        self.update_viewport()
+        self._tram_layer.update(
+            self._simulator.get_fleet(), fraction, self._viewport)
+        self.display_time(*self._displayed_time)
+
+    def keyPressEvent(self, event):
         """
-        Moves trams on the scene
+        Keys + and - double and halve the speed of the simulation,
+        keys [ and ] rewind it to the previous and the next checkpoint
         """
-        last = tram.itinerary[tram.get_last_tram_stop_number()]
-        next = tram.itinerary[tram.get_last_tram_stop_number()+1]
-        move_x, move_y = self.count_distance_move(next, last)
-        x = tram.get_x()
-        y = tram.get_y()
-        point.setPos(point.pos() + QPointF(move_x, move_y))
-        tram.set_x(x+move_x)
-        tram.set_y(y+move_y)
-        if next.get_x() == tram.get_x():
-            if next.get_y() == tram.get_y():
-                tram._last_tram_stop = next
-                tram.increase_last_tram_stop_number()
+        if event.key() == Qt.Key_Plus:
+            self._animation.set_speed(self._animation.get_speed()*2)
+        elif event.key() == Qt.Key_Minus:
+            self._animation.set_speed(self._animation.get_speed()/2)
+        elif event.key() == Qt.Key_BracketLeft:
+            self.display_checkpoint(self._checkpointer.rewind_previous())
+            return
+        elif event.key() == Qt.Key_BracketRight:
+            self.display_checkpoint(self._checkpointer.forward_next())
+            return
+        else:
+            super().keyPressEvent(event)
+            return
+        self.display_speed()
 
-    def setup_tram(self):
-        self.set_tram()
-        self.move_tram_in_tram_line()
+    def display_speed(self):
+        self.ui.statusbar.showMessage(
+            f'Speed {self._animation.get_speed():g}x (+/-)')
 
-    def display_time(self):
+    def display_checkpoint(self, minute):
         """
-        Increases and displays the simulation time
+        Displays the time of the checkpoint the simulator was rewound to
         """
-        if self._clock.get_minutes() <= 9:
-            time = f'{self._clock.get_hours()}:0{self._clock.get_minutes()}'
-        else:
-            time = f'{self._clock.get_hours()}:{self._clock.get_minutes()}'
-        self._scene.removeItem(self._old_time)
-        new_time = self._scene.addText(time)
-        new_time.setFont(QFont("Times New Roman", 14))
-        new_time.setPos(850, -350)
-        self._old_time = new_time
-        self._clock.increase_time()
+        if minute is None:
+            self.ui.statusbar.showMessage('No checkpoint')
+            return
+        self._displayed_time = (
+            self._clock.get_hours(), self._clock.get_minutes())
+        self.update_trams()
+        self.ui.statusbar.showMessage(
+            f'Checkpoint {format_time(*self._displayed_time)} ([/])')
+
+    def display_time(self, hours, minutes):
+        """
+        Displays the simulation time
+        """
+        time = format_time(hours, minutes)
+        if self._time.text() != time:
+            self._time.setText(time)
 
 
 def guiMain(args):
     """
     Opens the simulation window.
     Counts the time in simulation
-            (1000 ms in real time = 1 minute in simulation time)
+            (1000 ms in real time = 1 minute in simulation time at 1x speed,
+            the view is refreshed FRAME_RATE times a second)
+    Checkpoints are written into the directory given by --checkpoint-dir,
+    with --resume the simulation continues from the latest of them.
     """
     try:
-        network = network_setup(args)
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--checkpoint-dir')
+        parser.add_argument('--resume', action='store_true')
+        arguments, network_args = parser.parse_known_args(args[1::])
+        network = network_setup([args[0], *network_args])
         app = QApplication(args)
-        clock = Clock()
-        window = TramSimulatorWindow(network, clock)
+        simulator = Simulator(network, Clock())
+        if arguments.resume and arguments.checkpoint_dir:
+            resume_latest(simulator, arguments.checkpoint_dir)
+        window = TramSimulatorWindow(simulator, arguments.checkpoint_dir)
         timer = QTimer()
-        timer.setInterval(1000)
-        timer.timeout.connect(window.setup_tram)
-        timer.timeout.connect(window.display_time)
+        timer.setInterval(1000 // FRAME_RATE)
+        timer.timeout.connect(window.next_frame)
         timer.start()
         window.show()
         return app.exec_()
@@ -0,0 +1,197 @@
+import sys
+from bisect import bisect_left
+from schedule import get_departures, is_trip_reversed
+
+"""
+Earliest-arrival journey planner respecting departures of trams.
+Based on RAPTOR (Round-bAsed Public Transit Optimized Router): in round k
+all routes through tram stops improved in round k-1 are scanned, so round k
+finds the best journeys with k-1 transfers. A route is a tram line in one
+direction, all its trips share the travel times between tram stops.
+Transfers are possible at tram stops shared by lines and take no time.
+"""
+
+NOT_REACHED = sys.maxsize
+MAX_TRANSFERS = 4
+
+
+class Route():
+    """
+    Class Route. Trips of a tram line in one direction. Contains attributes:
+    :param tram_line: the tram line of the route
+    :type tram_line: TramLine
+
+    :param reversed: whether trams run from the last to the first tram stop
+    :type reversed: bool
+
+    :param stops: indexes of subsequent tram stops of the route
+    :type stops: list of int
+
+    :param offsets: minutes from the departure of a trip to each tram stop
+    :type offsets: list of int
+
+    :param starts: sorted departures of all trips from the first tram stop
+    :type starts: list of int
+    """
+    def __init__(self, tram_line, reversed, stops, offsets, starts):
+        self.tram_line = tram_line
+        self.reversed = reversed
+        self.stops = stops
+        self.offsets = offsets
+        self.starts = starts
+
+
+class JourneyPlanner():
+    """
+    Class JourneyPlanner. Answers earliest-arrival queries between tram
+    stops of the network during the service day. Contains attributes:
+    :param network: tram network with lines and trams
+    :type network: TramNetwork
+
+    :param routes: routes of all tram lines
+    :type routes: list of Route
+
+    :param routes_by_stop: (route, position) pairs for each tram stop
+    :type routes_by_stop: list of lists
+    """
+    def __init__(self, network):
+        self._network = network
+        self._tram_stops = network.get_list_tram_stops()
+        self._indexes = {
+            tram_stop: index
+            for index, tram_stop in enumerate(self._tram_stops)
+        }
+        self._routes = []
+        self._routes_by_stop = [[] for tram_stop in self._tram_stops]
+        for tram_line in network.get_list_lines():
+            for reversed in (False, True):
+                self.add_route(tram_line, reversed)
+
+    def add_route(self, tram_line, reversed):
+        itinerary = tram_line.get_itinerary()
+        if len(itinerary) < 2:
+            return
+        if reversed:
+            itinerary = itinerary[::-1]
+        starts = []
+        for tram_tuple in tram_line.get_list_tram():
+            tram = tram_tuple[0]
+            for trip, departure in enumerate(get_departures(tram)):
+                if is_trip_reversed(tram, trip) == reversed:
+                    starts.append(departure)
+        if not starts:
+            return
+        table = tram_line.get_segment_table(reversed)
+        offsets = [*table.offset, table.get_total_minutes()]
+        stops = [self._indexes[tram_stop] for tram_stop in itinerary]
+        route_index = len(self._routes)
+        self._routes.append(
+            Route(tram_line, reversed, stops, offsets, sorted(starts)))
+        for position, stop in enumerate(stops[:-1]):
+            self._routes_by_stop[stop].append((route_index, position))
+
+    def get_routes(self):
+        return self._routes
+
+    def search(self, origin, minute, max_transfers=MAX_TRANSFERS):
+        """
+        Runs rounds of the algorithm from the tram stop with index origin.
+        Returns earliest arrivals at all tram stops and labels describing
+        the last leg of the journey to each of them as
+        (route index, boarding position, trip departure) tuples.
+        """
+        routes = self._routes
+        routes_by_stop = self._routes_by_stop
+        best = [NOT_REACHED]*len(self._tram_stops)
+        best[origin] = minute
+        labels = [None]*len(self._tram_stops)
+        previous = best[:]
+        marked = {origin}
+        for round in range(max_transfers + 1):
+            queue = {}
+            for stop in marked:
+                for route_index, position in routes_by_stop[stop]:
+                    if position < queue.get(route_index, NOT_REACHED):
+                        queue[route_index] = position
+            marked = set()
+            current = previous[:]
+            for route_index, first in queue.items():
+                route = routes[route_index]
+                offsets = route.offsets
+                start = None
+                board = None
+                for position in range(first, len(route.stops)):
+                    stop = route.stops[position]
+                    if start is not None:
+                        arrival = start + offsets[position]
+                        if arrival < best[stop]:
+                            best[stop] = arrival
+                            current[stop] = arrival
+                            labels[stop] = (route_index, board, start)
+                            marked.add(stop)
+                    ready = previous[stop]
+                    if ready == NOT_REACHED:
+                        continue
+                    if start is not None and ready > start + offsets[position]:
+                        continue
+                    trip = bisect_left(route.starts, ready - offsets[position])
+                    if trip < len(route.starts):
+                        if start is None or route.starts[trip] < start:
+                            start = route.starts[trip]
+                            board = position
+            previous = current
+            if not marked:
+                break
+        return best, labels
+
+    def earliest_arrival(
+            self, origin, destination, minute, max_transfers=MAX_TRANSFERS):
+        """
+        Returns the earliest arrival at destination tram stop when starting
+        from origin tram stop at given minute, None if it cannot be reached
+        """
+        best, labels = self.search(
+            self._indexes[origin], minute, max_transfers)
+        arrival = best[self._indexes[destination]]
+        if arrival == NOT_REACHED:
+            return None
+        return arrival
+
+    def plan(self, origin, destination, minute, max_transfers=MAX_TRANSFERS):
+        """
+        Returns legs of the earliest journey as (tram line, boarding stop,
+        departure, alighting stop, arrival) tuples or None if
+        destination cannot be reached
+        """
+        origin_index = self._indexes[origin]
+        best, labels = self.search(origin_index, minute, max_transfers)
+        stop = self._indexes[destination]
+        if best[stop] == NOT_REACHED:
+            return None
+        legs = []
+        while stop != origin_index:
+            route_index, board, start = labels[stop]
+            route = self._routes[route_index]
+            board_stop = route.stops[board]
+            legs.append((
+                route.tram_line, self._tram_stops[board_stop],
+                start + route.offsets[board], self._tram_stops[stop],
+                best[stop]))
+            stop = board_stop
+        return legs[::-1]
+
+    def earliest_arrivals(self, queries, max_transfers=MAX_TRANSFERS):
+        """
+        Answers many (origin, destination, minute) queries, queries with
+        the same origin and minute share one search.
+        Returns the list of arrivals (None if not reachable)
+        """
+        searches = {}
+        arrivals = []
+        for origin, destination, minute in queries:
+            key = (self._indexes[origin], minute)
+            if key not in searches:
+                searches[key] = self.search(*key, max_transfers)[0]
+            arrival = searches[key][self._indexes[destination]]
+            arrivals.append(None if arrival == NOT_REACHED else arrival)
+        return arrivals
@@ -0,0 +1,226 @@
+from array import array
+from bisect import bisect_right
+from database import get_segment
+from simulator import ARRIVAL, DEPARTURE
+from timetable import get_stop_times
+
+"""
+Occupancy of track segments. A segment is a connection between two tram
+stops, identified by the pair of IDs of the tram stops in ascending order.
+Trams run along a segment forward (from the lower ID) or backward.
+Intervals (segment, forward, enter, leave, line, vehicle) in which trams
+occupy segments come from the log of the simulator or, for the whole
+service day at once, from stop times of the timetable. Intervals are
+sorted once, then conflicts are found by sweeping neighbouring intervals
+of each segment, without comparing all pairs of trams:
+    headway violations  trams entering the segment in the same direction
+                        less than min_headway minutes apart
+    overtakings         trams leaving the segment before a tram which
+                        entered it earlier in the same direction
+    bunching            trams of the same line entering the segment much
+                        sooner after each other than usually
+"""
+
+MIN_HEADWAY = 2
+BUNCHING_RATIO = 0.5
+
+
+def get_vehicle_id(tram):
+    """
+    Returns the line number and the number of the tram in its line,
+    like the beginning of IDs of its trips in the timetable
+    """
+    return f'{tram.get_line().get_number()}_{tram.get_line_number()}'
+
+
+def intervals_from_log(log):
+    """
+    Yields occupied intervals of segments from the log of the simulator
+    as (minute, event, tram, tram stop) tuples in order of minutes
+    """
+    last = {}
+    for minute, event, tram, tram_stop in log:
+        if event == ARRIVAL and tram in last:
+            enter, previous_stop = last[tram]
+            segment, forward = get_segment(previous_stop, tram_stop)
+            yield (segment, forward, enter, minute,
+                   tram.get_line().get_number(), get_vehicle_id(tram))
+        if event in (ARRIVAL, DEPARTURE):
+            last[tram] = (minute, tram_stop)
+
+
+def intervals_from_timetable(network):
+    """
+    Yields occupied intervals of segments by all trips of the service day
+    """
+    for tram_line in network.get_list_lines():
+        number = tram_line.get_number()
+        previous = None
+        for trip_id, minute, tram_stop, sequence in get_stop_times(
+                tram_line):
+            if sequence > 0:
+                segment, forward = get_segment(previous[1], tram_stop)
+                yield (segment, forward, previous[0], minute, number,
+                       trip_id.rsplit('_', 1)[0])
+            previous = (minute, tram_stop)
+
+
+def get_median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+class Occupancy():
+    """
+    Class Occupancy. Intervals in which trams occupy segments, sorted
+    by segments, directions and minutes of entering. Contains attributes:
+    :param intervals: (segment, forward, enter, leave, line, vehicle)
+    :type intervals: list of tuples
+
+    :param enter: minutes of entering of intervals, in the same order
+    :type enter: array of int
+
+    :param groups: first and last index of intervals and the longest
+                   interval of each (segment, forward)
+    :type groups: dict
+    """
+    def __init__(self, intervals):
+        self._intervals = sorted(intervals)
+        self._enter = array('l', (entry[2] for entry in self._intervals))
+        self._groups = {}
+        for index, entry in enumerate(self._intervals):
+            key = entry[:2]
+            group = self._groups.get(key)
+            length = entry[3] - entry[2]
+            if group is None:
+                self._groups[key] = (index, index + 1, length)
+            else:
+                self._groups[key] = (
+                    group[0], index + 1, max(group[2], length))
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def get_intervals(self):
+        return self._intervals
+
+    def get_segments(self):
+        return {key[0] for key in self._groups}
+
+    def get_group(self, segment, forward):
+        """
+        Returns intervals of the segment run in the direction
+        """
+        group = self._groups.get((segment, forward))
+        if group is None:
+            return []
+        return self._intervals[group[0]:group[1]]
+
+    def query(self, segment, minute):
+        """
+        Returns intervals of trams which are on the segment at the minute
+        """
+        found = []
+        for forward in (True, False):
+            group = self._groups.get((segment, forward))
+            if group is None:
+                continue
+            first, last, longest = group
+            last = bisect_right(self._enter, minute, first, last)
+            first = bisect_right(self._enter, minute - longest, first, last)
+            found.extend(
+                entry for entry in self._intervals[first:last]
+                if entry[3] > minute)
+        return found
+
+    def get_peak_occupancy(self):
+        """
+        Returns the most trams on each segment at once (in both
+        directions) and the first minute when it happened
+        """
+        changes = {}
+        for segment, forward, enter, leave, line, vehicle in (
+                self._intervals):
+            changes.setdefault(segment, []).extend(((enter, 1), (leave, -1)))
+        peaks = {}
+        for segment, segment_changes in changes.items():
+            segment_changes.sort()
+            trams = 0
+            peak = (0, None)
+            for minute, change in segment_changes:
+                trams += change
+                if trams > peak[0]:
+                    peak = (trams, minute)
+            peaks[segment] = peak
+        return peaks
+
+    def get_headway_violations(self, min_headway=MIN_HEADWAY):
+        """
+        Returns (segment, forward, minute, headway, vehicle before,
+        vehicle) of trams entering segments too soon after other trams
+        """
+        violations = []
+        for first, last, longest in self._groups.values():
+            for index in range(first + 1, last):
+                before = self._intervals[index - 1]
+                entry = self._intervals[index]
+                headway = entry[2] - before[2]
+                if headway < min_headway:
+                    violations.append(
+                        (*entry[:3], headway, before[5], entry[5]))
+        return violations
+
+    def get_overtakings(self):
+        """
+        Returns (segment, forward, minute, overtaken vehicle, vehicle)
+        of trams leaving segments before trams which entered them earlier
+        """
+        overtakings = []
+        for first, last, longest in self._groups.values():
+            latest = self._intervals[first]
+            for index in range(first + 1, last):
+                entry = self._intervals[index]
+                if entry[3] < latest[3]:
+                    overtakings.append((*entry[:2], entry[3], latest[5],
+                                        entry[5]))
+                else:
+                    latest = entry
+        return overtakings
+
+    def get_bunching(self, ratio=BUNCHING_RATIO):
+        """
+        Returns (line, segment, forward, minute, headway, vehicle before,
+        vehicle) of trams entering segments sooner than ratio of the median
+        headway of their line on the segment after the previous tram
+        of the line
+        """
+        by_line = sorted(
+            (entry[4], *entry[:3], entry[5]) for entry in self._intervals)
+        bunching = []
+        first = 0
+        while first < len(by_line):
+            last = first + 1
+            while last < len(by_line) and by_line[last][:3] == (
+                    by_line[first][:3]):
+                last += 1
+            headways = [
+                by_line[index][3] - by_line[index - 1][3]
+                for index in range(first + 1, last)
+            ]
+            if headways:
+                limit = ratio*get_median(headways)
+                for index, headway in enumerate(headways, first + 1):
+                    if headway < limit:
+                        bunching.append((
+                            *by_line[index][:4], headway,
+                            by_line[index - 1][4], by_line[index][4]))
+            first = last
+        return bunching
+
+
+def occupancy_from_log(log):
+    return Occupancy(intervals_from_log(log))
+
+
+def occupancy_from_timetable(network):
+    return Occupancy(intervals_from_timetable(network))
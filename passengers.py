@@ -0,0 +1,391 @@
+import math
+import random
+from array import array
+from collections import Counter
+from simulator import Simulator
+
+"""
+Passenger demand and loads of trams. Passengers appear at tram stops as
+a Poisson process: each origin-destination pair of a tram line has its rate
+of passengers per hour, scaled by the profile of the hour of the day.
+Passengers are not objects, they are kept as counts:
+    waiting     for each direction of each line, counts of passengers
+                by (origin, destination) positions in its itinerary
+    on board    for each tram, counts of passengers by the position
+                of their destination in the itinerary of the tram
+so memory does not grow with the number of trips and serving a tram at
+a tram stop costs the same however many passengers wait there.
+Passengers travel directly, without changing lines.
+"""
+
+CAPACITY = 200
+HOURLY_PROFILE = (
+    0.1, 0.05, 0.05, 0.05, 0.2, 0.6, 1.2, 2.0, 1.8, 1.0, 0.8, 0.9,
+    1.0, 1.0, 1.2, 1.6, 1.9, 1.7, 1.2, 0.9, 0.7, 0.5, 0.3, 0.2)
+NORMAL_RATE = 30
+
+
+class InvalidFlowError(Exception):
+    def __init__(self):
+        super().__init__(
+            'Tram stops of the flow must be different tram stops of line')
+
+
+def poisson(generator, rate):
+    """
+    Returns the random number of events of the Poisson process with given
+    mean, approximated by the normal distribution for large means
+    """
+    if rate >= NORMAL_RATE:
+        return max(0, round(generator.gauss(rate, math.sqrt(rate))))
+    limit = math.exp(-rate)
+    count = 0
+    product = generator.random()
+    while product > limit:
+        count += 1
+        product *= generator.random()
+    return count
+
+
+def get_route_key(tram):
+    """
+    Returns (tram line, reversed) of the direction the tram runs in
+    """
+    return (tram.get_line(), tram.get_reversed())
+
+
+class Demand():
+    """
+    Class Demand. Origin-destination demand on tram lines.
+    Contains attributes:
+    :param flows: passengers per hour from the origin to the destination
+                  by (tram line, reversed, origin, destination), origin
+                  and destination are positions in the itinerary of
+                  the direction
+    :type flows: dict
+
+    :param profile: multipliers of rates for each hour of the day
+    :type profile: tuple of float
+
+    :param origins: flows grouped by origins, built when needed
+    :type origins: list
+    """
+    def __init__(self, profile=HOURLY_PROFILE):
+        self._flows = {}
+        self._profile = profile
+        self._origins = None
+
+    def get_flows(self):
+        return self._flows
+
+    def get_profile(self):
+        return self._profile
+
+    def add_flow(self, tram_line, origin, destination, rate):
+        """
+        Adds passengers per hour travelling from the origin to
+        the destination tram stop by the line
+        """
+        itinerary = tram_line.get_itinerary()
+        if origin not in itinerary or destination not in itinerary:
+            raise InvalidFlowError
+        first = itinerary.index(origin)
+        last = itinerary.index(destination)
+        if first == last:
+            raise InvalidFlowError
+        reversed = last < first
+        if reversed:
+            first = len(itinerary) - 1 - first
+            last = len(itinerary) - 1 - last
+        key = (tram_line, reversed, first, last)
+        self._flows[key] = self._flows.get(key, 0) + rate
+        self._origins = None
+
+    def get_daily_trips(self):
+        """
+        Returns the expected number of trips during the whole day
+        """
+        return sum(self._flows.values())*sum(self._profile)
+
+    def get_origins(self):
+        """
+        Returns (tram line, reversed, origin, rate, destinations,
+        cumulative rates) for each origin, rate is the sum of its flows
+        """
+        if self._origins is None:
+            grouped = {}
+            for key, rate in self._flows.items():
+                grouped.setdefault(key[:3], []).append((key[3], rate))
+            self._origins = []
+            for origin_key, flows in grouped.items():
+                destinations = tuple(flow[0] for flow in flows)
+                cumulative = []
+                total = 0
+                for destination, rate in flows:
+                    total += rate
+                    cumulative.append(total)
+                self._origins.append(
+                    (*origin_key, total, destinations, cumulative))
+        return self._origins
+
+    def generate(self, minute, generator):
+        """
+        Yields (tram line, reversed, origin, destination, count) of
+        passengers appearing in given minute, drawn by the generator
+        (random.Random)
+        """
+        factor = self._profile[(minute // 60) % 24] / 60
+        for tram_line, reversed, origin, rate, destinations, cumulative in (
+                self.get_origins()):
+            count = poisson(generator, rate*factor)
+            if count == 0:
+                continue
+            if len(destinations) == 1:
+                yield (tram_line, reversed, origin, destinations[0], count)
+                continue
+            chosen = Counter(generator.choices(
+                destinations, cum_weights=cumulative, k=count))
+            for destination, count in chosen.items():
+                yield (tram_line, reversed, origin, destination, count)
+
+
+def uniform_demand(network, daily_trips, profile=HOURLY_PROFILE):
+    """
+    Returns demand spreading daily trips equally over all pairs of tram
+    stops of all lines, in both directions
+    """
+    pairs = [
+        (tram_line, origin, destination)
+        for tram_line in network.get_list_lines()
+        for origin in tram_line.get_itinerary()
+        for destination in tram_line.get_itinerary()
+        if origin != destination
+    ]
+    demand = Demand(profile)
+    if pairs:
+        rate = daily_trips / (len(pairs)*sum(profile))
+        for tram_line, origin, destination in pairs:
+            demand.add_flow(tram_line, origin, destination, rate)
+    return demand
+
+
+class Passengers():
+    """
+    Class Passengers. Waiting passengers and loads of trams of the fleet.
+    Contains attributes:
+    :param fleet: trams carrying passengers
+    :type fleet: Fleet
+
+    :param capacity: most passengers on board of a tram
+    :type capacity: int
+
+    :param waiting: counts of waiting passengers by (tram line, reversed),
+                    the count for (origin, destination) positions is
+                    at origin*stops + destination
+    :type waiting: dict of array of int
+
+    :param onboard: counts of passengers on board of each tram
+                    by positions of destinations (None before boarding)
+    :type onboard: list of array of int
+
+    :param load, peak_load: passengers on board of each tram,
+                            now and the most so far
+    :type load, peak_load: array of int
+
+    :param waiting_total: passengers waiting at all tram stops
+    :type waiting_total: int
+
+    :param spawned, boarded, alighted: passengers so far
+    :type spawned, boarded, alighted: int
+
+    :param denied: passengers left behind by full trams so far
+                   (a passenger is counted by each tram it did not fit in)
+    :type denied: int
+
+    :param wait_minutes: minutes waited by all passengers so far
+    :type wait_minutes: int
+    """
+    def __init__(self, fleet, capacity=CAPACITY):
+        self._fleet = fleet
+        self._capacity = capacity
+        self._waiting = {}
+        self._onboard = [None]*len(fleet)
+        self._load = array('l', [0])*len(fleet)
+        self._peak_load = array('l', [0])*len(fleet)
+        self._waiting_total = 0
+        self._spawned = 0
+        self._boarded = 0
+        self._alighted = 0
+        self._denied = 0
+        self._wait_minutes = 0
+
+    def get_capacity(self):
+        return self._capacity
+
+    def get_load(self, index):
+        return self._load[index]
+
+    def get_peak_load(self, index):
+        return self._peak_load[index]
+
+    def get_waiting_total(self):
+        return self._waiting_total
+
+    def get_spawned(self):
+        return self._spawned
+
+    def get_boarded(self):
+        return self._boarded
+
+    def get_alighted(self):
+        return self._alighted
+
+    def get_denied(self):
+        return self._denied
+
+    def get_wait_minutes(self):
+        return self._wait_minutes
+
+    def get_waiting(self, tram_line, reversed):
+        """
+        Returns counts of waiting passengers of the direction of the line
+        """
+        waiting = self._waiting.get((tram_line, reversed))
+        if waiting is None:
+            stops = len(tram_line.get_itinerary())
+            waiting = array('l', [0])*(stops*stops)
+            self._waiting[(tram_line, reversed)] = waiting
+        return waiting
+
+    def count_waiting(self, tram_line, reversed, origin):
+        """
+        Returns passengers waiting at the origin position of the direction
+        """
+        stops = len(tram_line.get_itinerary())
+        waiting = self.get_waiting(tram_line, reversed)
+        return sum(waiting[origin*stops:(origin + 1)*stops])
+
+    def add(self, tram_line, reversed, origin, destination, count):
+        stops = len(tram_line.get_itinerary())
+        self.get_waiting(tram_line, reversed)[
+            origin*stops + destination] += count
+        self._waiting_total += count
+        self._spawned += count
+
+    def wait(self):
+        """
+        Passes one minute for all waiting passengers
+        """
+        self._wait_minutes += self._waiting_total
+
+    def alight(self, index, position):
+        """
+        Passengers of the tram whose destination is the position leave it
+        """
+        onboard = self._onboard[index]
+        if onboard is None:
+            return 0
+        count = onboard[position]
+        onboard[position] = 0
+        self._load[index] -= count
+        self._alighted += count
+        return count
+
+    def board(self, index, position):
+        """
+        Passengers waiting at the position for the direction of the tram
+        get on board. If they do not fit, each destination gets
+        the share of free places proportional to its waiting passengers.
+        Returns the number of boarded passengers
+        """
+        tram = self._fleet.get_trams()[index]
+        tram_line, reversed = get_route_key(tram)
+        stops = len(tram_line.get_itinerary())
+        waiting = self.get_waiting(tram_line, reversed)
+        start = position*stops + position + 1
+        end = (position + 1)*stops
+        row = waiting[start:end]
+        total = sum(row)
+        if total == 0:
+            return 0
+        free = self._capacity - self._load[index]
+        if total > free:
+            self._denied += total - free
+            taken = [count*free // total for count in row]
+            left = free - sum(taken)
+            for destination in range(len(taken)):
+                if left == 0:
+                    break
+                if taken[destination] < row[destination]:
+                    taken[destination] += 1
+                    left -= 1
+            waiting[start:end] = array(
+                'l', (count - board for count, board in zip(row, taken)))
+            total = free
+        else:
+            taken = row
+            waiting[start:end] = array('l', [0])*len(row)
+        onboard = self._onboard[index]
+        if onboard is None:
+            onboard = array('l', [0])*stops
+            self._onboard[index] = onboard
+        for destination, count in enumerate(taken, position + 1):
+            onboard[destination] += count
+        self._load[index] += total
+        self._peak_load[index] = max(self._peak_load[index], self._load[index])
+        self._waiting_total -= total
+        self._boarded += total
+        return total
+
+    def serve(self, index):
+        """
+        Lets passengers alight from and board the tram at the tram stop
+        it stands at
+        """
+        position = self._fleet.get_segment(index)
+        self.alight(index, position)
+        self.board(index, position)
+
+
+class PassengerSimulator(Simulator):
+    """
+    Class PassengerSimulator. Simulator moving passengers by trams,
+    passengers board at departures from the first tram stop and alight
+    and board at arrivals at tram stops. Contains attributes:
+    :param demand: rates of passengers appearing at tram stops
+    :type demand: Demand
+
+    :param passengers: waiting passengers and loads of trams
+    :type passengers: Passengers
+
+    :param random: draws passengers, seeded for repeatable runs
+    :type random: random.Random
+    """
+    def __init__(
+            self, network, demand, clock=None, log=None, capacity=CAPACITY,
+            seed=None):
+        super().__init__(network, clock, log)
+        self._demand = demand
+        self._passengers = Passengers(self._fleet, capacity)
+        self._random = random.Random(seed)
+
+    def get_demand(self):
+        return self._demand
+
+    def get_passengers(self):
+        return self._passengers
+
+    def step(self):
+        """
+        Simulates one minute of the tram network with passengers
+        """
+        passengers = self._passengers
+        for flow in self._demand.generate(self._minute, self._random):
+            passengers.add(*flow)
+        for tram in self.set_tram():
+            passengers.serve(tram.get_index())
+        for index in self.move_tram_in_tram_line():
+            passengers.serve(index)
+        passengers.wait()
+        self._clock.increase_time()
+        self._minute += 1
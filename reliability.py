@@ -0,0 +1,267 @@
+import argparse
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from delays import read_delays
+from schedule import get_departures, is_trip_reversed
+from setup import network_setup
+
+"""
+Monte Carlo reliability of the timetable. Each replication runs the service
+day with random delays on segments and at tram stops (see delays.py),
+a tram late at the end of its trip starts the next trip late as well.
+Actual arrival times of each scheduled arrival of a line at a tram stop
+are collected into histograms of delays (BINS_PER_MINUTE bins per minute
+after the scheduled arrival), so results of replications run in parallel
+processes are merged by adding them and percentiles of arrival times are
+read from them.
+All replications are simulated together, each of them draws its delays
+from its own random generator, seeded with a seed drawn from the seed
+given by the user. Results depend only on it and on the number of
+replications, not on how replications are split between processes.
+Run: python3 reliability.py --delays tram_delays.txt [--replications N]
+                            [--stops ID ...]
+"""
+
+BINS_PER_MINUTE = 10
+MAX_DELAY = 180
+PERCENTILES = (50, 90, 95)
+CHUNK_REPLICATIONS = 100
+
+_network = None
+_model = None
+
+
+def get_replication_seeds(seed, replications):
+    """
+    Returns seeds of generators of replications drawn from the seed
+    given by the user
+    """
+    generator = random.Random(seed)
+    return [generator.getrandbits(64) for replication in range(replications)]
+
+
+def get_route(tram_line, reversed, model):
+    """
+    Returns (tram stop, travel time, distribution of delays, distribution
+    of dwell times) of each segment of the direction of the line, travel
+    times in BINS_PER_MINUTE parts of a minute
+    """
+    itinerary = tram_line.get_itinerary()
+    if reversed:
+        itinerary = itinerary[::-1]
+    table = tram_line.get_segment_table(reversed)
+    route = []
+    for segment in range(len(table)):
+        tram_stop = itinerary[segment + 1]
+        travel_time = table.minutes[segment]*BINS_PER_MINUTE
+        delay = model.get_segment_delay(itinerary[segment], tram_stop)
+        dwell = model.get_dwell(itinerary[segment])
+        if segment == 0:
+            dwell = None
+        route.append((tram_stop, travel_time, delay, dwell))
+    return route
+
+
+def add_count(histogram, delay, count):
+    """
+    Adds arrivals with the delay in BINS_PER_MINUTE parts of a minute
+    to the histogram, which grows up to the delay
+    """
+    delay = min(delay, MAX_DELAY*BINS_PER_MINUTE)
+    if delay >= len(histogram):
+        histogram.extend([0]*(delay + 1 - len(histogram)))
+    histogram[delay] += count
+
+
+def simulate_tram(tram, model, generators, arrivals):
+    """
+    Simulates all trips of the tram of the service day in replications
+    of given generators, adds arrivals to histograms of delays by (ID of
+    tram stop, line, scheduled minute). Times are counted
+    in BINS_PER_MINUTE parts of a minute, so arrivals of all replications
+    are counted at once.
+    """
+    tram_line = tram.get_line()
+    if len(tram_line.get_itinerary()) < 2:
+        return
+    routes = {
+        reversed: get_route(tram_line, reversed, model)
+        for reversed in (False, True)
+    }
+    line = tram_line.get_number()
+    ready = [0]*len(generators)
+    for trip, departure in enumerate(get_departures(tram)):
+        scheduled = departure*BINS_PER_MINUTE
+        times = [max(scheduled, arrival) for arrival in ready]
+        for tram_stop, travel_time, delay, dwell in routes[
+                is_trip_reversed(tram, trip)]:
+            if dwell is not None:
+                times = [
+                    time + int(value*BINS_PER_MINUTE + 0.5)
+                    for time, value in zip(
+                        times, dwell.sample_all(generators))
+                ]
+            scheduled += travel_time
+            if delay is None:
+                times = [arrival + travel_time for arrival in times]
+            else:
+                times = [
+                    time + travel_time + int(value*BINS_PER_MINUTE + 0.5)
+                    for time, value in zip(
+                        times, delay.sample_all(generators))
+                ]
+            key = (tram_stop.get_id(), line, scheduled // BINS_PER_MINUTE)
+            histogram = arrivals.get(key)
+            if histogram is None:
+                histogram = array('l')
+                arrivals[key] = histogram
+            for arrival, count in Counter(times).items():
+                add_count(histogram, arrival - scheduled, count)
+        ready = times
+
+
+def run_replications(network, model, seeds):
+    """
+    Runs one replication of the service day for each seed, its generator
+    draws delays of all trams in order.
+    Returns histograms of delays of arrivals by (ID of tram stop, line,
+    scheduled minute)
+    """
+    arrivals = {}
+    generators = [random.Random(seed) for seed in seeds]
+    for tram_line in network.get_list_lines():
+        for tram_tuple in tram_line.get_list_tram():
+            simulate_tram(tram_tuple[0], model, generators, arrivals)
+    return arrivals
+
+
+def merge_histograms(results):
+    merged = {}
+    for histograms in results:
+        for key, histogram in histograms.items():
+            if key not in merged:
+                merged[key] = array('l', histogram)
+                continue
+            merged_histogram = merged[key]
+            if len(histogram) > len(merged_histogram):
+                merged_histogram.extend(
+                    [0]*(len(histogram) - len(merged_histogram)))
+            for delay, count in enumerate(histogram):
+                merged_histogram[delay] += count
+    return merged
+
+
+def get_percentile(histogram, percentile):
+    """
+    Returns the delay in minutes which given percent of arrivals
+    do not exceed
+    """
+    needed = sum(histogram)*percentile / 100
+    count = 0
+    for index, bin_count in enumerate(histogram):
+        count += bin_count
+        if count >= needed and count > 0:
+            return index / BINS_PER_MINUTE
+    return 0.0
+
+
+def format_time(minutes):
+    """
+    Returns minutes of the day as hours:minutes with tenths of a minute
+    """
+    hours, minutes = divmod(minutes, 60)
+    return f'{int(hours):02}:{minutes:04.1f}'
+
+
+def init_worker(args, delays_path):
+    """
+    Loads the network and the delay model once in each worker process
+    """
+    global _network, _model
+    _network = network_setup(args)
+    with open(delays_path, 'r') as file_handle:
+        _model = read_delays(file_handle, _network)
+
+
+def run_in_worker(seeds):
+    return run_replications(_network, _model, seeds)
+
+
+def monte_carlo(args, delays_path, replications, seed=0, workers=None):
+    """
+    Runs replications in a pool of worker processes, CHUNK_REPLICATIONS
+    in each task, seeds of replications are drawn from given seed.
+    Each worker loads the network from configuration given by args
+    (like network_setup) and delays from the file.
+    Returns merged histograms of delays of arrivals by (ID of tram stop,
+    line, scheduled minute).
+    """
+    seeds = get_replication_seeds(seed, replications)
+    chunks = [
+        seeds[first:first + CHUNK_REPLICATIONS]
+        for first in range(0, replications, CHUNK_REPLICATIONS)
+    ]
+    with ProcessPoolExecutor(
+            workers, initializer=init_worker,
+            initargs=(args, delays_path)) as executor:
+        return merge_histograms(executor.map(run_in_worker, chunks))
+
+
+def format_report(
+        network, arrivals, percentiles=PERCENTILES, stop_ids=None):
+    """
+    Returns percentiles of arrival times of each scheduled arrival
+    of lines at tram stops (all or with given IDs) as a table
+    """
+    header = [
+        'stop_id', 'name', 'line', 'scheduled',
+        *(f'p{value}' for value in percentiles)]
+    lines = [header]
+    keys = {}
+    for stop_id, line, scheduled in arrivals:
+        keys.setdefault(stop_id, []).append((line, scheduled))
+    for tram_stop in network.get_list_tram_stops():
+        stop_id = tram_stop.get_id()
+        if stop_ids is not None and stop_id not in stop_ids:
+            continue
+        for line, scheduled in sorted(
+                keys.get(stop_id, []), key=lambda key: (key[1], key[0])):
+            histogram = arrivals[(stop_id, line, scheduled)]
+            lines.append([
+                str(stop_id), tram_stop.get_name(), str(line),
+                format_time(scheduled),
+                *(format_time(scheduled + get_percentile(histogram, value))
+                  for value in percentiles)])
+    widths = [max(len(line[index]) for line in lines)
+              for index in range(len(header))]
+    return '\n'.join(
+        '  '.join(value.ljust(width) if index == 1 else value.rjust(width)
+                  for index, (value, width) in enumerate(zip(line, widths)))
+        for line in lines)
+
+
+def main(args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--delays', default='tram_delays.txt')
+    parser.add_argument('--replications', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--stops', nargs='+')
+    arguments, network_args = parser.parse_known_args(args[1::])
+    network_args = [args[0], *network_args]
+    start = time.perf_counter()
+    histograms = monte_carlo(
+        network_args, arguments.delays, arguments.replications,
+        arguments.seed, arguments.workers)
+    seconds = time.perf_counter() - start
+    print(format_report(
+        network_setup(network_args), histograms, stop_ids=arguments.stops))
+    print(f'{arguments.replications} replications in {seconds:.1f} s')
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,268 @@
+import time
+from array import array
+from spatial import GridIndex, CELL_SIZE
+
+"""
+Render layer of the simulation, independent of Qt. It decides which items
+of the scene have to change after each step of the simulator, the renderer
+given to it (e.g. the Qt scene of the GUI) only creates and modifies items.
+Renderers implement:
+    create_marker()                     returns new hidden tram marker
+    show_marker(marker, tram)           shows marker labelled for the tram
+    hide_marker(marker)                 hides marker
+    move_marker(marker, x, y)           moves marker
+Only markers in the visible rectangle of the map (the viewport) are kept
+visible, the network itself is painted from tiles (see tiles.py).
+Positions of trams between minutes of the engine are interpolated: the
+fraction f of the last simulated minute shows trams f of the way along
+their step vectors, so the view is one minute behind the engine.
+"""
+
+NO_POSITION = float('nan')
+FRAME_RATE = 60
+MIN_SPEED = 1
+MAX_SPEED = 1000
+FRAME_BUDGET = 0.5 / FRAME_RATE
+MAX_LAG = 1.0
+MARGIN = 50
+
+
+class MarkerPool():
+    """
+    Class MarkerPool. Reuses hidden tram markers instead of creating
+    new items of the scene. Contains attributes:
+    :param renderer: creates and hides markers
+    :type renderer: object
+
+    :param free: hidden markers ready to be reused
+    :type free: list
+
+    :param size: number of markers created so far
+    :type size: int
+    """
+    def __init__(self, renderer):
+        self._renderer = renderer
+        self._free = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def acquire(self):
+        """
+        Returns hidden marker, creates it only if no marker is free
+        """
+        if self._free:
+            return self._free.pop()
+        self._size += 1
+        return self._renderer.create_marker()
+
+    def release(self, marker):
+        self._renderer.hide_marker(marker)
+        self._free.append(marker)
+
+
+class TramLayer():
+    """
+    Class TramLayer. Keeps markers of moving trams in sync with the fleet,
+    only markers of trams whose state changed are touched.
+    Contains attributes:
+    :param renderer: modifies items of the scene
+    :type renderer: object
+
+    :param pool: markers of the scene
+    :type pool: MarkerPool
+
+    :param markers: marker of each tram of the fleet (None if hidden)
+    :type markers: list
+
+    :param x, y: last rendered position of each tram
+    :type x, y: array of float
+
+    :param index: spatial index of shown markers by indexes of trams
+    :type index: GridIndex
+    """
+    def __init__(self, renderer, cell_size=CELL_SIZE):
+        self._renderer = renderer
+        self._pool = MarkerPool(renderer)
+        self._markers = []
+        self._x = array('d')
+        self._y = array('d')
+        self._index = GridIndex(cell_size)
+        self._trams = []
+
+    def get_pool(self):
+        return self._pool
+
+    def get_marker(self, index):
+        return self._markers[index]
+
+    def update(self, fleet, fraction=1.0, viewport=None):
+        """
+        Shows markers of trams which have departed, trams stopped at
+        the end of their line stay visible there, and moves markers of
+        trams which changed position. Activated trams are shown at given
+        fraction of their move in the last simulated minute (every
+        activated tram has moved in it). If the viewport
+        (left, top, right, bottom) is given, trams outside it are hidden.
+        Returns the number of touched markers.
+        """
+        renderer = self._renderer
+        markers = self._markers
+        x = self._x
+        y = self._y
+        index_of_markers = self._index
+        if viewport is None:
+            left = top = float('-inf')
+            right = bottom = float('inf')
+        else:
+            left, top, right, bottom = viewport
+            left -= MARGIN
+            top -= MARGIN
+            right += MARGIN
+            bottom += MARGIN
+        while len(markers) < len(fleet):
+            markers.append(None)
+            x.append(NO_POSITION)
+            y.append(NO_POSITION)
+        trams = fleet.get_trams()
+        self._trams = trams
+        touched = 0
+        for index in range(len(fleet)):
+            marker = markers[index]
+            activated = fleet.get_activated(index)
+            shown = activated or trams[index].get_placed()
+            if shown:
+                new_x = fleet.get_x(index)
+                new_y = fleet.get_y(index)
+                if activated and fraction != 1.0:
+                    new_x -= (1.0 - fraction)*fleet.get_move_x(index)
+                    new_y -= (1.0 - fraction)*fleet.get_move_y(index)
+                shown = left <= new_x <= right and top <= new_y <= bottom
+            if not shown:
+                if marker is not None:
+                    self._pool.release(marker)
+                    markers[index] = None
+                    index_of_markers.remove(index)
+                    touched += 1
+                continue
+            if marker is None:
+                marker = self._pool.acquire()
+                markers[index] = marker
+                renderer.show_marker(marker, trams[index])
+            elif new_x == x[index] and new_y == y[index]:
+                continue
+            renderer.move_marker(marker, new_x, new_y)
+            index_of_markers.move(index, new_x, new_y)
+            x[index] = new_x
+            y[index] = new_y
+            touched += 1
+        return touched
+
+    def tram_at(self, x, y, radius):
+        """
+        Returns the shown tram closest to (x, y) within the radius
+        or None if there is no such tram
+        """
+        index = self._index.nearest(x, y, radius)
+        if index is None:
+            return None
+        return self._trams[index]
+
+
+class AnimationClock():
+    """
+    Class AnimationClock. Converts real time between frames into steps
+    of the engine, independently of the frame rate. Steps of one frame
+    are limited by real time: when the budget of the frame passes, the
+    remaining steps are made in next frames. If the engine cannot keep up,
+    the simulated time over max_lag seconds behind is dropped.
+    Contains attributes:
+    :param speed: simulated minutes per real second
+    :type speed: float
+
+    :param fraction: simulated time since the last step (0-1 minute)
+    :type fraction: float
+
+    :param pending: steps of the engine owed to the elapsed real time
+    :type pending: int
+
+    :param budget: most real seconds of one frame spent on steps
+    :type budget: float
+
+    :param max_lag: most real seconds the engine can be behind
+    :type max_lag: float
+
+    :param timer: returns the real time in seconds
+    :type timer: function
+
+    :param dropped: simulated minutes dropped so far
+    :type dropped: int
+    """
+    def __init__(
+            self, speed=MIN_SPEED, budget=FRAME_BUDGET, max_lag=MAX_LAG,
+            timer=time.perf_counter):
+        self._speed = MIN_SPEED
+        self.set_speed(speed)
+        self._fraction = 0.0
+        self._pending = 0
+        self._budget = budget
+        self._max_lag = max_lag
+        self._timer = timer
+        self._dropped = 0
+
+    def get_speed(self):
+        return self._speed
+
+    def set_speed(self, speed):
+        """
+        Sets the speed, limited to MIN_SPEED-MAX_SPEED
+        """
+        self._speed = min(max(speed, MIN_SPEED), MAX_SPEED)
+
+    def get_fraction(self):
+        return self._fraction
+
+    def get_pending(self):
+        return self._pending
+
+    def get_dropped(self):
+        return self._dropped
+
+    def advance(self, seconds):
+        """
+        Adds real time elapsed since the last frame.
+        Returns the number of steps the engine is behind.
+        """
+        minutes = self._fraction + seconds*self._speed
+        steps = int(minutes)
+        self._fraction = minutes - steps
+        self._pending += steps
+        max_pending = max(int(self._speed*self._max_lag), 1)
+        if self._pending > max_pending:
+            self._dropped += self._pending - max_pending
+            self._pending = max_pending
+        return self._pending
+
+    def run(self, step):
+        """
+        Calls step for pending steps of the engine until the budget
+        of the frame passes, at least once if any step is pending.
+        Returns the number of made steps and the fraction of the last
+        minute to be shown (whole minute if steps remain).
+        """
+        deadline = self._timer() + self._budget
+        steps = 0
+        while self._pending:
+            step()
+            steps += 1
+            self._pending -= 1
+            if self._timer() >= deadline:
+                break
+        if self._pending:
+            return (steps, 1.0)
+        return (steps, self._fraction)
+
+
+def format_time(hours, minutes):
+    return f'{hours}:{minutes:02}'
@@ -0,0 +1,300 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from heapq import heappush, heappop
+
+"""
+All-pairs shortest travel times between tram stops of the network.
+Times are computed with Dijkstra's algorithm from every tram stop and kept
+in a matrix of 32-bit integers (UNREACHABLE if there is no route).
+The index can be saved to a file and memory-mapped on the next start.
+The matrix grows with the square of the number of tram stops (4 GB for
+32768 stops), networks with more than MAX_DENSE_STOPS tram stops compute
+rows of the matrix on demand and keep at most CACHED_ROWS of them.
+Such sparse indexes are saved with rows computed so far, which are mapped
+on the next start, other rows are computed again. The file holds:
+
+    header          magic, version, number of tram stops, fingerprint
+                    of the network and number of saved rows
+    numbers         numbers of source tram stops of saved rows
+    times           saved rows of the matrix
+"""
+
+MAGIC = b'TRAMDIST'
+VERSION = 2
+HEADER = struct.Struct('<8sHI20sI')
+UNREACHABLE = -1
+MAX_DENSE_STOPS = 4096
+CACHED_ROWS = 256
+
+
+class InvalidTravelTimeIndexError(Exception):
+    def __init__(self):
+        super().__init__('File is not a travel time index of the network')
+
+
+def get_fingerprint(network):
+    """
+    Returns the digest of tram stops and connections of the network
+    """
+    digest = hashlib.sha1()
+    for tram_stop in network.get_list_tram_stops():
+        digest.update(f'{tram_stop.get_id()}\0'.encode('utf-8'))
+        for connected_stop, distance in tram_stop.get_connected_stops():
+            digest.update(
+                f'{connected_stop.get_id()},{distance};'.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.digest()
+
+
+def get_adjacency(network):
+    """
+    Returns (number of tram stop, distance) of connected stops
+    of each tram stop of the network
+    """
+    list_tram_stops = network.get_list_tram_stops()
+    indexes = {
+        tram_stop: index for index, tram_stop in enumerate(list_tram_stops)
+    }
+    return [
+        [
+            (indexes[connected_stop], distance)
+            for connected_stop, distance in tram_stop.get_connected_stops()
+        ]
+        for tram_stop in list_tram_stops
+    ]
+
+
+def shortest_travel_times(adjacency, source):
+    """
+    Returns travel times from the source to all tram stops (Dijkstra)
+    """
+    times = array('i', [UNREACHABLE])*len(adjacency)
+    times[source] = 0
+    queue = [(0, source)]
+    while queue:
+        time, index = heappop(queue)
+        if time > times[index]:
+            continue
+        for connected, distance in adjacency[index]:
+            new_time = time + distance
+            if times[connected] == UNREACHABLE or new_time < times[connected]:
+                times[connected] = new_time
+                heappush(queue, (new_time, connected))
+    return times
+
+
+class TravelTimeIndex():
+    """
+    Class TravelTimeIndex. Shortest travel times between all tram stops.
+    Contains attributes:
+    :param network: tram network the index was built for
+    :type network: TramNetwork
+
+    :param indexes: number of each tram stop in the matrix
+    :type indexes: dict
+
+    :param times: matrix of travel times, row by row, or saved rows
+                  of the matrix if rows are computed on demand
+    :type times: array or memoryview of int
+
+    :param adjacency: connections of tram stops used to compute rows
+                      on demand, None if the matrix is complete
+    :type adjacency: list
+
+    :param saved: positions of saved rows in times by number of
+                  the source tram stop
+    :type saved: dict
+
+    :param rows: recently computed rows by number of the source tram stop
+    :type rows: OrderedDict
+    """
+    def __init__(
+            self, network, times, mapped=None, adjacency=None, saved=None):
+        self._network = network
+        self._indexes = {
+            tram_stop: index
+            for index, tram_stop in enumerate(network.get_list_tram_stops())
+        }
+        self._times = times
+        self._mapped = mapped
+        self._adjacency = adjacency
+        self._saved = {} if saved is None else saved
+        self._rows = OrderedDict()
+
+    @classmethod
+    def build(cls, network, max_stops=MAX_DENSE_STOPS):
+        """
+        Computes travel times from every tram stop of the network.
+        If the network has more than max_stops tram stops, travel times
+        are computed on demand instead.
+        """
+        adjacency = get_adjacency(network)
+        if len(adjacency) > max_stops:
+            return cls(network, array('i'), adjacency=adjacency)
+        times = array('i')
+        for source in range(len(adjacency)):
+            times.extend(shortest_travel_times(adjacency, source))
+        return cls(network, times)
+
+    @classmethod
+    def load(cls, network, path):
+        """
+        Maps the index saved in the file, it has to match the network
+        """
+        with open(path, 'rb') as file_handle:
+            try:
+                mapped = mmap.mmap(
+                    file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise InvalidTravelTimeIndexError
+        size = len(network.get_list_tram_stops())
+        if len(mapped) < HEADER.size:
+            mapped.close()
+            raise InvalidTravelTimeIndexError
+        magic, version, stops, fingerprint, rows = (
+            HEADER.unpack_from(mapped))
+        valid_header = (
+            (magic, version, stops) == (MAGIC, VERSION, size) and
+            rows <= size and
+            len(mapped) == HEADER.size + 4*rows + 4*rows*size)
+        if not valid_header or fingerprint != get_fingerprint(network):
+            mapped.close()
+            raise InvalidTravelTimeIndexError
+        offset = HEADER.size + 4*rows
+        numbers = array('I', mapped[HEADER.size:offset])
+        view = memoryview(mapped)[offset:]
+        if sys.byteorder == 'big':
+            numbers.byteswap()
+            times = array('i', view.tobytes())
+            times.byteswap()
+            view.release()
+            mapped.close()
+            mapped = None
+        else:
+            times = view.cast('i')
+        if list(numbers) == list(range(size)):
+            return cls(network, times, mapped)
+        saved = {number: position for position, number in enumerate(numbers)}
+        if len(saved) != rows or any(number >= size for number in saved):
+            if mapped is not None:
+                times.release()
+                mapped.close()
+            raise InvalidTravelTimeIndexError
+        return cls(
+            network, times, mapped, adjacency=get_adjacency(network),
+            saved=saved)
+
+    @classmethod
+    def load_or_build(cls, network, path, max_stops=MAX_DENSE_STOPS):
+        """
+        Loads the index from the file, if it is missing or outdated
+        builds it again and saves it. Indexes of networks with more than
+        max_stops tram stops are saved without rows, save them again
+        to keep rows computed later.
+        """
+        if os.path.exists(path):
+            try:
+                return cls.load(network, path)
+            except InvalidTravelTimeIndexError:
+                pass
+        index = cls.build(network, max_stops)
+        index.save(path)
+        return index
+
+    def save(self, path):
+        """
+        Saves the matrix or, if rows are computed on demand, rows saved
+        before and rows in the cache. The file is replaced at once,
+        so the index can be saved into the file it was loaded from.
+        """
+        size = len(self._indexes)
+        if self.is_dense():
+            numbers = array('I', range(size))
+            times = array('i', self._times)
+        else:
+            numbers = array('I', sorted({*self._saved, *self._rows}))
+            times = array('i')
+            for number in numbers:
+                times.extend(self.get_row(number))
+        if sys.byteorder == 'big':
+            numbers.byteswap()
+            times.byteswap()
+        temporary_path = os.fspath(path) + '.tmp'
+        with open(temporary_path, 'wb') as file_handle:
+            file_handle.write(HEADER.pack(
+                MAGIC, VERSION, size, get_fingerprint(self._network),
+                len(numbers)))
+            file_handle.write(numbers.tobytes())
+            file_handle.write(times.tobytes())
+        os.replace(temporary_path, path)
+
+    def close(self):
+        """
+        Releases the mapped file of a loaded index
+        """
+        if self._mapped is not None:
+            self._times.release()
+            self._times = array('i')
+            self._saved = {}
+            self._mapped.close()
+            self._mapped = None
+
+    def get_network(self):
+        return self._network
+
+    def is_dense(self):
+        """
+        Returns True if travel times between all tram stops are kept
+        """
+        return self._adjacency is None
+
+    def get_saved_rows(self):
+        """
+        Returns numbers of source tram stops of rows loaded from the file
+        """
+        return sorted(self._saved)
+
+    def get_row(self, source):
+        """
+        Returns travel times from the tram stop with given number, saved
+        or computed on demand, least recently used computed rows are
+        dropped from the cache
+        """
+        size = len(self._indexes)
+        if self.is_dense():
+            return self._times[source*size:(source + 1)*size]
+        position = self._saved.get(source)
+        if position is not None:
+            return self._times[position*size:(position + 1)*size]
+        row = self._rows.get(source)
+        if row is None:
+            row = shortest_travel_times(self._adjacency, source)
+            self._rows[source] = row
+            if len(self._rows) > CACHED_ROWS:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(source)
+        return row
+
+    def get_travel_time(self, tram_stopA, tram_stopB):
+        """
+        Returns the shortest travel time between tram stops
+        or None if tram stop B cannot be reached from tram stop A
+        """
+        source = self._indexes[tram_stopA]
+        target = self._indexes[tram_stopB]
+        size = len(self._indexes)
+        if self.is_dense():
+            time = self._times[source*size + target]
+        elif source in self._saved:
+            time = self._times[self._saved[source]*size + target]
+        else:
+            time = self.get_row(source)[target]
+        if time == UNREACHABLE:
+            return None
+        return time
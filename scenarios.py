@@ -0,0 +1,157 @@
+import argparse
+import itertools
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from database import TramNetwork, TramLine, Tram
+from schedule import END_OF_DAY
+from setup import network_setup
+from simulator import Clock, EventSimulator, ARRIVAL, DEPARTURE
+
+"""
+Runs the headless simulation for many scenarios in parallel processes.
+A scenario overrides parameters of all tram lines of the base network:
+interval, start (hours, minutes) and the number of trams. None keeps the
+value from the configuration files.
+Run: python3 scenarios.py --interval 10 15 --trams 3 5 [--workers N]
+"""
+
+PARAMETERS = ('interval', 'start', 'trams')
+COLUMNS = (*PARAMETERS, 'departures', 'arrivals', 'seconds')
+
+_base_network = None
+
+
+class InvalidTramsNumberError(Exception):
+    def __init__(self):
+        super().__init__('Number of trams cannot be negative')
+
+
+def scenario_grid(interval=(None,), start=(None,), trams=(None,)):
+    """
+    Returns scenarios for all combinations of given parameter values
+    """
+    return [
+        dict(zip(PARAMETERS, values))
+        for values in itertools.product(interval, start, trams)
+    ]
+
+
+def build_scenario(base_network, scenario):
+    """
+    Returns the network with lines and trams set up for the scenario.
+    Tram stops and connections are shared with the base network.
+    Explicit values are checked like values of configuration files,
+    so an interval of 0 raises InvalidIntervalError.
+    """
+    network = TramNetwork(base_network.get_list_tram_stops())
+    for base_line in base_network.get_list_lines():
+        interval = scenario.get('interval')
+        if interval is None:
+            interval = base_line.get_interval()
+        if scenario.get('start') is None:
+            hours = base_line.get_hours_start()
+            minutes = base_line.get_minutes_start()
+        else:
+            hours, minutes = scenario['start']
+        trams = scenario.get('trams')
+        if trams is None:
+            trams = len(base_line.get_list_tram())
+        elif trams < 0:
+            raise InvalidTramsNumberError
+        tram_line = TramLine(
+            base_line.get_number(), base_line.get_itinerary(),
+            hours, minutes, interval)
+        for tram_number_line in range(1, trams + 1):
+            Tram(tram_line, tram_number_line)
+        network.add_line(tram_line)
+    return network
+
+
+def run_scenario(base_network, scenario, until=END_OF_DAY):
+    """
+    Simulates the scenario from 5:00 until given minute,
+    returns the row of the result table
+    """
+    start = time.perf_counter()
+    network = build_scenario(base_network, scenario)
+    log = []
+    EventSimulator(network, Clock(5, 0), log).run_until(until)
+    row = {parameter: scenario.get(parameter) for parameter in PARAMETERS}
+    row['departures'] = sum(1 for entry in log if entry[1] == DEPARTURE)
+    row['arrivals'] = sum(1 for entry in log if entry[1] == ARRIVAL)
+    row['seconds'] = time.perf_counter() - start
+    return row
+
+
+def init_worker(args):
+    """
+    Loads the base network once in each worker process
+    """
+    global _base_network
+    _base_network = network_setup(args)
+
+
+def run_in_worker(scenario, until):
+    return run_scenario(_base_network, scenario, until)
+
+
+def run_scenarios(args, scenarios, until=END_OF_DAY, workers=None):
+    """
+    Runs scenarios in a pool of worker processes. Each worker loads
+    the base network from configuration given by args (like network_setup)
+    Returns rows of the result table in the order of scenarios.
+    """
+    with ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(args,)) as executor:
+        return list(executor.map(
+            run_in_worker, scenarios, itertools.repeat(until)))
+
+
+def format_value(value):
+    if value is None:
+        return '-'
+    if isinstance(value, tuple):
+        return f'{value[0]}:{value[1]:02}'
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return str(value)
+
+
+def format_table(rows):
+    """
+    Returns the result table as text with aligned columns
+    """
+    lines = [[column for column in COLUMNS]]
+    for row in rows:
+        lines.append([format_value(row[column]) for column in COLUMNS])
+    widths = [max(len(line[index]) for line in lines)
+              for index in range(len(COLUMNS))]
+    return '\n'.join(
+        '  '.join(value.rjust(width) for value, width in zip(line, widths))
+        for line in lines)
+
+
+def parse_start(text):
+    hours, minutes = text.split(':')
+    return (int(hours), int(minutes))
+
+
+def main(args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interval', nargs='+', type=int, default=[None])
+    parser.add_argument('--start', nargs='+', type=parse_start, default=[None])
+    parser.add_argument('--trams', nargs='+', type=int, default=[None])
+    parser.add_argument('--until', type=int, default=END_OF_DAY)
+    parser.add_argument('--workers', type=int)
+    arguments, network_args = parser.parse_known_args(args[1::])
+    scenarios = scenario_grid(
+        arguments.interval, arguments.start, arguments.trams)
+    rows = run_scenarios(
+        [args[0], *network_args], scenarios,
+        arguments.until, arguments.workers)
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,108 @@
+from bisect import bisect_right
+
+"""
+Closed-form schedule of trams. Positions are computed from the timetable
+of the line and its segment tables, without simulating earlier minutes.
+Times are minutes since midnight of the first day, like Simulator minutes.
+The schedule describes the service day of the simulator: it holds until
+4:00 of the next day, when start times of trams are restarted.
+"""
+
+END_OF_DAY = 24*60
+START_OF_DAY = 4*60
+
+
+def get_first_departure(tram):
+    """
+    Returns the time of the first departure of the tram
+    """
+    tram_line = tram.get_line()
+    start = tram_line.get_hours_start()*60 + tram_line.get_minutes_start()
+    return start + (tram.get_line_number()-1)*tram_line.get_interval()
+
+
+def get_trip_minutes(tram_line):
+    """
+    Returns the travel time from the first to the last tram stop of line
+    """
+    return tram_line.get_segment_table().get_total_minutes()
+
+
+def get_trip_period(tram_line):
+    """
+    Returns minutes between subsequent trips of a single tram.
+    Departures of the tram, which is still on its route, are skipped.
+    """
+    period = len(tram_line.get_list_tram())*tram_line.get_interval()
+    trips = -(-(get_trip_minutes(tram_line)+1) // period)
+    return period*trips
+
+
+def get_departures(tram):
+    """
+    Returns times of all trips of the tram started during the service day
+    """
+    first = get_first_departure(tram)
+    period = get_trip_period(tram.get_line())
+    return range(first, END_OF_DAY, period)
+
+
+def get_trip(tram, minute):
+    """
+    Returns the number of the trip of the tram at given minute
+    and the time of its departure or None if the tram has not departed yet
+    """
+    departures = get_departures(tram)
+    if len(departures) == 0 or minute <= departures[0]:
+        return None
+    trip = min((minute-1-departures[0]) // departures.step, len(departures)-1)
+    return (trip, departures[trip])
+
+
+def is_trip_reversed(tram, trip):
+    """
+    Checks if the tram runs from the last to the first tram stop in the trip
+    """
+    return (tram.get_line_number() % 2 == 0) != (trip % 2 == 1)
+
+
+def position_in_trip(table, elapsed):
+    """
+    Returns the position of a tram after given minutes of the trip
+    """
+    if elapsed >= table.get_total_minutes():
+        return (table.end_x[-1], table.end_y[-1])
+    segment = bisect_right(table.offset, elapsed) - 1
+    within = elapsed - table.offset[segment]
+    x = table.start_x[segment] + table.move_x[segment]*within
+    y = table.start_y[segment] + table.move_y[segment]*within
+    return (x, y)
+
+
+def position_at(tram, minute):
+    """
+    Returns the position of the tram at given minute
+    or None if the tram has not departed yet
+    """
+    trip_tuple = get_trip(tram, minute)
+    if trip_tuple is None:
+        return None
+    trip, departure = trip_tuple
+    tram_line = tram.get_line()
+    table = tram_line.get_segment_table(is_trip_reversed(tram, trip))
+    if len(table) == 0:
+        return None
+    return position_in_trip(table, minute - departure)
+
+
+def snapshot(network, minute):
+    """
+    Returns positions of all departed trams of the network at given minute
+    """
+    positions = {}
+    for tram_line in network.get_list_lines():
+        for tram_tuple in tram_line.get_list_tram():
+            position = position_at(tram_tuple[0], minute)
+            if position is not None:
+                positions[tram_tuple[0]] = position
+    return positions
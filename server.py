@@ -0,0 +1,339 @@
+import argparse
+import asyncio
+import math
+import struct
+import sys
+import time
+from setup import network_setup
+from simulator import Clock, Simulator
+
+"""
+Simulation server streaming positions of trams over TCP, without the GUI.
+The server advances the headless simulator at a fixed rate and sends each
+subscriber only trams which changed since the previous tick. Messages
+start with HEADER (type, minute, number of records, size of the body):
+    LINES       names of tram lines, records are LINE_NAME followed
+                by UTF-8 names, their index is the line ID
+    SNAPSHOT    all shown trams, sent once after connecting
+    DELTA       trams which moved, started or stopped in the tick
+Records of SNAPSHOT and DELTA are POSITION (tram index, line ID, x, y),
+x and y are NaN for trams which stopped.
+Run: python3 server.py [--port 8765] [--interval 1.0]
+Load test: python3 server.py --load-test 300 [--ticks 100]
+"""
+
+LINES = 0
+SNAPSHOT = 1
+DELTA = 2
+HEADER = struct.Struct('<BIII')
+POSITION = struct.Struct('<IHff')
+LINE_NAME = struct.Struct('<H')
+MAX_BUFFER = 2**20
+READ_SIZE = 4096
+BACKLOG = 1024
+CONNECT_TIMEOUT = 30.0
+STOPPED = float('nan')
+
+
+def encode_message(type, minute, records, body):
+    return HEADER.pack(type, minute, records, len(body)) + body
+
+
+def encode_positions(type, minute, positions):
+    """
+    Returns the message with (tram index, line ID, x, y) records
+    """
+    body = b''.join(POSITION.pack(*position) for position in positions)
+    return encode_message(type, minute, len(positions), body)
+
+
+def encode_lines(network):
+    body = bytearray()
+    tram_lines = network.get_list_lines()
+    for tram_line in tram_lines:
+        name = str(tram_line.get_number()).encode('utf-8')
+        body += LINE_NAME.pack(len(name)) + name
+    return encode_message(LINES, 0, len(tram_lines), bytes(body))
+
+
+def decode_message(type, records, body):
+    """
+    Returns the list of line names or (tram index, line ID, x, y) tuples
+    """
+    if type != LINES:
+        return list(POSITION.iter_unpack(body))
+    names = []
+    offset = 0
+    for record in range(records):
+        length, = LINE_NAME.unpack_from(body, offset)
+        offset += LINE_NAME.size
+        names.append(str(body[offset:offset + length], 'utf-8'))
+        offset += length
+    return names
+
+
+async def read_message(reader):
+    """
+    Reads the next message from the stream.
+    Returns (type, minute, records) or None when the stream has ended
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+        type, minute, records, size = HEADER.unpack(header)
+        body = await reader.readexactly(size)
+    except asyncio.IncompleteReadError:
+        return None
+    return (type, minute, decode_message(type, records, body))
+
+
+class SimulationServer():
+    """
+    Class SimulationServer. Advances the simulator and streams changes
+    of positions of trams to subscribers. Contains attributes:
+    :param simulator: headless simulation engine
+    :type simulator: Simulator
+
+    :param interval: real seconds between ticks (simulated minutes)
+    :type interval: float
+
+    :param positions: last sent (line ID, x, y) of each shown tram
+    :type positions: dict
+
+    :param subscribers: stream writers of connected subscribers
+    :type subscribers: set
+
+    :param tick_times: real seconds taken by each tick
+    :type tick_times: list
+    """
+    def __init__(self, simulator, interval=1.0):
+        self._simulator = simulator
+        self._interval = interval
+        self._line_ids = {
+            tram_line: index for index, tram_line
+            in enumerate(simulator.get_network().get_list_lines())
+        }
+        self._lines_message = encode_lines(simulator.get_network())
+        self._positions = {}
+        self._subscribers = set()
+        self._tick_times = []
+        self._server = None
+
+    def get_simulator(self):
+        return self._simulator
+
+    def get_subscribers(self):
+        return self._subscribers
+
+    def get_tick_times(self):
+        return self._tick_times
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """
+        Starts listening, returns the asyncio server
+        """
+        self._server = await asyncio.start_server(
+            self.subscribe, host, port, backlog=BACKLOG)
+        return self._server
+
+    def get_port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        for writer in list(self._subscribers):
+            writer.close()
+        self._subscribers.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def subscribe(self, reader, writer):
+        """
+        Sends line names and shown trams to the new subscriber and keeps
+        it subscribed until it disconnects. Whatever the subscriber sends
+        is read in chunks of READ_SIZE bytes and dropped
+        """
+        writer.write(self._lines_message)
+        writer.write(encode_positions(
+            SNAPSHOT, self._simulator.get_minute(),
+            [(index, *position)
+             for index, position in self._positions.items()]))
+        self._subscribers.add(writer)
+        try:
+            while await reader.read(READ_SIZE):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def get_changes(self):
+        """
+        Returns (tram index, line ID, x, y) of trams whose position or
+        activation changed since the last call
+        """
+        fleet = self._simulator.get_fleet()
+        trams = fleet.get_trams()
+        positions = self._positions
+        changes = []
+        for index in range(len(fleet)):
+            if fleet.get_activated(index):
+                position = (
+                    self._line_ids[trams[index].get_line()],
+                    fleet.get_x(index), fleet.get_y(index))
+                if positions.get(index) != position:
+                    positions[index] = position
+                    changes.append((index, *position))
+            elif index in positions:
+                line_id = positions.pop(index)[0]
+                changes.append((index, line_id, STOPPED, STOPPED))
+        return changes
+
+    def broadcast(self, message):
+        """
+        Sends the message to all subscribers, subscribers which do not
+        read their messages are disconnected
+        """
+        for writer in list(self._subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                self._subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(message)
+
+    def tick(self):
+        """
+        Simulates one minute and sends changes to subscribers
+        """
+        start = time.perf_counter()
+        self._simulator.step()
+        message = encode_positions(
+            DELTA, self._simulator.get_minute(), self.get_changes())
+        self.broadcast(message)
+        self._tick_times.append(time.perf_counter() - start)
+
+    async def run(self, ticks=None):
+        """
+        Ticks every interval seconds, a late tick does not delay
+        the following ones
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        tick = 0
+        while ticks is None or tick < ticks:
+            self.tick()
+            tick += 1
+            next_tick += self._interval
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+
+
+class Subscriber():
+    """
+    Class Subscriber. Client keeping positions of trams received from
+    the server. Contains attributes:
+    :param lines: names of tram lines by their IDs
+    :type lines: list
+
+    :param positions: (line ID, x, y) of each shown tram
+    :type positions: dict
+
+    :param minute: minute of the last received message
+    :type minute: int
+
+    :param messages: number of received messages
+    :type messages: int
+    """
+    def __init__(self):
+        self.lines = []
+        self.positions = {}
+        self.minute = None
+        self.messages = 0
+
+    def apply(self, type, minute, records):
+        self.messages += 1
+        self.minute = minute
+        if type == LINES:
+            self.lines = records
+            return
+        if type == SNAPSHOT:
+            self.positions = {}
+        for index, line_id, x, y in records:
+            if math.isnan(x):
+                self.positions.pop(index, None)
+            else:
+                self.positions[index] = (line_id, x, y)
+
+    async def listen(self, host, port):
+        """
+        Receives messages until the server closes the connection
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                self.apply(*message)
+        finally:
+            writer.close()
+
+
+async def load_test(network, subscribers=300, ticks=100, interval=0.05):
+    """
+    Runs the server with many local subscribers. Ticks start when all
+    of them are connected or after CONNECT_TIMEOUT seconds.
+    Returns the server, the subscribers and real seconds taken by the ticks.
+    """
+    server = SimulationServer(Simulator(network, Clock(5, 0)), interval)
+    await server.start(port=0)
+    clients = [Subscriber() for subscriber in range(subscribers)]
+    tasks = [
+        asyncio.ensure_future(client.listen('127.0.0.1', server.get_port()))
+        for client in clients
+    ]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CONNECT_TIMEOUT
+    while (len(server.get_subscribers()) < subscribers and
+            loop.time() < deadline):
+        await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await server.run(ticks)
+    seconds = time.perf_counter() - start
+    await asyncio.sleep(interval)
+    await server.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return (server, clients, seconds)
+
+
+def main(args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--load-test', type=int)
+    parser.add_argument('--ticks', type=int, default=100)
+    arguments, network_args = parser.parse_known_args(args[1::])
+    network = network_setup([args[0], *network_args])
+    if arguments.load_test:
+        server, clients, seconds = asyncio.run(load_test(
+            network, arguments.load_test, arguments.ticks,
+            arguments.interval))
+        tick_times = sorted(server.get_tick_times())
+        received = min(client.messages for client in clients)
+        print(f'{len(clients)} subscribers, {arguments.ticks} ticks')
+        print(f'ticks/s {arguments.ticks / seconds:.1f}')
+        print(f'tick max {tick_times[-1]*1e3:.2f} ms')
+        print(f'messages received (least) {received}')
+        return
+
+    async def serve():
+        server = SimulationServer(
+            Simulator(network, Clock(5, 0)), arguments.interval)
+        await server.start(arguments.host, arguments.port)
+        await server.run()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main(sys.argv)
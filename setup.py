@@ -5,6 +5,8 @@ from database_io import (
     read_tram_stop_connection,
     read_tram_line
 )
+from gtfs import read_gtfs, write_gtfs
+from network_snapshot import save_network, load_network
 
 
 class TramPathNotFoundError(Exception):
@@ -19,17 +21,10 @@ class TramPathCannotBeDirectory(Exception):
     pass
 
 
-def network_setup(args):
+def read_configuration(arguments):
     """
-    Paths to configuration files.
-    Opens configuration files.
-    Creates trams - five trams for each line
+    Reads the network from configuration files
     """
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--file-tramstop')
-    parser.add_argument('--file-connection')
-    parser.add_argument('--file-tramline')
-    arguments = parser.parse_args(args[1::])
     if arguments.file_tramstop:
         path_tram_stop = arguments.file_tramstop
     else:
@@ -44,9 +39,9 @@ def network_setup(args):
         path_tram_line = 'tram_line.txt'
 
     try:
+        network = TramNetwork()
         with open(path_tram_stop, 'r') as file_handle:
-            list_tram_stops = read_tram_stop(file_handle)
-        network = TramNetwork(list_tram_stops)
+            read_tram_stop(file_handle, network)
         with open(path_tram_stop_connection, 'r') as file_handle:
             read_tram_stop_connection(file_handle, network)
         with open(path_tram_line, 'r') as file_handle:
@@ -64,3 +59,65 @@ def network_setup(args):
         network.add_line(tram_line)
 
     return network
+
+
+def network_setup(args):
+    """
+    Paths to configuration files.
+    Opens configuration files.
+    Creates trams - five trams for each line.
+    The network can be loaded from a binary snapshot instead (--snapshot)
+    or compiled from configuration files into one (--compile-snapshot).
+    A GTFS feed can be imported (--gtfs) or exported (--export-gtfs)
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-tramstop')
+    parser.add_argument('--file-connection')
+    parser.add_argument('--file-tramline')
+    parser.add_argument('--snapshot')
+    parser.add_argument('--compile-snapshot')
+    parser.add_argument('--gtfs')
+    parser.add_argument('--export-gtfs')
+    arguments = parser.parse_args(args[1::])
+    if arguments.snapshot:
+        try:
+            return load_network(arguments.snapshot)
+        except FileNotFoundError:
+            raise TramPathNotFoundError
+        except PermissionError:
+            raise TramPermissionError
+        except IsADirectoryError:
+            raise TramPathCannotBeDirectory
+    if arguments.gtfs:
+        try:
+            network = read_gtfs(arguments.gtfs)
+        except FileNotFoundError:
+            raise TramPathNotFoundError
+        except PermissionError:
+            raise TramPermissionError
+        except IsADirectoryError:
+            raise TramPathCannotBeDirectory
+    else:
+        network = read_configuration(arguments)
+
+    if arguments.compile_snapshot:
+        try:
+            save_network(network, arguments.compile_snapshot)
+        except FileNotFoundError:
+            raise TramPathNotFoundError
+        except PermissionError:
+            raise TramPermissionError
+        except IsADirectoryError:
+            raise TramPathCannotBeDirectory
+
+    if arguments.export_gtfs:
+        try:
+            write_gtfs(network, arguments.export_gtfs)
+        except FileNotFoundError:
+            raise TramPathNotFoundError
+        except PermissionError:
+            raise TramPermissionError
+        except IsADirectoryError:
+            raise TramPathCannotBeDirectory
+
+    return network
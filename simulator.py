@@ -0,0 +1,339 @@
+from heapq import heappush, heappop
+from itertools import repeat
+from fleet import Fleet
+from schedule import END_OF_DAY, START_OF_DAY
+
+ARRIVAL = 0
+DEPARTURE = 1
+REVERSAL = 2
+RESTART = 3
+
+
+class Clock():
+    """
+    Class Clock. Contains attributes:
+    :param hours: responsible for keeping time: hours(0-23)
+    :type hours: int
+
+    :param minutes: responsible for keeping time: minutes(0-59)
+    :type minutes: int
+    """
+    def __init__(self, hours=5, minutes=0, parent=None):
+        super().__init__()
+        self._hours = hours
+        self._minutes = minutes
+
+    def get_hours(self):
+        return self._hours
+
+    def increase_hours(self):
+        if self._hours == 23:
+            self._hours = 0
+        else:
+            self._hours += 1
+        self._minutes = 0
+
+    def get_minutes(self):
+        return self._minutes
+
+    def increase_minutes(self):
+        self._minutes += 1
+
+    def get_time_in_minutes(self):
+        return self.get_minutes() + 60*self.get_hours()
+
+    def set_time_in_minutes(self, minutes):
+        minutes = minutes % END_OF_DAY
+        self._hours = minutes // 60
+        self._minutes = minutes % 60
+
+    def increase_time(self):
+        if self.get_minutes() == 59:
+            self.increase_hours()
+        else:
+            self.increase_minutes()
+
+
+class Simulator():
+    """
+    Class Simulator. Headless simulation engine, independent of the GUI.
+    Contains attributes:
+    :param network: main tram network
+    :type network: TramNetwork
+
+    :param clock: responsible for keeping time
+    :type clock: Clock
+
+    :param minute: minutes simulated since midnight of the first day
+                   (unlike the clock it does not wrap at midnight)
+    :type minute: int
+
+    :param fleet: state of all trams of the network
+                  (trams of lines added later are not simulated)
+    :type fleet: Fleet
+
+    :param log: if given, departures, arrivals and reversals of trams
+                are appended to it as (minute, event, tram, tram stop)
+                tuples, an EventLog records events of a minute at once
+    :type log: list or EventLog
+    """
+    def __init__(self, network, clock=None, log=None):
+        self._network = network
+        if clock is None:
+            self._clock = Clock()
+        else:
+            self._clock = clock
+        self._minute = self._clock.get_time_in_minutes()
+        self._log = log
+        self._fleet = Fleet()
+        for tram_line in self._network.get_list_lines():
+            for tram_tuple in tram_line.get_list_tram():
+                self._fleet.add_tram(tram_tuple[0])
+
+    def get_network(self):
+        return self._network
+
+    def get_clock(self):
+        return self._clock
+
+    def get_minute(self):
+        return self._minute
+
+    def set_minute(self, minute):
+        """
+        Sets minutes simulated since midnight of the first day and the clock
+        """
+        self._minute = minute
+        self._clock.set_time_in_minutes(minute)
+
+    def get_fleet(self):
+        return self._fleet
+
+    def get_log(self):
+        return self._log
+
+    def log_event(self, minute, event, tram, tram_stop):
+        if self._log is not None:
+            self._log.append((minute, event, tram, tram_stop))
+
+    def log_events(self, minute, event, indexes):
+        """
+        Logs the event of trams with given indexes in the fleet at their
+        last tram stops in given minute
+        """
+        if self._log is None or not indexes:
+            return
+        trams = self._fleet.get_trams()
+        tram_stops = [trams[index].get_last_tram_stop() for index in indexes]
+        if hasattr(self._log, 'record'):
+            self._log.record(minute, event, indexes, tram_stops)
+        else:
+            self._log.extend(zip(
+                repeat(minute), repeat(event), map(trams.__getitem__, indexes),
+                tram_stops))
+
+    def set_tram(self):
+        """
+        Recognizes which tram should depart in the current minute.
+        Returns trams which have left the first tram stop of their route
+        """
+        departed = []
+        time = self._clock.get_time_in_minutes()
+        for tram_line in self._network.get_list_lines():
+            itinerary = tram_line.get_itinerary()
+            for tram_tuple in tram_line.get_list_tram():
+                tram = tram_tuple[0]
+                if time == START_OF_DAY:
+                    tram.restart_start_time()
+                if time == tram.get_start_time():
+                    tram.increase_tram_interval()
+                    if tram._move is False:
+                        self.create_tram(itinerary, tram, tram_line)
+                    if not tram.get_activated():
+                        self.log_event(
+                            self._minute, DEPARTURE, tram, tram.itinerary[0])
+                        departed.append(tram)
+                    tram.set_activated(True)
+                    tram._move = True
+        return departed
+
+    def create_tram(self, itinerary, tram, tram_line):
+        """
+        Places tram at the first tram stop of its itinerary
+        """
+        tram.set_itinerary(itinerary)
+        first_tram_stop = tram.itinerary[0]
+        tram.set_x(first_tram_stop.get_x())
+        tram.set_y(first_tram_stop.get_y())
+        tram_line.get_moving_tram().append(tram)
+
+    def move_tram_in_tram_line(self):
+        """
+        Moves all activated trams.
+        Returns indexes of trams which have reached a tram stop
+        """
+        if self._log is None:
+            return self._fleet.move()
+        reversals = []
+        arrived = self._fleet.move(reversals)
+        self.log_events(self._minute, REVERSAL, reversals)
+        self.log_events(self._minute+1, ARRIVAL, arrived)
+        return arrived
+
+    def step(self):
+        """
+        Simulates one minute of the tram network
+        """
+        self.set_tram()
+        self.move_tram_in_tram_line()
+        self._clock.increase_time()
+        self._minute += 1
+
+    def run_until(self, minute):
+        """
+        Simulates the tram network until given minute
+        (counted since midnight of the first day) is reached
+        """
+        while self._minute < minute:
+            self.step()
+
+
+class EventSimulator(Simulator):
+    """
+    Class EventSimulator. Discrete-event simulation engine: instead of
+    checking every tram each minute, it jumps from one departure or arrival
+    at a tram stop to the next one, kept in a priority queue. Trams are
+    updated only at tram stops. It produces the same log as the Simulator,
+    at 4:00 of each day start times of trams are restarted like there.
+    Contains attributes:
+    :param events: queue of (minute, event, tram index) tuples
+    :type events: list
+
+    :param restart: the next minute at which start times of trams
+                    are restarted (4:00)
+    :type restart: int
+    """
+    def __init__(self, network, clock=None, log=None):
+        super().__init__(network, clock, log)
+        self._events = []
+        self._restart = (
+            (self._minute - START_OF_DAY) // END_OF_DAY*END_OF_DAY +
+            START_OF_DAY)
+        if self._restart < self._minute:
+            self._restart += END_OF_DAY
+        for index in range(len(self._fleet)):
+            self.push_departure(index)
+
+    def push_departure(self, index):
+        """
+        Plans the next departure of the tram, if it is within the service
+        day (start times after midnight are times of the next day)
+        """
+        start_time = self._fleet.get_trams()[index].get_start_time()
+        if start_time >= END_OF_DAY:
+            return
+        if start_time < START_OF_DAY:
+            start_time += END_OF_DAY
+        start_time += self._restart - END_OF_DAY - START_OF_DAY
+        if start_time >= self._minute:
+            heappush(self._events, (start_time, DEPARTURE, index))
+
+    def push_arrival(self, minute, index):
+        """
+        Plans the arrival of the tram at the next tram stop
+        """
+        tram = self._fleet.get_trams()[index]
+        table = tram.get_line().get_segment_table(tram.get_reversed())
+        segment = tram.get_last_tram_stop_number()
+        arrival = minute + table.minutes[segment]
+        heappush(self._events, (arrival, ARRIVAL, index))
+
+    def depart(self, minute, index):
+        tram = self._fleet.get_trams()[index]
+        tram.increase_tram_interval()
+        self.push_departure(index)
+        if tram.get_activated():
+            return
+        if tram._move is False:
+            tram_line = tram.get_line()
+            self.create_tram(tram_line.get_itinerary(), tram, tram_line)
+            tram._move = True
+        tram.set_activated(True)
+        self.log_event(minute, DEPARTURE, tram, tram.itinerary[0])
+        if tram.get_last_tram_stop() == tram.itinerary[-1]:
+            heappush(self._events, (minute, REVERSAL, index))
+        else:
+            self.push_arrival(minute, index)
+
+    def arrive(self, minute, index):
+        tram = self._fleet.get_trams()[index]
+        tram_stop = tram.itinerary[tram.get_last_tram_stop_number()+1]
+        tram.increase_last_tram_stop_number()
+        tram._last_tram_stop = tram_stop
+        tram.set_x(tram_stop.get_x())
+        tram.set_y(tram_stop.get_y())
+        self.log_event(minute, ARRIVAL, tram, tram_stop)
+        if tram_stop == tram.itinerary[-1]:
+            heappush(self._events, (minute, REVERSAL, index))
+        else:
+            self.push_arrival(minute, index)
+
+    def reverse(self, minute, index):
+        """
+        Tram restart - when the tram reaches last tram stop,
+        it stops moving and its route is reversed
+        """
+        tram = self._fleet.get_trams()[index]
+        tram.set_activated(False)
+        tram.reverse_itinerary()
+        tram.set_last_tram_stop_number(0)
+        self.log_event(minute, REVERSAL, tram, tram.get_last_tram_stop())
+
+    def restart(self):
+        """
+        Restarts start times of all trams at 4:00, after arrivals
+        and before departures of the minute
+        """
+        self._minute = self._restart
+        self._restart += END_OF_DAY
+        for index, tram in enumerate(self._fleet.get_trams()):
+            tram.restart_start_time()
+            self.push_departure(index)
+
+    def get_next_event(self):
+        """
+        Returns (minute, event) of the next step
+        """
+        if self._events and self._events[0][:2] < (self._restart, DEPARTURE):
+            return self._events[0][:2]
+        return (self._restart, RESTART)
+
+    def step(self):
+        """
+        Processes the next event and returns it,
+        (minute, RESTART, None) is returned when start times are restarted
+        """
+        if self.get_next_event()[1] == RESTART:
+            minute = self._restart
+            self.restart()
+            return (minute, RESTART, None)
+        minute, event, index = heappop(self._events)
+        self._minute = minute
+        if event == DEPARTURE:
+            self.depart(minute, index)
+        elif event == ARRIVAL:
+            self.arrive(minute, index)
+        else:
+            self.reverse(minute, index)
+        return (minute, event, index)
+
+    def run_until(self, minute):
+        """
+        Simulates the tram network until given minute
+        (counted since midnight of the first day) is reached.
+        Arrivals at given minute are processed, like in the Simulator
+        """
+        while self.get_next_event() < (minute, DEPARTURE):
+            self.step()
+        self._minute = max(self._minute, minute)
+        self._clock.set_time_in_minutes(self._minute)
@@ -0,0 +1,144 @@
+"""
+Uniform grid spatial index over coordinates of the map. Items are kept in
+square cells, so rectangle queries and hit tests only look at cells
+overlapping the searched area, independently of the size of the network.
+"""
+
+CELL_SIZE = 100
+
+
+class GridIndex():
+    """
+    Class GridIndex. Points or rectangles of items in cells of the grid.
+    Contains attributes:
+    :param cell_size: length of the side of a cell
+    :type cell_size: int
+
+    :param cells: items of each cell by (column, row) of the cell
+    :type cells: dict
+
+    :param bounds: rectangle (left, top, right, bottom) of each item
+    :type bounds: dict
+    """
+    def __init__(self, cell_size=CELL_SIZE):
+        self._cell_size = cell_size
+        self._cells = {}
+        self._bounds = {}
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def __contains__(self, item):
+        return item in self._bounds
+
+    def get_cells(self, left, top, right, bottom):
+        """
+        Returns keys of cells overlapping the rectangle
+        """
+        size = self._cell_size
+        return [
+            (column, row)
+            for column in range(int(left // size), int(right // size) + 1)
+            for row in range(int(top // size), int(bottom // size) + 1)
+        ]
+
+    def insert(self, item, left, top, right=None, bottom=None):
+        """
+        Adds the item located at the point or in the rectangle
+        """
+        if right is None:
+            right, bottom = left, top
+        bounds = (left, top, right, bottom)
+        self._bounds[item] = bounds
+        for cell in self.get_cells(*bounds):
+            self._cells.setdefault(cell, []).append(item)
+
+    def remove(self, item):
+        for cell in self.get_cells(*self._bounds.pop(item)):
+            items = self._cells[cell]
+            items.remove(item)
+            if not items:
+                del self._cells[cell]
+
+    def move(self, item, x, y):
+        """
+        Moves the point item, cells are changed only if it left its cell
+        """
+        size = self._cell_size
+        bounds = self._bounds.get(item)
+        if bounds is not None:
+            old_cell = (int(bounds[0] // size), int(bounds[1] // size))
+            if old_cell == (int(x // size), int(y // size)):
+                self._bounds[item] = (x, y, x, y)
+                return
+            self.remove(item)
+        self.insert(item, x, y)
+
+    def query(self, left, top, right, bottom):
+        """
+        Returns the set of items overlapping the rectangle
+        """
+        found = set()
+        for cell in self.get_cells(left, top, right, bottom):
+            for item in self._cells.get(cell, ()):
+                item_left, item_top, item_right, item_bottom = (
+                    self._bounds[item])
+                if (item_left <= right and left <= item_right and
+                        item_top <= bottom and top <= item_bottom):
+                    found.add(item)
+        return found
+
+    def nearest(self, x, y, radius):
+        """
+        Returns the point item closest to (x, y) within the radius
+        or None if there is no such item
+        """
+        best = None
+        best_distance = radius*radius
+        for item in self.query(x - radius, y - radius, x + radius, y + radius):
+            item_x, item_y = self._bounds[item][:2]
+            distance = (item_x - x)**2 + (item_y - y)**2
+            if distance <= best_distance:
+                best = item
+                best_distance = distance
+        return best
+
+
+def get_edges(network):
+    """
+    Returns connections of the network as (tram stop, tram stop) pairs,
+    each connection once although it is kept by both tram stops
+    """
+    indexes = {
+        tram_stop: index
+        for index, tram_stop in enumerate(network.get_list_tram_stops())
+    }
+    return [
+        (tram_stop, connected_stop)
+        for tram_stop in network.get_list_tram_stops()
+        for connected_stop, distance in tram_stop.get_connected_stops()
+        if indexes[tram_stop] < indexes[connected_stop]
+    ]
+
+
+def index_tram_stops(network, cell_size=CELL_SIZE):
+    index = GridIndex(cell_size)
+    for tram_stop in network.get_list_tram_stops():
+        index.insert(tram_stop, tram_stop.get_x(), tram_stop.get_y())
+    return index
+
+
+def index_edges(edges, cell_size=CELL_SIZE):
+    """
+    Returns the index of bounding rectangles of edges
+    """
+    index = GridIndex(cell_size)
+    for edge in edges:
+        tram_stopA, tram_stopB = edge
+        index.insert(
+            edge,
+            min(tram_stopA.get_x(), tram_stopB.get_x()),
+            min(tram_stopA.get_y(), tram_stopB.get_y()),
+            max(tram_stopA.get_x(), tram_stopB.get_x()),
+            max(tram_stopA.get_y(), tram_stopB.get_y()))
+    return index
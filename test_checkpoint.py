@@ -0,0 +1,200 @@
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from database import TramLine, Tram
+from setup import network_setup
+from simulator import Clock, Simulator, EventSimulator
+from checkpoint import (
+                Checkpointer,
+                InvalidCheckpointError,
+                UnsupportedCheckpointVersionError,
+                UnsupportedSimulatorError,
+                find_latest_checkpoint,
+                load_checkpoint,
+                read_columns,
+                restore_state,
+                resume_latest,
+                save_checkpoint,
+                write_state,
+                FLEET_COLUMNS,
+                HEADER,
+                TRAM_COLUMNS
+                )
+
+"""
+Unit tests to test checkpoints of the simulation
+"""
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ARGS = [
+    'checkpoint.py',
+    '--file-tramstop', os.path.join(DIRECTORY, 'tram_stops.txt'),
+    '--file-connection', os.path.join(DIRECTORY, 'tram_stops_connection.txt'),
+    '--file-tramline', os.path.join(DIRECTORY, 'tram_line.txt')
+]
+
+
+def create_simulator(log=None):
+    return Simulator(network_setup(ARGS), Clock(5, 0), log)
+
+
+def get_log_entries(log):
+    return [
+        (minute, event, tram.get_tram_name(), tram_stop.get_id())
+        for minute, event, tram, tram_stop in log
+    ]
+
+
+def test_restore_matches_continuous_run():
+    log = []
+    simulator = create_simulator(log)
+    simulator.run_until(8*60 + 17)
+    blob = write_state(simulator)
+    start = len(log)
+    simulator.run_until(11*60)
+    expected = write_state(simulator)
+    restored_log = []
+    restored = create_simulator(restored_log)
+    restore_state(restored, blob)
+    assert restored.get_minute() == 8*60 + 17
+    assert restored.get_clock().get_hours() == 8
+    assert restored.get_clock().get_minutes() == 17
+    restored.run_until(11*60)
+    assert write_state(restored) == expected
+    assert get_log_entries(restored_log) == get_log_entries(log[start:])
+
+
+def test_restore_after_segment_tables_rebuilt():
+    simulator = create_simulator()
+    simulator.run_until(8*60 + 17)
+    network = simulator.get_network()
+    for tram_line in network.get_list_lines():
+        tram_line.invalidate_segment_tables()
+    blob = write_state(simulator)
+    simulator.run_until(8*60 + 18)
+    expected = write_state(simulator)
+    restored = create_simulator()
+    restore_state(restored, blob)
+    fleet = restored.get_fleet()
+    for index, tram in enumerate(fleet.get_trams()):
+        if fleet.get_remaining(index):
+            assert fleet.get_table(index).reversed == tram.get_reversed()
+    restored.run_until(8*60 + 18)
+    assert write_state(restored) == expected
+
+
+def test_restore_after_midnight():
+    simulator = create_simulator()
+    simulator.run_until(24*60 + 30)
+    blob = write_state(simulator)
+    simulator.run_until(24*60 + 90)
+    expected = write_state(simulator)
+    restore_state(simulator, blob)
+    assert simulator.get_clock().get_time_in_minutes() == 30
+    simulator.run_until(24*60 + 90)
+    assert write_state(simulator) == expected
+
+
+def test_invalid_checkpoints(create_network):
+    simulator = Simulator(create_network(), Clock(5, 0))
+    blob = write_state(simulator)
+    with pytest.raises(InvalidCheckpointError):
+        restore_state(simulator, b'TRAM')
+    with pytest.raises(InvalidCheckpointError):
+        restore_state(simulator, b'X' + blob[1:])
+    with pytest.raises(InvalidCheckpointError):
+        restore_state(simulator, blob[:-1])
+    header = list(HEADER.unpack_from(blob))
+    header[1] = 2
+    with pytest.raises(UnsupportedCheckpointVersionError):
+        restore_state(simulator, HEADER.pack(*header) + blob[HEADER.size:])
+    with pytest.raises(UnsupportedSimulatorError):
+        write_state(EventSimulator(create_network()))
+
+
+def test_corrupt_checkpoints(create_network):
+    simulator = Simulator(create_network(), Clock(5, 0))
+    simulator.run_until(5*60 + 2)
+    blob = write_state(simulator)
+    table = read_columns(blob, HEADER.size, FLEET_COLUMNS, 2)[1]
+    corrupt = blob[:table] + bytes([7]) + blob[table + 1:]
+    with pytest.raises(InvalidCheckpointError):
+        restore_state(simulator, corrupt)
+    corrupt = blob[:-4] + (2).to_bytes(4, 'little')
+    with pytest.raises(InvalidCheckpointError):
+        restore_state(simulator, corrupt)
+    restore_state(simulator, blob)
+    assert write_state(simulator) == blob
+
+
+def test_checkpointer_rewind(tmp_path):
+    simulator = create_simulator()
+    with ThreadPoolExecutor(1) as executor:
+        checkpointer = Checkpointer(
+            simulator, every=30, directory=tmp_path, executor=executor,
+            max_checkpoints=3)
+        for minute in range(5*60, 7*60 + 10):
+            simulator.step()
+            checkpointer.update()
+        checkpointer.flush()
+    assert checkpointer.get_minutes() == [6*60, 6*60 + 30, 7*60]
+    expected = write_state(simulator)
+    assert checkpointer.rewind(6*60 + 50) == 6*60 + 30
+    assert checkpointer.rewind_previous() == 6*60
+    assert checkpointer.rewind_previous() is None
+    assert checkpointer.forward_next() == 6*60 + 30
+    simulator.run_until(7*60 + 10)
+    assert write_state(simulator) == expected
+    path = find_latest_checkpoint(tmp_path)
+    assert os.path.basename(path) == 'checkpoint_000420.bin'
+    assert len(os.listdir(tmp_path)) == 4
+    restored = create_simulator()
+    load_checkpoint(restored, path)
+    assert checkpointer.rewind(7*60) == 7*60
+    assert write_state(restored) == write_state(simulator)
+    save_checkpoint(restored, path)
+    with open(path, 'rb') as file_handle:
+        assert file_handle.read() == write_state(simulator)
+
+
+def test_line_visiting_tram_stop_twice(create_network):
+
+    def create_network_line2():
+        network = create_network(trams=0)
+        tram_stopA, tram_stopB, tram_stopC = network.get_list_tram_stops()
+        tram_line = TramLine(
+            '2', [tram_stopB, tram_stopA, tram_stopB, tram_stopC],
+            5, 0, 10)
+        Tram(tram_line, 1)
+        network.add_line(tram_line)
+        return network
+
+    simulator = Simulator(create_network_line2(), Clock(5, 0))
+    simulator.run_until(5*60 + 9)
+    blob = write_state(simulator)
+    columns = read_columns(
+        blob, HEADER.size, (*FLEET_COLUMNS, *TRAM_COLUMNS), 1)[0]
+    assert columns['last_stop'][0] == 2
+    simulator.run_until(5*60 + 30)
+    expected = write_state(simulator)
+    network = create_network_line2()
+    restored = Simulator(network, Clock(5, 0))
+    restore_state(restored, blob)
+    tram = restored.get_fleet().get_trams()[0]
+    assert tram.get_last_tram_stop() is network.get_tram_stop('2')
+    restored.run_until(5*60 + 30)
+    assert write_state(restored) == expected
+
+
+def test_resume_latest(tmp_path):
+    directory = tmp_path / 'checkpoints'
+    simulator = create_simulator()
+    assert resume_latest(simulator, directory) is None
+    checkpointer = Checkpointer(simulator, every=60, directory=directory)
+    simulator.run_until(7*60 + 30)
+    checkpointer.take()
+    expected = write_state(simulator)
+    simulator.run_until(8*60)
+    restored = create_simulator()
+    assert resume_latest(restored, directory) == 7*60 + 30
+    assert write_state(restored) == expected
@@ -1,8 +1,9 @@
-from database import TramNetwork, TramLine, TramStop, Tram
+from database import TramNetwork, TramLine, TramStop, Tram, get_segment
 from database import (
                 InvalidTimeError,
                 InvalidIntervalError,
-                InvalidLineNumberError
+                InvalidLineNumberError,
+                TramStopsNotConnectedError
                 )
 import pytest
 
@@ -121,3 +122,110 @@ def test_create_invalid_tram():
     tram_line4 = TramLine(4, list_tram_stops)
     with pytest.raises(InvalidLineNumberError):
         Tram(tram_line4, -1)
+
+
+def test_tram_network_indexes():
+    tram_stopA = TramStop(1, 'Teatr Bagatela', 20, -70)
+    tram_stopB = TramStop(2, 'Stary Kleparz', 80, -110)
+    network = TramNetwork([tram_stopA])
+    network.add_tram_stop(tram_stopB)
+    network.add_connection(tram_stopA, tram_stopB, 4)
+    assert network.get_tram_stop(2) == tram_stopB
+    assert network.get_tram_stop(3) is None
+    assert network.has_position(80, -110)
+    assert network.is_connected(tram_stopB, tram_stopA)
+    assert tram_stopA.get_connected_stops() == [(tram_stopB, 4)]
+
+
+def test_tram_stops_distance_not_connected():
+    tram_stopA = TramStop(1, 'Teatr Bagatela')
+    tram_stopB = TramStop(2, 'Stary Kleparz')
+    tram_stopC = TramStop(3, 'Teatr Słowackiego')
+    list_tram = [tram_stopA, tram_stopB, tram_stopC]
+    simulator = TramNetwork(list_tram)
+    tram_stopA.add_connected_stop(tram_stopB, 4)
+    assert simulator.get_distance(tram_stopB, tram_stopA) == 4
+    assert simulator.get_distance(tram_stopA, tram_stopC) is None
+
+
+def test_tram_line_segment_table():
+    tram_stopA = TramStop(1, 'Teatr Bagatela', 0, 0)
+    tram_stopB = TramStop(2, 'Stary Kleparz', 40, 0)
+    tram_stopC = TramStop(3, 'Teatr Słowackiego', 40, 30)
+    list_tram_stops = [tram_stopA, tram_stopB, tram_stopC]
+    tram_stopA.add_connected_stop(tram_stopB, 4)
+    tram_stopB.add_connected_stop(tram_stopC, 3)
+    tram_line4 = TramLine(4, list_tram_stops)
+    table = tram_line4.get_segment_table()
+    assert len(table) == 2
+    assert list(table.move_x) == [10.0, 0.0]
+    assert list(table.offset) == [0, 4]
+    assert table.get_total_minutes() == 7
+    reversed_table = tram_line4.get_segment_table(reversed=True)
+    assert list(reversed_table.start_y) == [30, 0]
+    assert list(reversed_table.move_y) == [-10.0, 0.0]
+    assert tram_line4.get_segment_table() is table
+
+
+def test_tram_line_segment_table_invalidated():
+    tram_stopA = TramStop(1, 'Teatr Bagatela', 0, 0)
+    tram_stopB = TramStop(2, 'Stary Kleparz', 40, 0)
+    list_tram_stops = [tram_stopA, tram_stopB]
+    tram_stopA.add_connected_stop(tram_stopB, 4)
+    tram_line4 = TramLine(4, list_tram_stops)
+    assert list(tram_line4.get_segment_table().minutes) == [4]
+    tram_stopA.add_connected_stop(tram_stopB, 8)
+    assert list(tram_line4.get_segment_table().minutes) == [8]
+    tram_line4.set_itinerary([tram_stopB, tram_stopA])
+    assert list(tram_line4.get_segment_table().start_x) == [40]
+
+
+def test_tram_line_segment_table_stale_stops():
+    tram_stopA = TramStop(1, 'Teatr Bagatela', 0, 0)
+    tram_stopB = TramStop(2, 'Stary Kleparz', 40, 0)
+    tram_stopC = TramStop(3, 'Teatr Słowackiego', 40, 30)
+    tram_stopA.add_connected_stop(tram_stopB, 4)
+    tram_stopA.add_connected_stop(tram_stopC, 5)
+    list_tram_stops = [tram_stopA, tram_stopB]
+    tram_line4 = TramLine(4, list_tram_stops)
+    assert list(tram_line4.get_segment_table().end_x) == [40]
+    tram_stopB.set_x(50)
+    assert list(tram_line4.get_segment_table().end_x) == [50]
+    list_tram_stops[1] = tram_stopC
+    assert list(tram_line4.get_segment_table().end_y) == [30]
+    assert list(tram_line4.get_segment_table().minutes) == [5]
+
+
+def test_tram_line_segment_table_unrelated_connection():
+    tram_stopA = TramStop(1, 'Teatr Bagatela', 0, 0)
+    tram_stopB = TramStop(2, 'Stary Kleparz', 40, 0)
+    tram_stopC = TramStop(3, 'Teatr Słowackiego', 40, 30)
+    tram_stopD = TramStop(4, 'Plac Inwalidów', 0, 30)
+    tram_stopA.add_connected_stop(tram_stopB, 4)
+    tram_line4 = TramLine(4, [tram_stopA, tram_stopB])
+    table = tram_line4.get_segment_table()
+    tram_stopC.add_connected_stop(tram_stopD, 3)
+    assert tram_line4.get_segment_table() is table
+
+
+def test_tram_line_segment_table_not_connected():
+    tram_stopA = TramStop(1, 'Teatr Bagatela', 0, 0)
+    tram_stopB = TramStop(2, 'Stary Kleparz', 40, 0)
+    tram_line4 = TramLine(4, [tram_stopA, tram_stopB])
+    with pytest.raises(TramStopsNotConnectedError):
+        tram_line4.get_segment_table()
+
+
+def test_slotted_objects():
+    tram_stopA = TramStop(1, 'Teatr Bagatela')
+    tram_line4 = TramLine(4, [tram_stopA])
+    tram = Tram(tram_line4, 1)
+    for element in (tram_stopA, tram_line4, tram):
+        assert not hasattr(element, '__dict__')
+
+
+def test_get_segment():
+    tram_stopA = TramStop('1', 'Teatr Bagatela', 0, 0)
+    tram_stopB = TramStop('2', 'Stary Kleparz', 40, 0)
+    assert get_segment(tram_stopA, tram_stopB) == (('1', '2'), True)
+    assert get_segment(tram_stopB, tram_stopA) == (('1', '2'), False)
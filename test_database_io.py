@@ -4,7 +4,8 @@ from database_io import (
                             read_tram_stop,
                             MalformedDataError,
                             InvalidTramStopPositionError,
-                            ConnectionAlreadySetError)
+                            ConnectionAlreadySetError,
+                            TramStopsNotConnectedDataError)
 from database import TramNetwork, TramStop, InvalidTimeError
 from io import StringIO
 import pytest
@@ -81,37 +82,106 @@ def test_read_tram_stop_connection_already_set():
         read_tram_stop_connection(file_handle, network)
 
 
-def test_tram_line():
-    data = '1,5,0,20,50,49,14,13,12,4,3\n2,5,30,15,50,49,14,13,1,2,3,8,9,18,19'
+def test_tram_line(network):
+    data = '1,5,0,20,1,2,3\n2,5,30,15,3,2'
+    file_handle = StringIO(data)
+    tram_line_list = read_tram_line(file_handle, network)
+    assert len(tram_line_list) == 2
+    assert [tram_stop.get_id()
+            for tram_stop in tram_line_list[1].get_itinerary()] == ['3', '2']
+
+
+def test_tram_line_invalid_time(network):
+    data = '1,5,60,20,1,2,3\n2,5,30,15,3,2'
+    file_handle = StringIO(data)
+    with pytest.raises(InvalidTimeError):
+        read_tram_line(file_handle, network)
+
+
+def test_tram_line_unknown_tram_stop(network):
+    data = '1,5,0,20,1,2,3\n2,5,30,15,3,2,50,1'
+    file_handle = StringIO(data)
+    file_handle.name = 'tram_line.txt'
+    with pytest.raises(MalformedDataError) as error:
+        read_tram_line(file_handle, network)
+    assert error.value.file_name == 'tram_line.txt'
+    assert (error.value.line, error.value.column) == (2, 15)
+
+
+def test_tram_line_tram_stops_not_connected(network):
+    data = '1,5,0,20,1,2,3\n2,5,30,15,3,1'
+    file_handle = StringIO(data)
+    file_handle.name = 'tram_line.txt'
+    with pytest.raises(TramStopsNotConnectedDataError) as error:
+        read_tram_line(file_handle, network)
+    assert (error.value.line, error.value.column) == (2, 13)
+    assert str(error.value) == (
+        'tram_line.txt:2:13: '
+        'Tram stop is not connected with the previous one')
+
+
+def test_tram_line_invalid():
+    data = '1,5,0\n2,5,30,15,50,49,14,13,1,2,3,8,9,18,19'
     file_handle = StringIO(data)
     tram_stopA = TramStop('1', 'Teatr Bagatela')
     tram_stopB = TramStop('2', 'Stary Kleparz')
     tram_stopC = TramStop('3', 'Teatr Słowackiego')
     list_tram_stops = [tram_stopA, tram_stopB, tram_stopC]
     network = TramNetwork(list_tram_stops)
-    tram_line_list = read_tram_line(file_handle, network)
-    assert len(tram_line_list) > 0
+    with pytest.raises(MalformedDataError):
+        read_tram_line(file_handle, network)
 
 
-def test_tram_line_invalid_time():
-    data = '1,5,60,20,50,49,14,13,12,4,3\n2,5,30,15,50,49,14,13,1,2,3,8,9,18'
+def test_read_tram_stop_connection_unknown_stop():
+    data = '1,2,4\n1,7,5'
     file_handle = StringIO(data)
     tram_stopA = TramStop('1', 'Teatr Bagatela')
     tram_stopB = TramStop('2', 'Stary Kleparz')
-    tram_stopC = TramStop('3', 'Teatr Słowackiego')
-    list_tram_stops = [tram_stopA, tram_stopB, tram_stopC]
+    list_tram_stops = [tram_stopA, tram_stopB]
     network = TramNetwork(list_tram_stops)
-    with pytest.raises(InvalidTimeError):
-        read_tram_line(file_handle, network)
+    with pytest.raises(MalformedDataError):
+        read_tram_stop_connection(file_handle, network)
 
 
-def test_tram_line_invalid():
-    data = '1,5,0\n2,5,30,15,50,49,14,13,1,2,3,8,9,18,19'
+def test_read_tram_stop_error_location():
+    data = '1,Teatr Bagatela,20,-70\n2,Stary Kleparz,8o,-110'
+    file_handle = StringIO(data)
+    with pytest.raises(MalformedDataError) as error:
+        read_tram_stop(file_handle)
+    assert error.value.line == 2
+    assert error.value.column == 17
+    assert str(error.value) == '2:17: Malformed data'
+
+
+def test_read_tram_stop_into_network():
+    data = '1,Teatr Bagatela,20,-70\n2,Stary Kleparz,80,-110'
+    file_handle = StringIO(data)
+    network = TramNetwork()
+    read_tram_stop(file_handle, network, chunk_size=1)
+    assert network.get_tram_stop('2').get_x() == 80
+    assert len(network.get_list_tram_stops()) == 2
+
+
+def test_read_tram_stop_connection_error_location():
+    data = '1,2,4\n1,3,5\n2,3'
     file_handle = StringIO(data)
+    file_handle.name = 'tram_stops_connection.txt'
     tram_stopA = TramStop('1', 'Teatr Bagatela')
     tram_stopB = TramStop('2', 'Stary Kleparz')
     tram_stopC = TramStop('3', 'Teatr Słowackiego')
     list_tram_stops = [tram_stopA, tram_stopB, tram_stopC]
     network = TramNetwork(list_tram_stops)
-    with pytest.raises(MalformedDataError):
+    with pytest.raises(MalformedDataError) as error:
+        read_tram_stop_connection(file_handle, network, chunk_size=2)
+    assert error.value.file_name == 'tram_stops_connection.txt'
+    assert (error.value.line, error.value.column) == (3, 5)
+
+
+def test_tram_line_invalid_interval_value():
+    data = '1,5,0,x,1,2,3'
+    file_handle = StringIO(data)
+    tram_stopA = TramStop('1', 'Teatr Bagatela')
+    network = TramNetwork([tram_stopA])
+    with pytest.raises(MalformedDataError) as error:
         read_tram_line(file_handle, network)
+    assert (error.value.line, error.value.column) == (1, 7)
@@ -0,0 +1,78 @@
+import pytest
+from array import array
+from simulator import Clock, Simulator, EventSimulator
+from simulator import ARRIVAL, DEPARTURE, REVERSAL
+from event_log import (
+                EventLog,
+                InvalidEventLogError,
+                get_dwell_stats,
+                get_round_trip_stats,
+                read_event_log,
+                read_npy,
+                write_npy,
+                NPY_ALIGNMENT
+                )
+
+"""
+Unit tests to test the columnar event log
+"""
+
+
+def get_entries(columns):
+    return list(zip(
+        columns['minute'], columns['event'], columns['tram'],
+        columns['line'], columns['stop']))
+
+
+def test_npy_round_trip():
+    column = array('i', [5, -1, 1 << 20])
+    data = write_npy(column)
+    assert data.startswith(b'\x93NUMPY\x01\x00')
+    assert (data.index(b'\n') + 1) % NPY_ALIGNMENT == 0
+    assert b"'descr': '<i4'" in data
+    assert read_npy(data, 'i') == column
+    assert read_npy(write_npy(array('b')), 'b') == array('b')
+    with pytest.raises(InvalidEventLogError):
+        read_npy(data, 'b')
+    with pytest.raises(InvalidEventLogError):
+        read_npy(data[:-1], 'i')
+
+
+def test_event_log_matches_list_log(create_network):
+    network = create_network()
+    log = []
+    Simulator(network, Clock(5, 0), log).run_until(8*60)
+    list_tram_stops = network.get_list_tram_stops()
+    network = create_network()
+    event_log = EventLog(network, capacity=7)
+    Simulator(network, Clock(5, 0), event_log).run_until(8*60)
+    assert len(event_log) == len(log)
+    assert get_entries(event_log.get_columns()) == [
+        (minute, event, tram.get_index(), 0,
+         list_tram_stops.index(tram_stop))
+        for minute, event, tram, tram_stop in log
+    ]
+    assert log[3][:2] == (307, REVERSAL)
+
+
+def test_event_log_chunks_in_directory(tmp_path, network):
+    with EventLog(network, directory=tmp_path, capacity=16) as event_log:
+        EventSimulator(network, Clock(5, 0), event_log).run_until(10*60)
+        columns = event_log.get_columns()
+    assert len(list(tmp_path.iterdir())) == -(-len(event_log) // 16)
+    assert read_event_log(tmp_path) == columns
+    assert set(columns['event']) == {ARRIVAL, DEPARTURE, REVERSAL}
+    (tmp_path / 'events_000000.npz').write_bytes(b'PK')
+    with pytest.raises(InvalidEventLogError):
+        read_event_log(tmp_path)
+
+
+def test_dwell_and_round_trip_stats(network):
+    event_log = EventLog(network)
+    Simulator(network, Clock(5, 0), event_log).run_until(24*60)
+    columns = event_log.get_columns()
+    dwells = get_dwell_stats(columns, network)
+    assert dwells['2'] == (114, 0, 0, 0)
+    assert dwells['1'] == (56, 13, 13, 13)
+    assert dwells['3'] == (56, 13, 13, 13)
+    assert get_round_trip_stats(columns, network) == {'1': (56, 27, 27, 27)}
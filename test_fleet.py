@@ -0,0 +1,88 @@
+from database import Tram
+from fleet import Fleet
+
+"""
+Unit tests to test the array-backed state of trams
+"""
+
+
+def test_fleet_add_tram(create_network):
+    network = create_network(trams=0)
+    tram_line = network.get_list_lines()[0]
+    tram = Tram(tram_line, 1, 20, -70)
+    fleet = Fleet()
+    index = fleet.add_tram(tram)
+    assert index == 0
+    assert len(fleet) == 1
+    assert tram.get_fleet() == fleet
+    assert (fleet.get_x(0), fleet.get_y(0)) == (20, -70)
+
+
+def test_tram_is_view_of_fleet(create_network):
+    network = create_network(trams=0)
+    tram_line = network.get_list_lines()[0]
+    tram = Tram(tram_line, 1)
+    fleet = Fleet()
+    fleet.add_tram(tram)
+    tram.set_x(15)
+    tram.increase_last_tram_stop_number()
+    tram.set_activated(True)
+    assert fleet.get_x(0) == 15
+    assert fleet.get_segment(0) == 1
+    assert fleet.get_activated(0) is True
+    fleet.set_y(0, 30)
+    assert tram.get_y() == 30
+
+
+def test_fleet_move(create_network):
+    network = create_network(trams=0)
+    tram_line = network.get_list_lines()[0]
+    tram = Tram(tram_line, 1)
+    tram.set_itinerary(tram_line.get_itinerary())
+    fleet = Fleet()
+    fleet.add_tram(tram)
+    tram.set_activated(True)
+    fleet.move()
+    assert (tram.get_x(), tram.get_y()) == (10, 0)
+    assert fleet.get_remaining(0) == 3
+    for minute in range(3):
+        fleet.move()
+    assert tram.get_x() == 40
+    assert tram.get_last_tram_stop_number() == 1
+    assert fleet.get_remaining(0) == 0
+
+
+def test_fleet_move_reverses_route(create_network):
+    network = create_network(trams=0)
+    tram_line = network.get_list_lines()[0]
+    tram = Tram(tram_line, 1)
+    tram.set_itinerary(tram_line.get_itinerary())
+    fleet = Fleet()
+    fleet.add_tram(tram)
+    tram.set_activated(True)
+    for minute in range(8):
+        fleet.move()
+    assert tram.get_activated() is False
+    assert tram.get_last_tram_stop_number() == 0
+    assert tram.itinerary == tram_line.get_itinerary()[::-1]
+
+
+def test_fleet_moves_only_activated(create_network):
+    network = create_network(trams=0)
+    tram_line = network.get_list_lines()[0]
+    fleet = Fleet()
+    for tram_number_line in (1, 3):
+        tram = Tram(tram_line, tram_number_line)
+        tram.set_itinerary(tram_line.get_itinerary())
+        fleet.add_tram(tram)
+    trams = fleet.get_trams()
+    trams[1].set_activated(True)
+    fleet.move()
+    assert (fleet.get_x(0), fleet.get_x(1)) == (0, 10)
+    columns = {name: list(column)
+               for name, column in fleet.get_columns().items()}
+    columns['activated'] = [True, False]
+    fleet.set_columns(columns)
+    assert trams[0].get_activated() is True
+    fleet.move()
+    assert (fleet.get_x(0), fleet.get_x(1)) == (10, 10)
@@ -0,0 +1,80 @@
+from database import TramNetwork, TramStop
+from database_io import MalformedDataError
+from gtfs import (
+                read_gtfs,
+                read_gtfs_stops,
+                read_gtfs_stop_times,
+                write_gtfs
+                )
+from timetable import Timetable
+from io import StringIO
+import pytest
+
+"""
+Unit tests to test import and export of GTFS feeds
+"""
+
+
+def test_gtfs_round_trip(tmp_path, network):
+    write_gtfs(network, tmp_path)
+    gtfs_network = read_gtfs(tmp_path)
+    tram_stopA, tram_stopB, tram_stopC = gtfs_network.get_list_tram_stops()
+    assert tram_stopB.get_name() == 'Stary Kleparz'
+    assert (tram_stopC.get_x(), tram_stopC.get_y()) == (40, 30)
+    assert gtfs_network.get_distance(tram_stopA, tram_stopB) == 4
+    tram_line = gtfs_network.get_list_lines()[0]
+    assert tram_line.get_itinerary() == [tram_stopA, tram_stopB, tram_stopC]
+    assert tram_line.get_interval() == 10
+    assert len(tram_line.get_list_tram()) == 2
+    timetable = Timetable(network)
+    gtfs_timetable = Timetable(gtfs_network)
+    for stop_id in ('1', '2', '3'):
+        assert gtfs_timetable.get_board(stop_id).departures == (
+            timetable.get_board(stop_id).departures)
+
+
+def test_read_gtfs_stops_skips_stations():
+    data = (
+        '\ufeffstop_id,stop_name,stop_lat,stop_lon,location_type\n'
+        'S1,Rondo Mogilskie,50.0654,19.9590,1\n'
+        '1,Rondo Mogilskie,50.0654,19.9590,0\n'
+        '2,Teatr Bagatela,50.0634,19.9322,\n')
+    network = TramNetwork()
+    read_gtfs_stops(StringIO(data), network)
+    assert [tram_stop.get_id() for tram_stop in (
+        network.get_list_tram_stops())] == ['1', '2']
+
+
+def test_read_gtfs_stop_times_interpolates():
+    tram_stops = [
+        TramStop(id, f'Stop {id}', int(id), 0) for id in ('1', '2', '3')]
+    network = TramNetwork(tram_stops)
+    data = (
+        'trip_id,arrival_time,departure_time,stop_id,stop_sequence\n'
+        'a,05:00:00,05:00:00,1,1\n'
+        'a,,,2,2\n'
+        'a,05:06:30,05:06:30,3,3\n')
+    tram_lines = read_gtfs_stop_times(StringIO(data), network, {'a': 'R'})
+    assert tram_lines[0].get_number() == 'R'
+    assert network.get_distance(tram_stops[0], tram_stops[1]) == 3
+    assert network.get_distance(tram_stops[1], tram_stops[2]) == 3
+
+
+def test_read_gtfs_stop_times_not_grouped():
+    tram_stops = [
+        TramStop(id, f'Stop {id}', int(id), 0) for id in ('1', '2')]
+    network = TramNetwork(tram_stops)
+    data = (
+        'trip_id,arrival_time,departure_time,stop_id,stop_sequence\n'
+        'a,05:00:00,05:00:00,1,1\n'
+        'b,05:00:00,05:00:00,2,1\n'
+        'a,05:02:00,05:02:00,2,2\n')
+    with pytest.raises(MalformedDataError) as error:
+        read_gtfs_stop_times(StringIO(data), network, {'a': 'R', 'b': 'R'})
+    assert error.value.line == 4
+
+
+def test_read_gtfs_missing_column():
+    data = 'stop_id,stop_name,stop_lat\n1,Teatr Bagatela,50.0634\n'
+    with pytest.raises(MalformedDataError):
+        read_gtfs_stops(StringIO(data), TramNetwork())
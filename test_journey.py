@@ -0,0 +1,52 @@
+from journey import JourneyPlanner
+
+"""
+Unit tests to test planning journeys over tram lines
+"""
+
+
+def test_route_departures(create_network, add_line2):
+    network = add_line2(create_network())
+    planner = JourneyPlanner(network)
+    route = planner.get_routes()[0]
+    assert route.starts[:5] == [300, 330, 340, 370, 380]
+    assert route.offsets == [0, 4, 7]
+
+
+def test_earliest_arrival_single_line(create_network, add_line2):
+    network = add_line2(create_network())
+    tram_stopA, tram_stopB, tram_stopC, tram_stopD = (
+        network.get_list_tram_stops())
+    planner = JourneyPlanner(network)
+    assert planner.earliest_arrival(tram_stopA, tram_stopC, 300) == 307
+    assert planner.earliest_arrival(tram_stopA, tram_stopB, 301) == 334
+    assert planner.earliest_arrival(tram_stopC, tram_stopA, 300) == 317
+
+
+def test_plan_with_transfer(create_network, add_line2):
+    network = add_line2(create_network())
+    tram_stopA, tram_stopB, tram_stopC, tram_stopD = (
+        network.get_list_tram_stops())
+    tram_line1, tram_line2 = network.get_list_lines()
+    planner = JourneyPlanner(network)
+    legs = planner.plan(tram_stopA, tram_stopD, 300)
+    assert legs == [
+        (tram_line1, tram_stopA, 300, tram_stopC, 307),
+        (tram_line2, tram_stopC, 335, tram_stopD, 340)
+    ]
+    assert planner.earliest_arrival(
+        tram_stopA, tram_stopD, 300, max_transfers=0) is None
+    assert planner.plan(tram_stopA, tram_stopA, 300) == []
+
+
+def test_earliest_arrivals_batch(create_network, add_line2):
+    network = add_line2(create_network())
+    tram_stopA, tram_stopB, tram_stopC, tram_stopD = (
+        network.get_list_tram_stops())
+    planner = JourneyPlanner(network)
+    queries = [
+        (tram_stopA, tram_stopD, 300),
+        (tram_stopA, tram_stopC, 300),
+        (tram_stopD, tram_stopA, 23*60 + 50)
+    ]
+    assert planner.earliest_arrivals(queries) == [340, 307, None]
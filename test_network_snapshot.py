@@ -0,0 +1,80 @@
+from database import TramLine
+from network_snapshot import (
+                NetworkSnapshot,
+                save_network,
+                load_network,
+                InvalidSnapshotError,
+                UnsupportedSnapshotVersionError,
+                HEADER
+                )
+import pytest
+
+"""
+Unit tests to test the binary snapshot of the tram network
+"""
+
+
+def test_snapshot_roundtrip(tmp_path, create_network):
+    path = tmp_path / 'network.bin'
+    network = create_network(trams=3)
+    network.get_list_tram_stops()[0].set_y(-70)
+    save_network(network, path)
+    network = load_network(path)
+    tram_stopA, tram_stopB, tram_stopC = network.get_list_tram_stops()
+    assert tram_stopC.get_name() == 'Teatr Słowackiego'
+    assert (tram_stopA.get_x(), tram_stopA.get_y()) == (0, -70)
+    assert network.get_distance(tram_stopC, tram_stopB) == 3
+    assert network.get_tram_stop('2') == tram_stopB
+    tram_line = network.get_list_lines()[0]
+    assert tram_line.get_number() == '1'
+    assert tram_line.get_hours_start() == 5
+    assert tram_line.get_minutes_start() == 0
+    assert tram_line.get_interval() == 10
+    assert tram_line.get_itinerary() == [tram_stopA, tram_stopB, tram_stopC]
+    assert len(tram_line.get_list_tram()) == 3
+
+
+def test_snapshot_lazy_tram_stop(tmp_path, create_network):
+    path = tmp_path / 'network.bin'
+    save_network(create_network(trams=3), path)
+    with NetworkSnapshot(path) as snapshot:
+        assert snapshot.get_number_of_tram_stops() == 3
+        assert list(snapshot.get_column('stop_x')) == [0, 40, 40]
+        tram_stop = snapshot.get_tram_stop(1)
+        assert tram_stop.get_name() == 'Stary Kleparz'
+        assert snapshot.get_tram_stop(1) is tram_stop
+        assert tram_stop in snapshot.get_network().get_list_tram_stops()
+
+
+def test_snapshot_invalid_file(tmp_path):
+    path = tmp_path / 'tram_stops.txt'
+    path.write_text('1,Teatr Bagatela,20,-70\n2,Stary Kleparz,80,-110\n')
+    with pytest.raises(InvalidSnapshotError):
+        NetworkSnapshot(path)
+
+
+def test_snapshot_unsupported_version(tmp_path, create_network):
+    path = tmp_path / 'network.bin'
+    save_network(create_network(trams=3), path)
+    data = bytearray(path.read_bytes())
+    header = list(HEADER.unpack_from(data))
+    header[1] = 99
+    HEADER.pack_into(data, 0, *header)
+    path.write_bytes(data)
+    with pytest.raises(UnsupportedSnapshotVersionError):
+        NetworkSnapshot(path)
+
+
+def test_snapshot_types_of_ids(tmp_path, create_network):
+    path = tmp_path / 'network.bin'
+    network = create_network()
+    for tram_stop in network.get_list_tram_stops():
+        tram_stop.set_id(int(tram_stop.get_id()))
+    network.add_line(TramLine(18, network.get_list_tram_stops()[:2]))
+    save_network(network, path)
+    network = load_network(path)
+    assert [tram_stop.get_id()
+            for tram_stop in network.get_list_tram_stops()] == [1, 2, 3]
+    assert network.get_tram_stop(2) is network.get_list_tram_stops()[1]
+    assert [tram_line.get_number()
+            for tram_line in network.get_list_lines()] == ['1', '18']
@@ -0,0 +1,57 @@
+from simulator import Clock, Simulator
+from occupancy import (
+                Occupancy,
+                occupancy_from_log,
+                occupancy_from_timetable
+                )
+
+"""
+Unit tests to test occupancy of track segments
+"""
+
+
+def test_log_matches_timetable(create_network, add_line2):
+    network = add_line2(
+        create_network(), ('1', '2', '4'), minutes_start=1, interval=30)
+    occupancy = occupancy_from_timetable(network)
+    log = []
+    Simulator(network, Clock(5, 0), log).run_until(28*60)
+    assert occupancy_from_log(log).get_intervals() == (
+        occupancy.get_intervals())
+
+
+def test_headway_violations(create_network, add_line2):
+    occupancy = occupancy_from_timetable(add_line2(
+        create_network(), ('1', '2', '4'), minutes_start=1, interval=30))
+    violations = occupancy.get_headway_violations()
+    assert violations[0] == (('1', '2'), True, 301, 1, '1_1', '2_1')
+    assert all(violation[3] < 2 for violation in violations)
+    assert occupancy.get_headway_violations(min_headway=1) == []
+    assert occupancy.get_overtakings() == []
+
+
+def test_query_and_peak_occupancy(create_network, add_line2):
+    occupancy = occupancy_from_timetable(add_line2(
+        create_network(), ('1', '2', '4'), minutes_start=1, interval=30))
+    on_segment = occupancy.query(('1', '2'), 302)
+    assert sorted(entry[5] for entry in on_segment) == ['1_1', '2_1']
+    assert occupancy.query(('1', '2'), 306) == []
+    assert occupancy.query(('9', '9'), 302) == []
+    assert occupancy.get_peak_occupancy()[('1', '2')] == (2, 301)
+
+
+def test_overtakings_and_bunching():
+    segment = ('1', '2')
+    occupancy = Occupancy([
+        (segment, True, 0, 10, '1', '1_1'),
+        (segment, True, 10, 20, '1', '1_2'),
+        (segment, True, 20, 30, '1', '1_3'),
+        (segment, True, 22, 28, '1', '1_4'),
+        (segment, True, 40, 50, '1', '1_5'),
+        (segment, False, 5, 15, '1', '1_6'),
+    ])
+    assert occupancy.get_overtakings() == [
+        (segment, True, 28, '1_3', '1_4')]
+    assert occupancy.get_bunching() == [
+        ('1', segment, True, 22, 2, '1_3', '1_4')]
+    assert len(occupancy.get_group(segment, False)) == 1
@@ -0,0 +1,100 @@
+import random
+import pytest
+from database import TramStop
+from simulator import Clock
+from passengers import (
+                Demand,
+                InvalidFlowError,
+                PassengerSimulator,
+                Passengers,
+                poisson,
+                uniform_demand
+                )
+
+"""
+Unit tests to test the passenger demand and loads of trams
+"""
+
+
+def test_poisson_mean():
+    generator = random.Random(1)
+    for rate in (0.5, 4, 100):
+        counts = [poisson(generator, rate) for draw in range(4000)]
+        assert abs(sum(counts) / len(counts) - rate) < 0.05*rate + 0.05
+
+
+def test_add_flow_directions(create_network):
+    network = create_network(trams=3)
+    tram_line = network.get_list_lines()[0]
+    tram_stopA, tram_stopB, tram_stopC = network.get_list_tram_stops()
+    demand = Demand()
+    demand.add_flow(tram_line, tram_stopA, tram_stopC, 10)
+    demand.add_flow(tram_line, tram_stopC, tram_stopB, 5)
+    demand.add_flow(tram_line, tram_stopC, tram_stopB, 5)
+    assert demand.get_flows() == {
+        (tram_line, False, 0, 2): 10,
+        (tram_line, True, 0, 1): 10
+    }
+    with pytest.raises(InvalidFlowError):
+        demand.add_flow(tram_line, tram_stopA, tram_stopA, 1)
+    with pytest.raises(InvalidFlowError):
+        demand.add_flow(tram_line, tram_stopA, TramStop('4', 'Rondo'), 1)
+
+
+def test_uniform_demand_daily_trips(create_network):
+    demand = uniform_demand(create_network(trams=3), 6000)
+    assert len(demand.get_flows()) == 6
+    assert demand.get_daily_trips() == pytest.approx(6000)
+    generator = random.Random(2)
+    spawned = sum(
+        flow[4]
+        for minute in range(24*60)
+        for flow in demand.generate(minute, generator))
+    assert abs(spawned - 6000) < 300
+
+
+def test_board_over_capacity(create_network):
+    simulator = PassengerSimulator(
+        create_network(trams=3), Demand(), Clock(5, 0), capacity=10)
+    tram_line = simulator.get_network().get_list_lines()[0]
+    simulator.run_until(5*60 + 1)
+    passengers = Passengers(simulator.get_fleet(), capacity=10)
+    passengers.add(tram_line, False, 0, 1, 9)
+    passengers.add(tram_line, False, 0, 2, 6)
+    assert passengers.board(0, 0) == 10
+    assert passengers.get_load(0) == 10
+    assert passengers.get_denied() == 5
+    assert passengers.count_waiting(tram_line, False, 0) == 5
+    assert list(passengers.get_waiting(tram_line, False)[:3]) == [0, 3, 2]
+    assert passengers.alight(0, 1) == 6
+    assert passengers.get_load(0) == 4
+
+
+def test_passengers_are_conserved(create_network):
+    network = create_network(trams=3)
+    simulator = PassengerSimulator(
+        network, uniform_demand(network, 20000), Clock(5, 0),
+        capacity=30, seed=3)
+    simulator.run_until(12*60)
+    passengers = simulator.get_passengers()
+    fleet = simulator.get_fleet()
+    loads = [passengers.get_load(index) for index in range(len(fleet))]
+    assert passengers.get_boarded() > 0 and passengers.get_denied() > 0
+    assert passengers.get_spawned() == (
+        passengers.get_boarded() + passengers.get_waiting_total())
+    assert passengers.get_boarded() == passengers.get_alighted() + sum(loads)
+    assert all(
+        passengers.get_peak_load(index) <= 30 for index in range(len(fleet)))
+    assert passengers.get_wait_minutes() > 0
+
+
+def test_same_seed_same_passengers(create_network):
+    results = []
+    for run in range(2):
+        network = create_network(trams=3)
+        simulator = PassengerSimulator(
+            network, uniform_demand(network, 5000), Clock(5, 0), seed=7)
+        simulator.run_until(9*60)
+        passengers = simulator.get_passengers()
+        results.append((passengers.get_spawned(), passengers.get_boarded()))
+    assert results[0] == results[1]
@@ -0,0 +1,164 @@
+import os
+import random
+import pytest
+import reliability
+from array import array
+from io import StringIO
+from database import TramNetwork, TramStop
+from database_io import MalformedDataError
+from delays import DelayModel, Distribution, InvalidDistributionError
+from delays import read_delays
+from setup import network_setup
+from reliability import (
+                format_report,
+                format_time,
+                get_percentile,
+                get_replication_seeds,
+                merge_histograms,
+                monte_carlo,
+                run_replications,
+                add_count,
+                BINS_PER_MINUTE,
+                MAX_DELAY
+                )
+
+"""
+Unit tests to test stochastic delays and Monte Carlo runs
+"""
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_stop_histograms(arrivals):
+    """
+    Returns histograms of delays of arrivals merged by IDs of tram stops
+    """
+    return merge_histograms(
+        {key[0]: histogram} for key, histogram in arrivals.items())
+
+
+def test_distribution_parameters():
+    with pytest.raises(InvalidDistributionError):
+        Distribution('uniform', 1)
+    with pytest.raises(InvalidDistributionError):
+        Distribution('exponential', -1)
+    with pytest.raises(InvalidDistributionError):
+        Distribution('weibull', 1, 1)
+    generators = [random.Random(seed) for seed in range(100)]
+    samples = Distribution('uniform', 1, 2).sample_all(generators)
+    assert all(1 <= value <= 2 for value in samples)
+    assert len(set(samples)) == 100
+    generators = [random.Random(seed) for seed in range(100)]
+    assert samples == Distribution('uniform', 1, 2).sample_all(generators)
+    normal = Distribution('normal', 0, 1).sample_all(generators)
+    assert min(normal) == 0
+
+
+def test_no_delays(create_network):
+    network = create_network(trams=3)
+    arrivals = run_replications(network, DelayModel(), range(10))
+    assert {key[0] for key in arrivals} == {'1', '2', '3'}
+    assert ('2', '1', 304) in arrivals
+    for histogram in arrivals.values():
+        assert list(histogram) == [10]
+
+
+def test_fixed_delays_accumulate(create_network):
+    network = create_network(trams=3)
+    tram_stopA, tram_stopB, tram_stopC = network.get_list_tram_stops()
+    model = DelayModel()
+    model.set_segment_delay(tram_stopA, tram_stopB, Distribution('fixed', 1))
+    model.set_dwell(tram_stopB, Distribution('fixed', 0.5))
+    histograms = get_stop_histograms(
+        run_replications(network, model, range(5)))
+    assert get_percentile(histograms['2'], 100) == 1
+    assert get_percentile(histograms['3'], 100) == 1.5
+    assert get_percentile(histograms['3'], 50) == 1.5
+    assert get_percentile(histograms['1'], 100) == 1.5
+    assert get_percentile(histograms['2'], 50) == 0
+
+
+def test_replications_are_independent(create_network):
+    network = create_network(trams=3)
+    model = DelayModel(Distribution('exponential', 0.5))
+    first = run_replications(network, model, [1, 2])
+    assert first == run_replications(network, model, [1, 2])
+    assert first == merge_histograms([
+        run_replications(network, model, [1]),
+        run_replications(network, model, [2])])
+    assert run_replications(network, model, [1]) != (
+        run_replications(network, model, [2]))
+    merged = merge_histograms([first, first])
+    key = ('2', '1', 304)
+    assert sum(merged[key]) == 2*sum(first[key]) == 4
+
+
+def test_get_percentile():
+    histogram = array('l')
+    add_count(histogram, 0, 50)
+    add_count(histogram, 2*BINS_PER_MINUTE, 40)
+    add_count(histogram, 5*BINS_PER_MINUTE, 10)
+    assert len(histogram) == 5*BINS_PER_MINUTE + 1
+    assert get_percentile(histogram, 50) == 0
+    assert get_percentile(histogram, 90) == 2
+    assert get_percentile(histogram, 95) == 5
+    add_count(histogram, 10**6, 1)
+    assert len(histogram) == MAX_DELAY*BINS_PER_MINUTE + 1
+
+
+def test_monte_carlo_matches_single_process(monkeypatch):
+    monkeypatch.setattr(reliability, 'CHUNK_REPLICATIONS', 8)
+    args = [
+        'reliability.py',
+        '--file-tramstop', os.path.join(DIRECTORY, 'tram_stops.txt'),
+        '--file-connection',
+        os.path.join(DIRECTORY, 'tram_stops_connection.txt'),
+        '--file-tramline', os.path.join(DIRECTORY, 'tram_line.txt')
+    ]
+    delays_path = os.path.join(DIRECTORY, 'tram_delays.txt')
+    arrivals = monte_carlo(args, delays_path, 20, seed=3, workers=1)
+    network = network_setup(args)
+    with open(delays_path, 'r') as file_handle:
+        model = read_delays(file_handle, network)
+    seeds = get_replication_seeds(3, 20)
+    assert arrivals == run_replications(network, model, seeds)
+    assert monte_carlo(args, delays_path, 10, seed=4, workers=1) != (
+        run_replications(network, model, seeds[:10]))
+    report = format_report(network, arrivals).splitlines()
+    assert report[0].split() == [
+        'stop_id', 'name', 'line', 'scheduled', 'p50', 'p90', 'p95']
+    assert len(report) == len(arrivals) + 1
+    stop_id = network.get_list_tram_stops()[0].get_id()
+    report = format_report(network, arrivals, stop_ids=[stop_id])
+    assert all(line.split()[0] == stop_id
+               for line in report.splitlines()[1:])
+    assert format_time(5*60 + 4.5) == '05:04.5'
+
+
+def test_read_delays():
+    data = ('segment,*,*,lognormal,-2,0.5\n'
+            'segment,2,1,fixed,1\n'
+            'dwell,2,exponential,0.5\n')
+    tram_stopA = TramStop('1', 'Teatr Bagatela')
+    tram_stopB = TramStop('2', 'Stary Kleparz')
+    tram_stopC = TramStop('3', 'Teatr Słowackiego')
+    network = TramNetwork([tram_stopA, tram_stopB, tram_stopC])
+    model = read_delays(StringIO(data), network)
+    assert model.get_segment_delay(tram_stopA, tram_stopB) == (
+        Distribution('fixed', 1))
+    assert model.get_segment_delay(tram_stopC, tram_stopB) == (
+        Distribution('lognormal', -2, 0.5))
+    assert model.get_dwell(tram_stopB) == Distribution('exponential', 0.5)
+    assert model.get_dwell(tram_stopA) is None
+
+
+def test_read_delays_invalid():
+    network = TramNetwork([TramStop('1', 'Teatr Bagatela')])
+    for data, column in (('dwell,1,poisson,1', 9),
+                         ('dwell,1,uniform,1', 9),
+                         ('dwell,2,fixed,1', 7),
+                         ('dwell,1,fixed,x', 15),
+                         ('stop,1,fixed,1', 1)):
+        with pytest.raises(MalformedDataError) as error:
+            read_delays(StringIO(data), network)
+        assert error.value.column == column
@@ -0,0 +1,168 @@
+from simulator import Clock, Simulator
+from render import (
+                AnimationClock,
+                TramLayer,
+                MAX_SPEED,
+                format_time
+                )
+
+"""
+Unit tests to test the render layer of the simulation
+"""
+
+
+class SceneRecorder():
+    """
+    Renderer keeping markers as dictionaries and counting changes
+    """
+    def __init__(self):
+        self.markers = []
+        self.changes = 0
+
+    def create_marker(self):
+        marker = {'visible': False, 'name': None, 'position': None}
+        self.markers.append(marker)
+        return marker
+
+    def show_marker(self, marker, tram):
+        marker['visible'] = True
+        marker['name'] = tram.get_tram_name()
+        self.changes += 1
+
+    def hide_marker(self, marker):
+        marker['visible'] = False
+        self.changes += 1
+
+    def move_marker(self, marker, x, y):
+        marker['position'] = (x, y)
+        self.changes += 1
+
+
+def test_markers_follow_trams(create_network):
+    simulator = Simulator(create_network(trams=3), Clock(5, 0))
+    recorder = SceneRecorder()
+    layer = TramLayer(recorder)
+    simulator.run_until(5*60 + 2)
+    layer.update(simulator.get_fleet())
+    tram = simulator.get_fleet().get_trams()[0]
+    marker = layer.get_marker(0)
+    assert marker['visible'] and marker['name'] == '1'
+    assert marker['position'] == (tram.get_x(), tram.get_y())
+    assert layer.get_marker(1) is None
+
+
+def test_only_changed_markers_touched(create_network):
+    simulator = Simulator(create_network(trams=3), Clock(5, 0))
+    layer = TramLayer(SceneRecorder())
+    simulator.step()
+    assert layer.update(simulator.get_fleet()) == 1
+    assert layer.update(simulator.get_fleet()) == 0
+
+
+def test_markers_of_placed_trams_over_day(create_network):
+    simulator = Simulator(create_network(trams=3), Clock(5, 0))
+    recorder = SceneRecorder()
+    layer = TramLayer(recorder)
+    while simulator.get_minute() < 24*60:
+        simulator.step()
+        layer.update(simulator.get_fleet())
+        fleet = simulator.get_fleet()
+        placed = sum(1 for tram in fleet.get_trams() if tram.get_placed())
+        visible = sum(1 for marker in recorder.markers if marker['visible'])
+        assert visible == placed
+    assert len(layer.get_pool()) == len(fleet)
+    assert len(recorder.markers) == len(fleet)
+
+
+def test_stopped_trams_stay_visible(create_network):
+    simulator = Simulator(create_network(trams=3), Clock(5, 0))
+    layer = TramLayer(SceneRecorder())
+    simulator.run_until(5*60 + 9)
+    fleet = simulator.get_fleet()
+    assert fleet.get_activated(0) is False
+    layer.update(fleet, 0.5)
+    assert layer.get_marker(0)['visible']
+    assert layer.get_marker(0)['position'] == (40.0, 30.0)
+
+
+def test_interpolated_positions(create_network):
+    simulator = Simulator(create_network(trams=3), Clock(5, 0))
+    recorder = SceneRecorder()
+    layer = TramLayer(recorder)
+    simulator.run_until(5*60 + 2)
+    fleet = simulator.get_fleet()
+    layer.update(fleet, 0.0)
+    assert layer.get_marker(0)['position'] == (10.0, 0.0)
+    layer.update(fleet, 0.5)
+    assert layer.get_marker(0)['position'] == (15.0, 0.0)
+    layer.update(fleet, 1.0)
+    assert layer.get_marker(0)['position'] == (20.0, 0.0)
+    simulator.step()
+    layer.update(fleet, 0.0)
+    assert layer.get_marker(0)['position'] == (20.0, 0.0)
+
+
+def test_departing_tram_starts_at_tram_stop(create_network):
+    simulator = Simulator(create_network(trams=3), Clock(5, 0))
+    layer = TramLayer(SceneRecorder())
+    simulator.step()
+    layer.update(simulator.get_fleet(), 0.0)
+    assert layer.get_marker(0)['position'] == (0.0, 0.0)
+
+
+def test_animation_clock_speed():
+    animation = AnimationClock(speed=60)
+    assert animation.advance(1/60) == 1
+    assert animation.run(lambda: None) == (1, 0.0)
+    assert animation.advance(1/120) == 0
+    steps, fraction = animation.run(lambda: None)
+    assert steps == 0 and abs(fraction - 0.5) < 1e-9
+    animation.set_speed(10*MAX_SPEED)
+    assert animation.get_speed() == MAX_SPEED
+    animation.set_speed(0)
+    assert animation.get_speed() == 1
+
+
+def test_animation_clock_budget_of_frame():
+    now = [0.0]
+
+    def slow_step():
+        now[0] += 0.01
+
+    animation = AnimationClock(
+        speed=600, budget=0.025, timer=lambda: now[0])
+    assert animation.advance(1/60) == 10
+    assert animation.run(slow_step) == (3, 1.0)
+    assert animation.get_pending() == 7
+    animation.advance(0)
+    assert animation.run(slow_step) == (3, 1.0)
+    animation.advance(0)
+    animation.advance(0)
+    assert animation.run(slow_step) == (3, 1.0)
+    assert animation.run(slow_step) == (1, 0.0)
+    assert animation.get_dropped() == 0
+
+
+def test_animation_clock_drops_minutes():
+    animation = AnimationClock(speed=600, max_lag=1)
+    assert animation.advance(2) == 600
+    assert animation.get_dropped() == 600
+    assert animation.run(lambda: None)[0] > 0
+
+
+def test_trams_outside_viewport_hidden(create_network):
+    simulator = Simulator(create_network(trams=3), Clock(5, 0))
+    layer = TramLayer(SceneRecorder())
+    simulator.run_until(5*60 + 2)
+    fleet = simulator.get_fleet()
+    layer.update(fleet, viewport=(200, 200, 400, 400))
+    assert layer.get_marker(0) is None
+    assert layer.tram_at(20, 0, 5) is None
+    layer.update(fleet, viewport=(0, -10, 30, 10))
+    assert layer.get_marker(0)['visible']
+    assert layer.tram_at(21, 1, 5) is fleet.get_trams()[0]
+
+
+def test_format_time():
+    assert format_time(5, 3) == '5:03'
+    assert format_time(23, 45) == '23:45'
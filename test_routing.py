@@ -0,0 +1,87 @@
+from database import TramStop
+from routing import TravelTimeIndex, InvalidTravelTimeIndexError
+import pytest
+
+"""
+Unit tests to test shortest travel times between tram stops
+"""
+
+
+@pytest.fixture
+def network(network, add_line2):
+    """
+    Adds tram stop Poczta Główna and unconnected Politechnika
+    to the shared network
+    """
+    add_line2(network)
+    network.add_tram_stop(TramStop('5', 'Politechnika', 90, 90))
+    return network
+
+
+def test_travel_time(network):
+    tram_stopA, tram_stopB, tram_stopC, tram_stopD, tram_stopE = (
+        network.get_list_tram_stops())
+    index = TravelTimeIndex.build(network)
+    assert index.get_travel_time(tram_stopA, tram_stopA) == 0
+    assert index.get_travel_time(tram_stopA, tram_stopC) == 7
+    assert index.get_travel_time(tram_stopD, tram_stopA) == 10
+    assert index.get_travel_time(tram_stopA, tram_stopE) is None
+
+
+def test_travel_time_index_saved(tmp_path, network):
+    tram_stopA, tram_stopB, tram_stopC, tram_stopD, tram_stopE = (
+        network.get_list_tram_stops())
+    path = tmp_path / 'travel_times.bin'
+    TravelTimeIndex.build(network).save(path)
+    index = TravelTimeIndex.load(network, path)
+    assert index.get_travel_time(tram_stopB, tram_stopD) == 6
+    index.close()
+
+
+def test_travel_time_index_outdated(tmp_path, network):
+    tram_stopA, tram_stopB, tram_stopC, tram_stopD, tram_stopE = (
+        network.get_list_tram_stops())
+    path = tmp_path / 'travel_times.bin'
+    TravelTimeIndex.build(network).save(path)
+    network.add_connection(tram_stopD, tram_stopE, 2)
+    with pytest.raises(InvalidTravelTimeIndexError):
+        TravelTimeIndex.load(network, path)
+    index = TravelTimeIndex.load_or_build(network, path)
+    assert index.get_travel_time(tram_stopA, tram_stopE) == 12
+    index = TravelTimeIndex.load(network, path)
+    assert index.get_travel_time(tram_stopE, tram_stopB) == 8
+    index.close()
+
+
+def test_travel_time_on_demand(tmp_path, network):
+    list_tram_stops = network.get_list_tram_stops()
+    tram_stopA, tram_stopB, tram_stopC, tram_stopD, tram_stopE = (
+        list_tram_stops)
+    dense = TravelTimeIndex.build(network)
+    index = TravelTimeIndex.build(network, max_stops=4)
+    assert dense.is_dense()
+    assert not index.is_dense()
+    assert index.get_travel_time(tram_stopA, tram_stopD) == 10
+    assert index.get_travel_time(tram_stopD, tram_stopB) == 6
+    path = tmp_path / 'travel_times.bin'
+    index.save(path)
+    index = TravelTimeIndex.load(network, path)
+    assert not index.is_dense()
+    assert index.get_saved_rows() == [0, 3]
+    for source in list_tram_stops:
+        for target in list_tram_stops:
+            assert (index.get_travel_time(source, target) ==
+                    dense.get_travel_time(source, target))
+    index.save(path)
+    index.close()
+    index = TravelTimeIndex.load(network, path)
+    assert index.is_dense()
+    assert index.get_travel_time(tram_stopC, tram_stopB) == 3
+    index.close()
+    path = tmp_path / 'travel_times_empty.bin'
+    index = TravelTimeIndex.load_or_build(network, path, max_stops=4)
+    assert not index.is_dense()
+    index = TravelTimeIndex.load(network, path)
+    assert index.get_saved_rows() == []
+    assert index.get_travel_time(tram_stopE, tram_stopC) is None
+    index.close()
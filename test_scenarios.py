@@ -0,0 +1,72 @@
+import os
+import pytest
+from database import InvalidIntervalError
+from scenarios import (
+                scenario_grid,
+                build_scenario,
+                InvalidTramsNumberError,
+                run_scenario,
+                run_scenarios,
+                format_table
+                )
+
+"""
+Unit tests to test running simulation scenarios
+"""
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_scenario_grid():
+    scenarios = scenario_grid(interval=[10, 15], trams=[3, 5])
+    assert len(scenarios) == 4
+    assert scenarios[1] == {'interval': 10, 'start': None, 'trams': 5}
+
+
+def test_build_scenario(create_network):
+    base_network = create_network(trams=5)
+    scenario = {'interval': 20, 'start': (6, 30), 'trams': 2}
+    network = build_scenario(base_network, scenario)
+    tram_line = network.get_list_lines()[0]
+    assert tram_line.get_interval() == 20
+    assert tram_line.get_hours_start() == 6
+    assert tram_line.get_minutes_start() == 30
+    assert len(tram_line.get_list_tram()) == 2
+    assert tram_line.get_itinerary() == base_network.get_list_tram_stops()
+    base_line = base_network.get_list_lines()[0]
+    assert len(base_line.get_list_tram()) == 5
+
+
+def test_build_scenario_explicit_values(create_network):
+    base_network = create_network(trams=5)
+    network = build_scenario(base_network, {'trams': 0})
+    assert network.get_list_lines()[0].get_list_tram() == []
+    with pytest.raises(InvalidIntervalError):
+        build_scenario(base_network, {'interval': 0})
+    with pytest.raises(InvalidTramsNumberError):
+        build_scenario(base_network, {'trams': -1})
+
+
+def test_run_scenario(create_network):
+    row = run_scenario(create_network(trams=5), {'trams': 1}, until=330)
+    assert row['trams'] == 1
+    assert row['interval'] is None
+    assert row['departures'] == 3
+    assert row['arrivals'] == 6
+
+
+def test_run_scenarios():
+    args = [
+        'scenarios.py',
+        '--file-tramstop', os.path.join(DIRECTORY, 'tram_stops.txt'),
+        '--file-connection',
+        os.path.join(DIRECTORY, 'tram_stops_connection.txt'),
+        '--file-tramline', os.path.join(DIRECTORY, 'tram_line.txt')
+    ]
+    scenarios = scenario_grid(interval=[10, 20])
+    rows = run_scenarios(args, scenarios, until=8*60, workers=1)
+    assert [row['interval'] for row in rows] == [10, 20]
+    assert all(row['departures'] > 0 for row in rows)
+    table = format_table(rows).splitlines()
+    assert len(table) == 3
+    assert table[0].split()[0] == 'interval'
@@ -0,0 +1,52 @@
+from simulator import Clock, Simulator
+from schedule import (
+                get_departures,
+                get_trip_period,
+                position_at,
+                snapshot
+                )
+import pytest
+
+"""
+Unit tests to test the closed-form schedule of trams
+"""
+
+
+def test_departures(network):
+    tram = network.get_list_lines()[0].get_list_tram()[1][0]
+    departures = get_departures(tram)
+    assert departures[0] == 310
+    assert departures[1] == 330
+    assert departures[-1] < 24*60
+
+
+def test_trip_period_skips_departures(create_network):
+    network = create_network(interval=2)
+    assert get_trip_period(network.get_list_lines()[0]) == 8
+
+
+def test_position_at(network):
+    tram_line = network.get_list_lines()[0]
+    tram = tram_line.get_list_tram()[0][0]
+    assert position_at(tram, 300) is None
+    assert position_at(tram, 302) == (20, 0)
+    assert position_at(tram, 306) == (40, 20)
+    assert position_at(tram, 315) == (40, 30)
+    assert position_at(tram, 322) == (40, 10)
+
+
+@pytest.mark.parametrize('interval', [10, 2])
+def test_snapshot_matches_simulation(interval, create_network):
+    network = create_network(interval=interval)
+    simulator = Simulator(network, Clock(5, 0))
+    for minute in range(300, 27*60, 7):
+        simulator.run_until(minute)
+        positions = snapshot(network, minute)
+        for tram_tuple in network.get_list_lines()[0].get_list_tram():
+            tram = tram_tuple[0]
+            if tram._move is False:
+                assert tram not in positions
+            else:
+                x, y = positions[tram]
+                assert x == pytest.approx(tram.get_x())
+                assert y == pytest.approx(tram.get_y())
@@ -0,0 +1,89 @@
+import asyncio
+import math
+from simulator import Clock, Simulator
+from server import (
+                SimulationServer,
+                decode_message,
+                encode_lines,
+                encode_positions,
+                load_test,
+                DELTA,
+                HEADER,
+                LINES,
+                READ_SIZE,
+                STOPPED
+                )
+
+"""
+Unit tests to test the server streaming positions of trams
+"""
+
+
+def test_encode_decode_positions():
+    positions = [(0, 0, 1.5, 2.0), (7, 1, STOPPED, STOPPED)]
+    message = encode_positions(DELTA, 300, positions)
+    type, minute, records, size = HEADER.unpack_from(message)
+    assert (type, minute, records) == (DELTA, 300, 2)
+    assert size == len(message) - HEADER.size
+    decoded = decode_message(type, records, message[HEADER.size:])
+    assert decoded[0] == (0, 0, 1.5, 2.0)
+    assert decoded[1][:2] == (7, 1) and math.isnan(decoded[1][2])
+
+
+def test_encode_decode_lines(create_network):
+    message = encode_lines(create_network(trams=3))
+    type, minute, records, size = HEADER.unpack_from(message)
+    assert type == LINES
+    assert decode_message(type, records, message[HEADER.size:]) == ['1']
+
+
+def test_changes_only_moved_trams(create_network):
+    server = SimulationServer(Simulator(create_network(trams=3), Clock(5, 0)))
+    simulator = server.get_simulator()
+    simulator.run_until(5*60 + 2)
+    changes = server.get_changes()
+    assert [change[0] for change in changes] == [0]
+    assert server.get_changes() == []
+    simulator.run_until(5*60 + 14)
+    changes = server.get_changes()
+    assert sorted(change[0] for change in changes) == [0, 1]
+
+
+def test_subscribers_follow_fleet(create_network):
+    server, clients, seconds = asyncio.run(
+        load_test(create_network(trams=3), 3, 20, 0.001))
+    fleet = server.get_simulator().get_fleet()
+    expected = {
+        index: (fleet.get_x(index), fleet.get_y(index))
+        for index in range(len(fleet)) if fleet.get_activated(index)
+    }
+    assert len(server.get_tick_times()) == 20
+    for client in clients:
+        assert client.lines == ['1']
+        assert client.minute == 5*60 + 20
+        assert {
+            index: (x, y) for index, (line_id, x, y)
+            in client.positions.items()
+        } == expected
+
+
+def test_subscriber_input_dropped(create_network):
+
+    async def send_and_leave():
+        server = SimulationServer(
+            Simulator(create_network(trams=3), Clock(5, 0)))
+        await server.start(port=0)
+        reader, writer = await asyncio.open_connection(
+            '127.0.0.1', server.get_port())
+        while not server.get_subscribers():
+            await asyncio.sleep(0.01)
+        writer.write(bytes(10*READ_SIZE + 1))
+        await writer.drain()
+        subscribed = len(server.get_subscribers())
+        writer.close()
+        while server.get_subscribers():
+            await asyncio.sleep(0.01)
+        await server.close()
+        return subscribed
+
+    assert asyncio.run(asyncio.wait_for(send_and_leave(), 5)) == 1
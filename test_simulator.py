@@ -0,0 +1,108 @@
+from simulator import Clock, Simulator, EventSimulator
+from simulator import ARRIVAL, DEPARTURE, REVERSAL
+
+"""
+Unit tests to test the headless simulation engine
+"""
+
+
+def test_clock_increase_time():
+    clock = Clock(23, 59)
+    clock.increase_time()
+    assert clock.get_hours() == 0
+    assert clock.get_minutes() == 0
+
+
+def test_simulator_step(network):
+    simulator = Simulator(network, Clock(5, 0))
+    simulator.step()
+    tram = network.get_list_lines()[0].get_list_tram()[0][0]
+    assert simulator.get_minute() == 301
+    assert simulator.get_clock().get_time_in_minutes() == 301
+    assert tram.get_activated() is True
+    assert (tram.get_x(), tram.get_y()) == (10, 0)
+
+
+def test_simulator_run_until_reaches_stop(network):
+    simulator = Simulator(network, Clock(5, 0))
+    simulator.run_until(304)
+    tram = network.get_list_lines()[0].get_list_tram()[0][0]
+    assert (tram.get_x(), tram.get_y()) == (40, 0)
+    assert tram.get_last_tram_stop_number() == 1
+
+
+def test_simulator_reverses_route(network):
+    simulator = Simulator(network, Clock(5, 0))
+    simulator.run_until(320)
+    tram_line = network.get_list_lines()[0]
+    tram = tram_line.get_list_tram()[0][0]
+    tram_reversed = tram_line.get_list_tram()[1][0]
+    assert tram.get_activated() is False
+    assert tram.itinerary == tram_line.get_itinerary()[::-1]
+    assert (tram_reversed.get_x(), tram_reversed.get_y()) == (0, 0)
+
+
+def test_simulator_run_over_midnight(network):
+    simulator = Simulator(network, Clock(23, 0))
+    simulator.run_until(24*60 + 30)
+    assert simulator.get_minute() == 24*60 + 30
+    assert simulator.get_clock().get_time_in_minutes() == 30
+
+
+def test_simulator_log(network):
+    log = []
+    simulator = Simulator(network, Clock(5, 0), log)
+    simulator.run_until(308)
+    tram_line = network.get_list_lines()[0]
+    tram = tram_line.get_list_tram()[0][0]
+    tram_stopA, tram_stopB, tram_stopC = tram_line.get_itinerary()
+    assert log == [
+        (300, DEPARTURE, tram, tram_stopA),
+        (304, ARRIVAL, tram, tram_stopB),
+        (307, ARRIVAL, tram, tram_stopC),
+        (307, REVERSAL, tram, tram_stopC)
+    ]
+
+
+def test_clock_set_time_in_minutes():
+    clock = Clock()
+    clock.set_time_in_minutes(24*60 + 75)
+    assert clock.get_hours() == 1
+    assert clock.get_minutes() == 15
+
+
+def get_log_entries(log):
+    return [
+        (minute, event, tram.get_line_number(), tram_stop.get_id())
+        for minute, event, tram, tram_stop in log
+    ]
+
+
+def test_event_simulator_matches_simulator(create_network):
+    log = []
+    Simulator(create_network(), Clock(5, 0), log).run_until(27*60)
+    event_log = []
+    simulator = EventSimulator(create_network(), Clock(5, 0), event_log)
+    simulator.run_until(27*60)
+    assert simulator.get_clock().get_time_in_minutes() == 3*60
+    assert get_log_entries(event_log) == get_log_entries(log)
+
+
+def test_event_simulator_matches_simulator_over_days(create_network):
+    for hours in (5, 23):
+        log = []
+        Simulator(create_network(), Clock(hours, 0), log).run_until(3*24*60)
+        event_log = []
+        simulator = EventSimulator(
+            create_network(), Clock(hours, 0), event_log)
+        simulator.run_until(3*24*60)
+        assert get_log_entries(event_log) == get_log_entries(log)
+        assert any(entry[0] > 2*24*60 for entry in event_log)
+
+
+def test_event_simulator_position_at_stop(network):
+    simulator = EventSimulator(network, Clock(5, 0))
+    simulator.run_until(304)
+    tram = network.get_list_lines()[0].get_list_tram()[0][0]
+    assert (tram.get_x(), tram.get_y()) == (40, 0)
+    assert tram.get_last_tram_stop_number() == 1
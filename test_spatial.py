@@ -0,0 +1,46 @@
+from spatial import GridIndex, get_edges, index_edges
+
+"""
+Unit tests to test the spatial index of the map
+"""
+
+
+def test_query_points():
+    index = GridIndex(10)
+    index.insert('a', 5, 5)
+    index.insert('b', 25, -5)
+    index.insert('c', 100, 100)
+    assert index.query(0, -10, 30, 10) == {'a', 'b'}
+    assert index.query(101, 101, 200, 200) == set()
+    assert len(index) == 3
+
+
+def test_move_and_remove():
+    index = GridIndex(10)
+    index.insert('a', 5, 5)
+    index.move('a', 7, 7)
+    index.move('a', 55, 5)
+    assert index.query(0, 0, 10, 10) == set()
+    assert index.query(50, 0, 60, 10) == {'a'}
+    index.remove('a')
+    assert 'a' not in index
+    assert index.query(50, 0, 60, 10) == set()
+    index.move('b', 1, 1)
+    assert index.query(0, 0, 2, 2) == {'b'}
+
+
+def test_nearest():
+    index = GridIndex(10)
+    index.insert('a', 0, 0)
+    index.insert('b', 4, 0)
+    assert index.nearest(3, 0, 5) == 'b'
+    assert index.nearest(-1, 0, 5) == 'a'
+    assert index.nearest(20, 20, 5) is None
+
+
+def test_edges_once(network):
+    tram_stopA, tram_stopB, tram_stopC = network.get_list_tram_stops()
+    edges = get_edges(network)
+    assert edges == [(tram_stopA, tram_stopB), (tram_stopB, tram_stopC)]
+    index = index_edges(edges, 10)
+    assert index.query(35, 15, 45, 25) == {(tram_stopB, tram_stopC)}
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+from tiles import (
+                TileCache,
+                get_level,
+                get_tile_bounds,
+                get_tiles,
+                MAX_LEVEL,
+                MIN_LEVEL
+                )
+
+"""
+Unit tests to test the cached static layer of the map
+"""
+
+
+class TileRecorder():
+    """
+    Renderer returning what was drawn on tiles instead of images
+    """
+    def __init__(self):
+        self.rendered = []
+
+    def render_tile(self, level, bounds, tram_stops, edges, labels):
+        self.rendered.append((level, bounds))
+        return (set(tram_stops), set(edges), labels)
+
+
+def test_levels_and_tiles():
+    assert get_level(1) == 0
+    assert get_level(1.9) == 1
+    assert get_level(0.2) == -2
+    assert get_level(1000) == MAX_LEVEL
+    assert get_level(0.0001) == MIN_LEVEL
+    assert get_tile_bounds(1, 1, -1) == (128, -128, 256, 0)
+    assert get_tiles(0, -10, 0, 300, 100) == [(0, -1, 0), (0, 0, 0), (0, 1, 0)]
+
+
+def test_tile_elements_and_labels(network):
+    tram_stopA, tram_stopB, tram_stopC = network.get_list_tram_stops()
+    cache = TileCache(TileRecorder(), network)
+    tram_stops, edges, labels = cache.get_tile((0, 0, 0))
+    assert tram_stops == {tram_stopA, tram_stopB, tram_stopC}
+    assert edges == {(tram_stopA, tram_stopB), (tram_stopB, tram_stopC)}
+    assert labels
+    assert cache.get_tile((0, 1, 0))[:2] == (set(), set())
+    assert cache.get_tile((-1, 0, 0))[2] is False
+
+
+def test_tiles_cached(network):
+    recorder = TileRecorder()
+    cache = TileCache(recorder, network, max_tiles=2)
+    tiles = cache.get_visible_tiles(1, 0, 0, 300, 100)
+    assert len(tiles) == 2
+    cache.get_visible_tiles(1, 0, 0, 300, 100)
+    assert len(recorder.rendered) == 2
+    cache.get_tile((0, 5, 5))
+    assert len(cache) == 2
+    cache.get_tile((0, 1, 0))
+    cache.get_tile((0, 0, 0))
+    assert len(recorder.rendered) == 4
+
+
+def test_cache_fits_viewport(network):
+    recorder = TileRecorder()
+    cache = TileCache(recorder, network, max_tiles=2)
+    tiles = cache.get_visible_tiles(2, 0, 0, 300, 200)
+    assert len(tiles) == 6
+    assert len(cache) == 6
+    cache.get_visible_tiles(2, 0, 0, 300, 200)
+    assert len(recorder.rendered) == 6
+    cache.get_visible_tiles(2, 0, 0, 100, 100)
+    cache.get_tile((0, 5, 5))
+    assert len(cache) == 6
+
+
+def test_tiles_drawn_in_background(network):
+    recorder = TileRecorder()
+    with ThreadPoolExecutor(1) as executor:
+        cache = TileCache(recorder, network, executor=executor)
+        assert cache.get_tile((0, 0, 0)) is None
+        assert cache.get_tile((0, 0, 0)) is None
+    assert cache.collect() == 1
+    assert cache.get_tile((0, 0, 0)) is not None
+    assert len(recorder.rendered) == 1
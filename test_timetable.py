@@ -0,0 +1,68 @@
+from io import StringIO
+from timetable import Timetable, format_gtfs_time
+
+"""
+Unit tests to test departure boards of tram stops
+"""
+
+
+def test_next_departures(create_network, add_line2):
+    timetable = Timetable(add_line2(create_network()))
+    assert timetable.next_departures('1', 301, 3) == [
+        (330, '1', '1_2_1', 'Teatr Słowackiego'),
+        (340, '1', '1_1_2', 'Teatr Słowackiego'),
+        (370, '1', '1_2_3', 'Teatr Słowackiego')
+    ]
+    assert timetable.next_departures('2', 300, 4) == [
+        (304, '1', '1_1_0', 'Teatr Słowackiego'),
+        (313, '1', '1_2_0', 'Teatr Bagatela'),
+        (323, '1', '1_1_1', 'Teatr Bagatela'),
+        (334, '1', '1_2_1', 'Teatr Słowackiego')
+    ]
+    assert timetable.next_departures('1', 24*60) == []
+
+
+def test_boards_merge_lines(create_network, add_line2):
+    timetable = Timetable(add_line2(create_network()))
+    departures = timetable.next_departures('3', 300, 4)
+    assert [(departure[0], departure[1]) for departure in departures] == [
+        (305, '2'), (310, '1'), (320, '1'), (335, '2')
+    ]
+    assert timetable.next_arrivals('3', 300, 3) == [307, 325, 337]
+
+
+def test_update_lines_only_changed(create_network, add_line2):
+    network = add_line2(create_network())
+    timetable = Timetable(network)
+    board = timetable.get_board('4')
+    assert timetable.update_lines(network.get_list_lines()) == []
+    changed_network = add_line2(create_network(interval=15))
+    assert timetable.update_lines(changed_network.get_list_lines()) == ['1']
+    assert timetable.get_board('4') is board
+    assert timetable.next_departures('1', 301, 1)[0][0] == 345
+    timetable.update_lines(changed_network.get_list_lines()[1:])
+    assert timetable.next_departures('1', 0) == []
+
+
+def test_write_stop_times(create_network, add_line2):
+    timetable = Timetable(add_line2(create_network()))
+    file_handle = StringIO()
+    timetable.write_stop_times(file_handle)
+    rows = file_handle.getvalue().splitlines()
+    assert rows[0] == (
+        'trip_id,arrival_time,departure_time,stop_id,stop_sequence')
+    assert rows[1:4] == [
+        '1_1_0,05:00:00,05:00:00,1,1',
+        '1_1_0,05:04:00,05:04:00,2,2',
+        '1_1_0,05:07:00,05:07:00,3,3'
+    ]
+    assert format_gtfs_time(25*60 + 5) == '25:05:00'
+
+
+def test_write_csv(create_network, add_line2):
+    timetable = Timetable(add_line2(create_network()))
+    file_handle = StringIO()
+    timetable.write_csv(file_handle)
+    rows = file_handle.getvalue().splitlines()
+    assert rows[0] == 'stop_id,departure,line,trip_id,destination'
+    assert rows[1] == '1,300,1,1_1_0,Teatr Słowackiego'
@@ -0,0 +1,157 @@
+import math
+from collections import OrderedDict
+from spatial import CELL_SIZE, get_edges, index_tram_stops, index_edges
+
+"""
+Cached static layer of the map. Tram stops, their names and connections
+never change during the simulation, so they are drawn once into square
+tiles for each zoom level (a tile pyramid) and only the tiles are painted
+each frame. Names of tram stops are drawn only at LABEL_LEVEL and above.
+Tiles can be drawn by a background thread given as an executor.
+Renderers implement:
+    render_tile(level, bounds, tram_stops, edges, labels)
+        returns image of the tile with given bounds (left, top, right,
+        bottom) of the map, drawn at scale 2**level
+"""
+
+TILE_SIZE = 256
+MIN_LEVEL = -4
+MAX_LEVEL = 4
+LABEL_LEVEL = 0
+MAX_TILES = 512
+MARGIN = 50
+
+
+def get_level(scale):
+    """
+    Returns the zoom level of tiles closest to the scale of the view
+    """
+    level = round(math.log2(scale))
+    return min(max(level, MIN_LEVEL), MAX_LEVEL)
+
+
+def get_tile_size(level):
+    """
+    Returns the length of the side of tiles of the level on the map
+    """
+    return TILE_SIZE / 2**level
+
+
+def get_tile_bounds(level, column, row):
+    size = get_tile_size(level)
+    return (column*size, row*size, (column + 1)*size, (row + 1)*size)
+
+
+def get_tiles(level, left, top, right, bottom):
+    """
+    Returns keys (level, column, row) of tiles covering the rectangle
+    """
+    size = get_tile_size(level)
+    return [
+        (level, column, row)
+        for row in range(math.floor(top / size), math.floor(bottom / size) + 1)
+        for column in range(
+            math.floor(left / size), math.floor(right / size) + 1)
+    ]
+
+
+class TileCache():
+    """
+    Class TileCache. Tiles of the static layer drawn so far, the least
+    recently used tiles are dropped over max_tiles. max_tiles grows to
+    the number of tiles of the largest viewport, so tiles of the viewport
+    never drop each other. Contains attributes:
+    :param renderer: draws tiles
+    :type renderer: object
+
+    :param stops_index, edges_index: spatial indexes of the network
+    :type stops_index, edges_index: GridIndex
+
+    :param tiles: images of tiles by their keys
+    :type tiles: OrderedDict
+
+    :param executor: draws tiles in the background, if it is given
+    :type executor: concurrent.futures.Executor
+
+    :param pending: tiles being drawn by the executor
+    :type pending: dict
+    """
+    def __init__(
+            self, renderer, network, max_tiles=MAX_TILES, executor=None,
+            cell_size=CELL_SIZE):
+        self._renderer = renderer
+        self._stops_index = index_tram_stops(network, cell_size)
+        self._edges_index = index_edges(get_edges(network), cell_size)
+        self._tiles = OrderedDict()
+        self._max_tiles = max_tiles
+        self._executor = executor
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def get_elements(self, key):
+        """
+        Returns tram stops and connections to be drawn on the tile,
+        with those close enough for their markers and names to reach it
+        """
+        left, top, right, bottom = get_tile_bounds(*key)
+        bounds = (left - MARGIN, top - MARGIN, right + MARGIN, bottom + MARGIN)
+        tram_stops = self._stops_index.query(*bounds)
+        edges = self._edges_index.query(*bounds)
+        return (tram_stops, edges)
+
+    def render(self, key):
+        tram_stops, edges = self.get_elements(key)
+        level = key[0]
+        return self._renderer.render_tile(
+            level, get_tile_bounds(*key), tram_stops, edges,
+            level >= LABEL_LEVEL)
+
+    def store(self, key, image):
+        self._tiles[key] = image
+        while len(self._tiles) > self._max_tiles:
+            self._tiles.popitem(last=False)
+
+    def collect(self):
+        """
+        Stores tiles drawn in the background.
+        Returns the number of new tiles.
+        """
+        done = [key for key, future in self._pending.items() if future.done()]
+        for key in done:
+            self.store(key, self._pending.pop(key).result())
+        return len(done)
+
+    def get_tile(self, key):
+        """
+        Returns the image of the tile. It is drawn if it is not cached,
+        in the background if there is an executor (None is returned then)
+        """
+        image = self._tiles.get(key)
+        if image is not None:
+            self._tiles.move_to_end(key)
+            return image
+        if self._executor is None:
+            image = self.render(key)
+            self.store(key, image)
+            return image
+        if key not in self._pending:
+            self._pending[key] = self._executor.submit(self.render, key)
+        return None
+
+    def get_visible_tiles(self, scale, left, top, right, bottom):
+        """
+        Returns (bounds, image) of tiles covering the viewport at the zoom
+        level of the scale, image is None for tiles not drawn yet
+        """
+        keys = get_tiles(get_level(scale), left, top, right, bottom)
+        self._max_tiles = max(self._max_tiles, len(keys))
+        return [(get_tile_bounds(*key), self.get_tile(key)) for key in keys]
+
+    def tram_stop_at(self, x, y, radius):
+        """
+        Returns the tram stop closest to (x, y) within the radius
+        or None if there is no such tram stop
+        """
+        return self._stops_index.nearest(x, y, radius)
@@ -0,0 +1,243 @@
+import csv
+import heapq
+from array import array
+from bisect import bisect_left
+from schedule import get_departures, is_trip_reversed
+
+"""
+Departure boards of tram stops for the service day. Stop times of trips
+are computed from the closed-form schedule, so the whole day is generated
+without simulating it. Boards are kept per tram line and merged for each
+tram stop when it is requested, changing a line rebuilds only its trips
+and boards of its tram stops.
+"""
+
+STOP_TIMES_HEADER = (
+    'trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence')
+BOARD_HEADER = ('stop_id', 'departure', 'line', 'trip_id', 'destination')
+
+
+def get_trip_id(tram, trip):
+    return f'{tram.get_line().get_number()}_{tram.get_line_number()}_{trip}'
+
+
+def get_trips(tram_line):
+    """
+    Yields (trip id, departure, reversed) of all trips of the line
+    started during the service day, ordered by trams
+    """
+    if len(tram_line.get_itinerary()) < 2:
+        return
+    for tram_tuple in tram_line.get_list_tram():
+        tram = tram_tuple[0]
+        for trip, departure in enumerate(get_departures(tram)):
+            yield (get_trip_id(tram, trip), departure,
+                   is_trip_reversed(tram, trip))
+
+
+def get_destination(tram_line, reversed):
+    itinerary = tram_line.get_itinerary()
+    return itinerary[0] if reversed else itinerary[-1]
+
+
+def get_stop_times(tram_line):
+    """
+    Yields (trip id, minute, tram stop, stop sequence) of all trips
+    of the line, trams do not wait at tram stops
+    """
+    total_minutes = tram_line.get_segment_table().get_total_minutes()
+    itineraries = {}
+    for reversed in (False, True):
+        itinerary = tram_line.get_itinerary()
+        offsets = [*tram_line.get_segment_table(reversed).offset,
+                   total_minutes]
+        itineraries[reversed] = list(zip(
+            itinerary[::-1] if reversed else itinerary, offsets))
+    for trip_id, departure, reversed in get_trips(tram_line):
+        for sequence, (tram_stop, offset) in enumerate(
+                itineraries[reversed]):
+            yield (trip_id, departure + offset, tram_stop, sequence)
+
+
+def get_signature(tram_line):
+    """
+    Returns the tuple of all data the trips of the line depend on
+    """
+    return (
+        tuple(tram_stop.get_id() for tram_stop in tram_line.get_itinerary()),
+        tram_line.get_hours_start(), tram_line.get_minutes_start(),
+        tram_line.get_interval(), len(tram_line.get_list_tram()),
+        tuple(tram_line.get_segment_table().offset),
+        tram_line.get_segment_table().get_total_minutes())
+
+
+def format_gtfs_time(minute):
+    """
+    Returns the time as HH:MM:SS, hours of the next day continue after 23
+    """
+    return f'{minute // 60:02}:{minute % 60:02}:00'
+
+
+class StopBoard():
+    """
+    Class StopBoard. Arrivals and departures at the tram stop during
+    the service day. Contains attributes:
+    :param arrivals: sorted minutes of arrivals
+    :type arrivals: array of int
+
+    :param departures: sorted minutes of departures
+    :type departures: array of int
+
+    :param trips: (line, trip id, destination) of each departure
+    :type trips: list of tuples
+    """
+    def __init__(self, arrivals, departures):
+        self.arrivals = array('i', arrivals)
+        departures = list(departures)
+        self.departures = array('i', (entry[0] for entry in departures))
+        self.trips = [entry[1:] for entry in departures]
+
+    def __len__(self):
+        return len(self.departures)
+
+
+class Timetable():
+    """
+    Class Timetable. Departure boards of tram stops of the network.
+    Contains attributes:
+    :param lines: tram line, its signature and stop times at each tram stop
+    :type lines: dict
+
+    :param boards: boards of tram stops built so far
+    :type boards: dict
+    """
+    def __init__(self, network=None):
+        self._lines = {}
+        self._boards = {}
+        if network is not None:
+            self.update_lines(network.get_list_lines())
+
+    def add_line(self, tram_line):
+        """
+        Generates stop times of all trips of the line, replaces the line
+        with the same number
+        """
+        number = tram_line.get_number()
+        arrivals = {}
+        departures = {}
+        destinations = {
+            trip_id: get_destination(tram_line, reversed).get_name()
+            for trip_id, departure, reversed in get_trips(tram_line)
+        }
+        last = len(tram_line.get_itinerary()) - 1
+        for trip_id, minute, tram_stop, sequence in get_stop_times(tram_line):
+            stop_id = tram_stop.get_id()
+            if sequence > 0:
+                arrivals.setdefault(stop_id, []).append(minute)
+            if sequence < last:
+                departures.setdefault(stop_id, []).append(
+                    (minute, number, trip_id, destinations[trip_id]))
+        for entries in (*arrivals.values(), *departures.values()):
+            entries.sort()
+        self.remove_line(number)
+        self._lines[number] = (
+            tram_line, get_signature(tram_line), arrivals, departures)
+        self.invalidate(arrivals.keys() | departures.keys())
+
+    def remove_line(self, number):
+        if number in self._lines:
+            line_tuple = self._lines.pop(number)
+            arrivals, departures = line_tuple[2], line_tuple[3]
+            self.invalidate(arrivals.keys() | departures.keys())
+
+    def update_lines(self, tram_lines):
+        """
+        Brings the timetable up to date with given tram lines.
+        Only new and changed lines are generated again, e.g. after
+        reading the configuration file of tram lines once more.
+        Returns numbers of regenerated lines.
+        """
+        numbers = set()
+        changed = []
+        for tram_line in tram_lines:
+            number = tram_line.get_number()
+            numbers.add(number)
+            line_tuple = self._lines.get(number)
+            if line_tuple is None or line_tuple[1] != get_signature(tram_line):
+                self.add_line(tram_line)
+                changed.append(number)
+            else:
+                self._lines[number] = (tram_line, *line_tuple[1:])
+        for number in self._lines.keys() - numbers:
+            self.remove_line(number)
+        return changed
+
+    def invalidate(self, stop_ids):
+        for stop_id in stop_ids:
+            self._boards.pop(stop_id, None)
+
+    def get_board(self, stop_id):
+        """
+        Returns the board of the tram stop, merges stop times of lines
+        if it is not built yet
+        """
+        board = self._boards.get(stop_id)
+        if board is None:
+            arrivals = heapq.merge(*(
+                line_tuple[2].get(stop_id, ())
+                for line_tuple in self._lines.values()))
+            departures = heapq.merge(*(
+                line_tuple[3].get(stop_id, ())
+                for line_tuple in self._lines.values()))
+            board = StopBoard(arrivals, departures)
+            self._boards[stop_id] = board
+        return board
+
+    def next_departures(self, stop_id, minute, n=5):
+        """
+        Returns at most n first departures from the tram stop at given
+        minute or later as (minute, line, trip id, destination) tuples
+        """
+        board = self.get_board(stop_id)
+        first = bisect_left(board.departures, minute)
+        last = min(first + n, len(board.departures))
+        return [
+            (board.departures[index], *board.trips[index])
+            for index in range(first, last)
+        ]
+
+    def next_arrivals(self, stop_id, minute, n=5):
+        """
+        Returns at most n first minutes of arrivals at the tram stop
+        at given minute or later
+        """
+        arrivals = self.get_board(stop_id).arrivals
+        first = bisect_left(arrivals, minute)
+        return list(arrivals[first:first + n])
+
+    def write_csv(self, file_handle):
+        """
+        Writes departure boards of all tram stops into CSV file
+        """
+        writer = csv.writer(file_handle, lineterminator='\n')
+        writer.writerow(BOARD_HEADER)
+        stop_ids = set()
+        for line_tuple in self._lines.values():
+            stop_ids.update(line_tuple[3])
+        for stop_id in sorted(stop_ids):
+            board = self.get_board(stop_id)
+            for minute, trip in zip(board.departures, board.trips):
+                writer.writerow((stop_id, minute, *trip))
+
+    def write_stop_times(self, file_handle):
+        """
+        Writes stop times of all trips in GTFS stop_times.txt format
+        """
+        writer = csv.writer(file_handle, lineterminator='\n')
+        writer.writerow(STOP_TIMES_HEADER)
+        for line_tuple in self._lines.values():
+            for trip_id, minute, tram_stop, sequence in get_stop_times(
+                    line_tuple[0]):
+                time = format_gtfs_time(minute)
+                writer.writerow(
+                    (trip_id, time, time, tram_stop.get_id(), sequence + 1))